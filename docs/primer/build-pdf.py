@@ -3,31 +3,63 @@
 
     python3 docs/primer/build-pdf.py            # build the PDF
     python3 docs/primer/build-pdf.py --verify   # build, then audit each page
+    python3 docs/primer/build-pdf.py --force    # rebuild even if nothing changed
 
 `rivet-primer.html` is the same file published as the web artifact: a fragment
 with no <html>/<head>/<body>, because the artifact host wraps it at publish
 time. This script wraps it for standalone rendering, forces the light theme,
 layers on print CSS, and drives headless Chrome's --print-to-pdf.
 
---verify rasterizes every page through macOS PDFKit (pdf2png.jxa.js) and reports
-how much of each page's text block is actually filled. Catches the failure this
+--verify rasterizes every page and reports how much of each page's text block is
+actually filled, and where it has blank bands mid-page. Catches the failure this
 document is prone to: a tall figure or table that won't fit in the space left on
 a page gets bumped whole to the next one, leaving half a sheet blank.
-Requires Pillow + numpy; skipped automatically if they aren't installed.
+Rasterizes with PyMuPDF if installed, else poppler's pdftoppm, else macOS PDFKit
+(pdf2png.jxa.js). Requires numpy (plus Pillow for the PDFKit route); skipped
+automatically if they aren't installed.
+
+Both steps are cached in Rivet-Engineering-Primer.build.json beside the PDF.
+Chrome only runs when the print HTML it would be given, its flags or the Chrome
+binary changed; --verify reuses the last report outright when the PDF is byte
+for byte the same, and otherwise re-analyses only pages whose raster changed.
 """
 
+import hashlib
+import json
+import math
+import os
 import pathlib
 import re
 import shutil
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 HERE = pathlib.Path(__file__).resolve().parent
 SRC = HERE / "rivet-primer.html"
 PRINT_HTML = HERE / "rivet-primer-print.html"
 PDF = HERE.parent / "Rivet-Engineering-Primer.pdf"
+CACHE = PDF.with_suffix(".build.json")
 
 CHROME = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+CHROME_FLAGS = [
+    "--headless",
+    "--disable-gpu",
+    "--no-pdf-header-footer",
+    "--run-all-compositor-stages-before-draw",
+    "--virtual-time-budget=8000",
+]
+
+# 72 dpi x 1.6: enough to see a line of text, cheap enough to raster 60 pages.
+SCALE = 1.6
+# Grey level below which a pixel counts as ink (the page ground is #FDFDFE).
+INK = 235
+# Below this % of the text block a page has ended early.
+SHORT = 82
+# A blank band at least this tall between content is a bumped block too —
+# section padding and figure margins stay well under it.
+GAP_MM = 30
 
 PRINT_CSS = """
 /* ---- Print / PDF ------------------------------------------------------
@@ -92,14 +124,26 @@ PRINT_CSS = """
 """
 
 
-def build() -> None:
+def find_chrome():
+    """$CHROME, then the macOS app, then whatever Chrome/Chromium is on PATH."""
+    if os.environ.get("CHROME"):
+        return os.environ["CHROME"]
+    if pathlib.Path(CHROME).exists():
+        return CHROME
+    for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"):
+        found = shutil.which(name)
+        if found:
+            return found
+    return None
+
+
+def print_html() -> str:
     frag = SRC.read_text()
     m = re.search(r"<title>(.*?)</title>", frag, re.S)
     title = m.group(1).strip() if m else "Rivet — Engineering Primer"
     frag = re.sub(r"<title>.*?</title>\s*", "", frag, count=1, flags=re.S)
 
-    PRINT_HTML.write_text(
-        f"""<!doctype html>
+    return f"""<!doctype html>
 <html lang="en" data-theme="light">
 <head>
 <meta charset="utf-8">
@@ -112,35 +156,179 @@ def build() -> None:
 </body>
 </html>
 """
-    )
 
-    if not pathlib.Path(CHROME).exists():
-        sys.exit(f"Chrome not found at {CHROME} — install it or edit CHROME in this script.")
 
+def load_cache() -> dict:
+    try:
+        return json.loads(CACHE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache: dict) -> None:
+    tmp = CACHE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cache, indent=1))
+    tmp.replace(CACHE)
+
+
+def file_hash(path: pathlib.Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def chrome_identity(chrome: str) -> str:
+    """The binary's path, size and mtime: an in-place upgrade changes the last two."""
+    stat = pathlib.Path(shutil.which(chrome) or chrome).resolve().stat()
+    return f"{chrome}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def build(force: bool = False) -> None:
+    html = print_html()
+    chrome = find_chrome()
+    if not chrome:
+        sys.exit(f"Chrome not found at {CHROME} or on PATH — install it or set $CHROME.")
+
+    # Everything that decides the PDF: the page Chrome is handed (source
+    # fragment, wrapper and print CSS), the flags, and which Chrome build.
+    key = hashlib.sha256("\0".join([html, *CHROME_FLAGS, chrome_identity(chrome)]).encode()).hexdigest()
+    cache = load_cache()
+    if not force and cache.get("build") == key and PDF.exists() and cache.get("pdf") == file_hash(PDF):
+        print(f"up to date {PDF.relative_to(PDF.parents[2])}  (nothing changed since the last build)")
+        return
+
+    PRINT_HTML.write_text(html)
     subprocess.run(
-        [
-            CHROME,
-            "--headless",
-            "--disable-gpu",
-            "--no-pdf-header-footer",
-            "--run-all-compositor-stages-before-draw",
-            "--virtual-time-budget=8000",
-            f"--print-to-pdf={PDF}",
-            SRC.as_uri().replace(SRC.name, PRINT_HTML.name),
-        ],
+        [chrome, *CHROME_FLAGS, f"--print-to-pdf={PDF}", SRC.as_uri().replace(SRC.name, PRINT_HTML.name)],
         check=True,
         capture_output=True,
     )
+    # The page report belongs to the old PDF; verify() keeps its per-page
+    # results and drops the ones whose raster no longer matches.
+    save_cache({**cache, "build": key, "pdf": file_hash(PDF)})
     print(f"built {PDF.relative_to(PDF.parents[2])}  ({PDF.stat().st_size // 1024} KB)")
 
 
+def rasterize(pdf: pathlib.Path, pages: pathlib.Path):
+    """Every page of `pdf` as a greyscale array, and the renderer that made them."""
+    import numpy as np
+
+    try:
+        import pymupdf  # in-process, no files
+
+        out = []
+        with pymupdf.open(pdf) as doc:
+            for page in doc:
+                pix = page.get_pixmap(matrix=pymupdf.Matrix(SCALE, SCALE), colorspace=pymupdf.csGRAY)
+                a = np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.stride)
+                out.append(a[:, : pix.width])
+        return out, "pymupdf"
+    except ImportError:
+        pass
+
+    if shutil.which("pdftoppm") and shutil.which("pdfinfo"):
+        info = subprocess.run(["pdfinfo", str(pdf)], check=True, capture_output=True, text=True).stdout
+        n = int(re.search(r"^Pages:\s+(\d+)", info, re.M).group(1))
+        # pdftoppm is single-threaded; split the page range across cores.
+        workers = min(os.cpu_count() or 1, n)
+        step = math.ceil(n / workers)
+        dpi = str(round(72 * SCALE))
+
+        def render(first: int) -> None:
+            last = min(first + step - 1, n)
+            subprocess.run(
+                ["pdftoppm", "-r", dpi, "-gray", "-f", str(first), "-l", str(last), str(pdf), str(pages / "page")],
+                check=True,
+                capture_output=True,
+            )
+
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(render, range(1, n + 1, step)))
+        return [read_pgm(p) for p in sorted(pages.glob("page-*.pgm"))], "pdftoppm"
+
+    if sys.platform == "darwin":
+        from PIL import Image
+
+        subprocess.run(
+            ["osascript", "-l", "JavaScript", str(HERE / "pdf2png.jxa.js"), str(pdf), str(pages), str(SCALE)],
+            check=True,
+            capture_output=True,
+        )
+        return [np.asarray(Image.open(p).convert("L")) for p in sorted(pages.glob("page-*.png"))], "pdfkit"
+
+    raise RuntimeError("no rasterizer — `pip install pymupdf` or install poppler-utils")
+
+
+def read_pgm(path: pathlib.Path):
+    """A binary (P5) 8-bit PGM as written by pdftoppm -gray, without Pillow."""
+    import numpy as np
+
+    data = path.read_bytes()
+    m = re.match(rb"P5\s+(?:#[^\n]*\s+)*(\d+)\s+(\d+)\s+(\d+)\s", data)
+    w, h = int(m.group(1)), int(m.group(2))
+    return np.frombuffer(data, np.uint8, count=w * h, offset=m.end()).reshape(h, w)
+
+
+def analyse(images):
+    """Fill and blank bands for each page's text block.
+
+    All pages are cropped to the printable block (A4 with 12mm/14mm/10mm
+    margins) and stacked, so "which rows have ink" is one reduction over the
+    whole document instead of a pass per page.
+    """
+    import numpy as np
+
+    def text_block(a):
+        h, w = a.shape
+        return a[int(h * 12 / 297) : int(h * 283 / 297), int(w * 10 / 210) : int(w * 200 / 210)]
+
+    blocks = [text_block(a) for a in images]
+    if len({b.shape for b in blocks}) == 1:
+        occupied = (np.stack(blocks) < INK).any(axis=2)
+    else:  # mixed page sizes: same test, page by page
+        occupied = [(b < INK).any(axis=1) for b in blocks]
+
+    report = []
+    for rows in occupied:
+        mm = 271 / len(rows)  # text block height / raster rows
+        inked = np.flatnonzero(rows)
+        if not len(inked):
+            report.append({"fill": 0.0, "gaps": []})
+            continue
+        # Blank runs between the first and last inked row, as (start, height) in mm.
+        jumps = np.flatnonzero(np.diff(inked) > 1)
+        gaps = [(float((inked[j] + 1) * mm), float((inked[j + 1] - inked[j] - 1) * mm)) for j in jumps]
+        report.append({
+            "fill": (inked[-1] + 1) / len(rows) * 100,
+            "gaps": sorted((g for g in gaps if g[1] >= GAP_MM), key=lambda g: -g[1]),
+        })
+    return report
+
+
+def print_report(report: list) -> None:
+    for n, page in enumerate(report, 1):
+        u = page["fill"]
+        flag = "  <-- short: a figure or table was bumped to the next page" if u < SHORT else ""
+        print(f"p{n:02d} {u:5.0f}%  {'#' * int(u / 4)}{'.' * (25 - int(u / 4))}{flag}")
+        for at, height in page["gaps"]:
+            print(f"      blank {height:3.0f}mm at {at:3.0f}mm  <-- gap: something didn't fit above it")
+
+    body = [p["fill"] for p in report[:-1]]  # the final page is legitimately short
+    mean = f"{sum(body)/len(body):.0f}%" if body else "n/a"
+    print(f"\n{len(report)} pages | mean fill excluding the final page: {mean}")
+
+
 def verify() -> None:
     """Rasterize each page and report how full it is."""
+    cache = load_cache()
+    pdf = file_hash(PDF)
+    if cache.get("report_pdf") == pdf and "report" in cache:
+        print_report(cache["report"])
+        print("same PDF as the last audit — report reused")
+        return
+
     try:
-        import numpy as np
-        from PIL import Image
+        import numpy  # noqa: F401
     except ImportError:
-        print("verify skipped — needs `pip install pillow numpy`")
+        print("verify skipped — needs `pip install numpy` (and pymupdf, or poppler-utils)")
         return
 
     pages = HERE / "pages"
@@ -148,31 +336,31 @@ def verify() -> None:
         shutil.rmtree(pages)
     pages.mkdir()
 
-    subprocess.run(
-        ["osascript", "-l", "JavaScript", str(HERE / "pdf2png.jxa.js"), str(PDF), str(pages), "1.6"],
-        check=True,
-        capture_output=True,
-    )
-
-    fills = []
-    for p in sorted(pages.glob("page-*.png")):
-        a = np.asarray(Image.open(p).convert("L"))
-        h, w = a.shape
-        # Crop to the printable text block (A4 with 12mm/14mm/10mm margins).
-        box = a[int(h * 12 / 297) : int(h * 283 / 297), int(w * 10 / 210) : int(w * 200 / 210)]
-        rows = np.where((box < 235).sum(axis=1) > 0)[0]
-        used = (rows[-1] + 1) / box.shape[0] * 100 if len(rows) else 0.0
-        fills.append((p.stem[-2:], used))
+    started = time.perf_counter()
+    try:
+        images, renderer = rasterize(PDF, pages)
+    except (RuntimeError, ImportError) as e:
+        print(f"verify skipped — {e}")
+        return
+    rendered = time.perf_counter()
 
-    for n, u in fills:
-        flag = "  <-- short: a figure or table was bumped to the next page" if u < 82 else ""
-        print(f"p{n} {u:5.0f}%  {'#' * int(u / 4)}{'.' * (25 - int(u / 4))}{flag}")
+    # A page that rasterizes to the same pixels measures the same; only the
+    # rest go through analyse(). An edit near the end leaves the front alone.
+    hashes = [hashlib.blake2b(a.tobytes(), digest_size=16).hexdigest() for a in images]
+    known = {p["raster"]: p for p in cache.get("report", []) if "raster" in p}
+    changed = [i for i, h in enumerate(hashes) if h not in known]
+    fresh = dict(zip(changed, analyse([images[i] for i in changed]))) if changed else {}
+    report = [{**(fresh[i] if i in fresh else known[h]), "raster": h} for i, h in enumerate(hashes)]
 
-    body = [u for _, u in fills[:-1]]  # the final page is legitimately short
-    print(f"\n{len(fills)} pages | mean fill excluding the final page: {sum(body)/len(body):.0f}%")
+    print_report(report)
+    print(
+        f"rasterized with {renderer} in {rendered - started:.2f}s, "
+        f"analysed {len(changed)} changed page(s) of {len(report)} in {time.perf_counter() - rendered:.2f}s"
+    )
+    save_cache({**load_cache(), "report_pdf": pdf, "report": report})
 
 
 if __name__ == "__main__":
-    build()
+    build(force="--force" in sys.argv)
     if "--verify" in sys.argv:
         verify()
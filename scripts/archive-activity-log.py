@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Activity Log Archiver
+Moves activity_log rows older than a cutoff into compressed files, one per company per month
+
+activity_log is append-only and nothing ever ages it out. This script does
+that. It streams each company's rows older than the cutoff in keyset
+batches over activity_log_company_time_idx, one short transaction per batch
+so vacuum is never held back. The rows are written as JSON lines, zstd
+compressed (gzip when `zstandard` is not installed), to
+
+    <out>/company=<id>/month=<YYYY-MM>/activity_log.jsonl.zst
+
+Each file gets a sidecar manifest.json with its row count, the time range,
+the file's sha256, and an md5 over its sorted ids. A file counts as archived
+once its manifest exists, and a new file is checked against the table
+before its manifest is trusted: count and id digest must match what the
+database holds for that company and month. Before anything is deleted the
+file is read back through the decompressor and checked against its manifest
+again. With --delete, the archived rows are then deleted by id, a bounded
+batch per transaction, with a pause between batches. Rows the file does not
+hold are never deleted.
+
+    python scripts/archive-activity-log.py --out /backups/activity_log
+    python scripts/archive-activity-log.py --out /backups/activity_log --months 6 --delete
+    python scripts/archive-activity-log.py --out /backups/activity_log --company <uuid> --delete --pause 0.2
+
+The cutoff is the start of a month (--before YYYY-MM, or --months before
+the current one), so every file holds a whole month and never needs
+rewriting. Reruns skip months that are already archived. A run interrupted
+during deletion picks up where it left off.
+
+The archive stays queryable offline, e.g. with DuckDB:
+
+    select action, count(*) from read_json_auto('/backups/activity_log/*/*/*.jsonl.zst',
+                                                 hive_partitioning = true) group by 1;
+
+Needs psycopg.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ops import batches, open_reader, open_writer, pg_connect, pick_codec
+
+COLUMNS = ["id", "company_id", "user_id", "entity_type", "entity_id", "action",
+           "description", "changes", "ip_address", "user_agent", "created_at"]
+
+# Months of history kept in the table when no --before is given.
+MONTHS = 12
+# Rows fetched per keyset round trip, and deleted per transaction.
+READ_BATCH = 5000
+DELETE_BATCH = 1000
+# Seconds between delete batches, so replicas and autovacuum keep up.
+PAUSE = 0.05
+
+def month_start(value: date) -> datetime:
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+def next_month(value: datetime) -> datetime:
+    return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+
+def previous_month(value: datetime) -> datetime:
+    return value.replace(year=value.year - (value.month == 1), month=(value.month - 2) % 12 + 1)
+
+def cutoff_for(before: Optional[str], months: int) -> datetime:
+    if before:
+        return month_start(datetime.strptime(before, "%Y-%m").date())
+    cutoff = month_start(datetime.now(timezone.utc).date())
+    for _ in range(months):
+        cutoff = previous_month(cutoff)
+    return cutoff
+
+def json_value(value):
+    """UUIDs and inet as text, timestamps as ISO 8601."""
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def partition_dir(out: str, company_id: str, month: datetime) -> str:
+    return os.path.join(out, f"company={company_id}", f"month={month:%Y-%m}")
+
+def read_manifest(directory: str) -> Optional[Dict]:
+    path = os.path.join(directory, "manifest.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def companies_with_old_rows(conn, named: List[str], cutoff: datetime) -> List[Tuple[str, str]]:
+    """Companies holding any row older than the cutoff; one index probe each."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            select c.id, c.name from companies c
+             where (cardinality(%s::uuid[]) = 0 or c.id = any(%s::uuid[]))
+               and exists (select 1 from activity_log a where a.company_id = c.id and a.created_at < %s)
+             order by c.name""", (named, named, cutoff))
+        return [(str(row[0]), row[1]) for row in cur.fetchall()]
+
+def oldest_row(conn, company_id: str) -> Optional[datetime]:
+    with conn.cursor() as cur:
+        cur.execute("select min(created_at) from activity_log where company_id = %s", (company_id,))
+        return cur.fetchone()[0]
+
+def iter_month(conn, company_id: str, month: datetime, batch: int) -> Iterator[Dict]:
+    """One company-month of rows, oldest first, in keyset batches.
+
+    Each batch is its own statement on an autocommit connection, so no
+    snapshot is held between them. (created_at, id) breaks timestamp ties,
+    and the plain created_at bound keeps the scan on the company/time index.
+    """
+    select = f"""
+        select {", ".join(COLUMNS)} from activity_log
+         where company_id = %s and created_at >= %s and created_at < %s {{after}}
+         order by created_at, id
+         limit %s"""
+    first, rest = select.format(after=""), select.format(after="and (created_at, id) > (%s, %s)")
+    with conn.cursor() as cur:
+        cur.execute(first, (company_id, month, next_month(month), batch))
+        while True:
+            rows = cur.fetchall()
+            for row in rows:
+                yield dict(zip(COLUMNS, row))
+            if len(rows) < batch:
+                return
+            last_time, last_id = rows[-1][COLUMNS.index("created_at")], rows[-1][0]
+            cur.execute(rest, (company_id, last_time, next_month(month), last_time, last_id, batch))
+
+def db_digest(conn, company_id: str, start: datetime, end: datetime) -> Tuple[int, str]:
+    """Row count and md5 over the sorted ids of one company-month, as stored now."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            select count(*), coalesce(md5(string_agg(id::text, ',' order by id::text)), '')
+              from activity_log where company_id = %s and created_at >= %s and created_at < %s""",
+                    (company_id, start, end))
+        count, digest = cur.fetchone()
+    return count, digest
+
+def ids_digest(ids: List[str]) -> str:
+    return hashlib.md5(",".join(sorted(ids)).encode()).hexdigest() if ids else ""
+
+def file_sha256(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+def read_ids(path: str) -> List[str]:
+    """Every id in an archive file, read back through the decompressor."""
+    with open_reader(path) as f:
+        return [json.loads(line)["id"] for line in iter_lines(f)]
+
+def iter_lines(stream) -> Iterator[bytes]:
+    pending = b""
+    for block in iter(lambda: stream.read(1 << 20), b""):
+        pending += block
+        *lines, pending = pending.split(b"\n")
+        yield from (line for line in lines if line)
+    if pending:
+        yield pending
+
+class Partition:
+    """One company-month being written: a temp file renamed into place on close."""
+
+    def __init__(self, out: str, company_id: str, month: datetime, codec: str):
+        self.company_id = company_id
+        self.month = month
+        self.directory = partition_dir(out, company_id, month)
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"activity_log.jsonl.{codec}")
+        self.writer = open_writer(self.path + ".tmp", codec)
+        self.ids: List[str] = []
+        self.first = self.last = None
+
+    def add(self, row: Dict):
+        line = json.dumps(row, default=json_value, separators=(",", ":"), ensure_ascii=False)
+        self.writer.write(line.encode() + b"\n")
+        self.ids.append(str(row["id"]))
+        self.first = self.first or row["created_at"]
+        self.last = row["created_at"]
+
+    def close(self) -> Dict:
+        """Finish the file, then the manifest; the manifest marks it complete."""
+        self.writer.close()
+        os.replace(self.path + ".tmp", self.path)
+        manifest = {
+            "table": "activity_log",
+            "company_id": self.company_id,
+            "month": f"{self.month:%Y-%m}",
+            "file": os.path.basename(self.path),
+            "rows": len(self.ids),
+            "first_created_at": self.first.isoformat(),
+            "last_created_at": self.last.isoformat(),
+            "ids_md5": ids_digest(self.ids),
+            "sha256": file_sha256(self.path),
+            "bytes": os.path.getsize(self.path),
+            "archived_at": datetime.now(timezone.utc).isoformat(),
+        }
+        tmp = os.path.join(self.directory, "manifest.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, os.path.join(self.directory, "manifest.json"))
+        return manifest
+
+def archive_company(conn, out: str, company_id: str, cutoff: datetime, codec: str, batch: int) -> List[Dict]:
+    """Write every month before the cutoff not archived yet; return the
+    manifests of all of them, new and old."""
+    manifests = []
+    oldest = oldest_row(conn, company_id)
+    month = month_start(oldest.astimezone(timezone.utc).date()) if oldest else cutoff
+    while month < cutoff:
+        existing = read_manifest(partition_dir(out, company_id, month))
+        if existing:
+            manifests.append(existing)
+        else:
+            partition = None
+            for row in iter_month(conn, company_id, month, batch):
+                partition = partition or Partition(out, company_id, month, codec)
+                partition.add(row)
+            if partition:
+                manifests.append(partition.close())
+        month = next_month(month)
+    return manifests
+
+def verify(conn, out: str, manifest: Dict) -> Tuple[bool, List[str], str]:
+    """Read the file back and check it against its manifest and the table.
+
+    Returns (ok, ids, note). The file must decompress to exactly the rows
+    the manifest records. The table may since have lost some of them to an
+    earlier --delete, or gained rows the file does not hold; both are noted,
+    and the latter are never deleted.
+    """
+    month = month_start(datetime.strptime(manifest["month"], "%Y-%m").date())
+    path = os.path.join(partition_dir(out, manifest["company_id"], month), manifest["file"])
+    if not os.path.exists(path):
+        return False, [], "file missing"
+    if file_sha256(path) != manifest["sha256"]:
+        return False, [], "sha256 differs from the manifest"
+    ids = read_ids(path)
+    if len(ids) != manifest["rows"] or ids_digest(ids) != manifest["ids_md5"]:
+        return False, ids, f"file reads back {len(ids):,} rows, manifest says {manifest['rows']:,}"
+    count, digest = db_digest(conn, manifest["company_id"], month, next_month(month))
+    if digest == manifest["ids_md5"]:
+        return True, ids, "matches the table"
+    with conn.cursor() as cur:
+        cur.execute("""
+            select count(*) from activity_log
+             where company_id = %s and created_at >= %s and created_at < %s and id = any(%s::uuid[])""",
+                    (manifest["company_id"], month, next_month(month), ids))
+        present = cur.fetchone()[0]
+    notes = []
+    if present < len(ids):
+        notes.append(f"{len(ids) - present:,} already deleted")
+    if count > present:
+        notes.append(f"⚠️  {count - present:,} rows not in the file, left in place")
+    return True, ids, ", ".join(notes)
+
+def delete_archived(conn, company_id: str, month: datetime, ids: List[str], size: int, pause: float) -> int:
+    """Delete archived rows by id, one bounded batch per transaction."""
+    deleted = 0
+    with conn.cursor() as cur:
+        for chunk in batches(ids, size):
+            cur.execute("""
+                delete from activity_log
+                 where id = any(%s::uuid[]) and company_id = %s and created_at >= %s and created_at < %s""",
+                        (chunk, company_id, month, next_month(month)))
+            deleted += cur.rowcount
+            if pause:
+                time.sleep(pause)
+    return deleted
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Archive old activity_log rows to compressed files")
+    parser.add_argument("--out", required=True, help="archive directory")
+    parser.add_argument("--dsn", help="database URL (default $SUPABASE_DB_URL)")
+    cutoff = parser.add_mutually_exclusive_group()
+    cutoff.add_argument("--before", metavar="YYYY-MM", help="archive rows from before this month")
+    cutoff.add_argument("--months", type=int, default=MONTHS,
+                        help=f"otherwise keep this many whole months before the current one (default {MONTHS})")
+    parser.add_argument("--company", action="append", default=[], help="archive only this company (repeatable)")
+    parser.add_argument("--codec", choices=["zst", "gz"], help="compression (default zst, gzip without zstandard)")
+    parser.add_argument("--delete", action="store_true", help="delete rows once their archive is verified")
+    parser.add_argument("--batch", type=int, default=READ_BATCH, help=f"rows per read (default {READ_BATCH})")
+    parser.add_argument("--delete-batch", type=int, default=DELETE_BATCH,
+                        help=f"rows per delete transaction (default {DELETE_BATCH})")
+    parser.add_argument("--pause", type=float, default=PAUSE, help=f"seconds between delete batches (default {PAUSE})")
+    args = parser.parse_args()
+    if args.before:
+        try:
+            datetime.strptime(args.before, "%Y-%m")
+        except ValueError:
+            parser.error("--before takes a month, e.g. 2025-01")
+    if args.months < 0 or args.batch < 1 or args.delete_batch < 1:
+        parser.error("--months must be 0 or more, --batch and --delete-batch at least 1")
+    return args
+
+def main():
+    """Archive, verify, and optionally delete, company by company"""
+    args = parse_args()
+    codec = pick_codec(args.codec)
+    cutoff = cutoff_for(args.before, args.months)
+
+    print("🗄️  QuotePro Activity Log Archiver")
+    print("="*60)
+    print(f"ℹ️  Archiving rows before {cutoff:%Y-%m-%d} to {args.out} ({codec})")
+    if not args.delete:
+        print("ℹ️  Not deleting (pass --delete once you trust the archive)")
+
+    totals = {"files": 0, "rows": 0, "bytes": 0, "deleted": 0, "failed": 0}
+    with pg_connect(args.dsn, autocommit=True) as conn:
+        conn.execute("set timezone = 'UTC'")
+        companies = companies_with_old_rows(conn, args.company, cutoff)
+        if not companies:
+            print("✅ Nothing older than the cutoff")
+            return
+
+        for company_id, name in companies:
+            print(f"\n🏢 {name} ({company_id})")
+            started = time.perf_counter()
+            manifests = archive_company(conn, args.out, company_id, cutoff, codec, args.batch)
+            for manifest in manifests:
+                month = month_start(datetime.strptime(manifest["month"], "%Y-%m").date())
+                ok, ids, note = verify(conn, args.out, manifest)
+                if not ok:
+                    totals["failed"] += 1
+                    print(f"  ❌ {manifest['month']}: {note} - left in place")
+                    continue
+                totals["files"] += 1
+                totals["rows"] += manifest["rows"]
+                totals["bytes"] += manifest["bytes"]
+                line = f"  ✅ {manifest['month']}: {manifest['rows']:,} rows, {manifest['bytes'] / 1024:,.0f} KiB, {note}"
+                if args.delete:
+                    deleted = delete_archived(conn, company_id, month, ids, args.delete_batch, args.pause)
+                    totals["deleted"] += deleted
+                    line += f", {deleted:,} deleted"
+                print(line)
+            print(f"  ℹ️  {time.perf_counter() - started:.1f}s")
+
+    print("\n" + "="*60)
+    print(f"📊 {totals['files']:,} months archived, {totals['rows']:,} rows, "
+          f"{totals['bytes'] / 1024 / 1024:,.1f} MiB compressed")
+    if args.delete:
+        print(f"📊 {totals['deleted']:,} rows deleted")
+        if totals["deleted"]:
+            print("ℹ️  Autovacuum reclaims the space; VACUUM (ANALYZE) activity_log to do it now")
+    print("="*60)
+    if totals["failed"]:
+        print(f"❌ {totals['failed']} months failed verification and were not deleted")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
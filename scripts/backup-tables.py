@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Table Backup
+Dumps every table the migrations create, in parallel, into compressed COPY files; and restores them
+
+scripts/backup-database.sh runs one `supabase db dump` into one .sql file.
+That is serial and uncompressed, and a failure means starting again. This
+script dumps data only, one table per file, --jobs tables at a time, each
+COPYed straight into a zstd (or gzip) stream:
+
+    <out>/<table>.copy.zst
+    <out>/manifest.json
+
+Every table is read in one snapshot, exported by a coordinating transaction
+and shared by the workers the way `pg_dump -j` does. So the files agree
+with one another, foreign keys included, although they are written
+concurrently. Biggest tables are started first. manifest.json is rewritten
+as each table finishes: its columns, row count, a sha256 of the COPY data
+and the sizes. A run that dies partway is continued with --resume, which
+only dumps the tables not yet in the manifest. Those come from a new
+snapshot, and the manifest says so.
+
+    python scripts/backup-tables.py                                   # to backups/tables-<timestamp>/
+    python scripts/backup-tables.py --jobs 8 --out backups/pre-migration
+    python scripts/backup-tables.py --resume backups/pre-migration
+    python scripts/backup-tables.py --restore backups/pre-migration --dsn "$TARGET_DB_URL"
+
+--restore loads a backup into a database already migrated to the same
+schema. The tables must be empty, or --truncate empties them first. Each
+table is one COPY in one transaction, committed only if its row count and
+sha256 match the manifest. Where the role may set session_replication_role,
+triggers and foreign-key checks are off and every table loads at once.
+Otherwise tables load in waves, referenced tables before the ones that
+reference them. Each table is analyzed as soon as it is loaded.
+
+Schema, roles, grants and functions are not included. They come from the
+migrations. Keep backup-database.sh for a full dump.
+
+Needs psycopg (and psycopg_pool).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from ops import expected_schema, open_reader, open_writer, pg_connect, pg_pool, pick_codec
+from ops.schema import MIGRATIONS
+
+# Tables dumped or restored at once.
+JOBS = 4
+# Bytes read from a backup file per write to COPY FROM.
+CHUNK = 1 << 20
+MANIFEST = "manifest.json"
+FORMAT = 1
+
+def table_file(table: str, codec: str) -> str:
+    return f"{table}.copy.{codec}"
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+def column_list(columns: List[str]) -> str:
+    return ", ".join(quote(c) for c in columns)
+
+def load_manifest(directory: str) -> Optional[Dict]:
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+class Checkpoint:
+    """manifest.json, rewritten atomically whenever a table finishes."""
+
+    def __init__(self, directory: str, manifest: Dict):
+        self.path = os.path.join(directory, MANIFEST)
+        self.manifest = manifest
+        self.lock = threading.Lock()
+        self.save()
+
+    def table_done(self, table: str, entry: Dict):
+        with self.lock:
+            self.manifest["tables"][table] = entry
+            self.save()
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+def live_tables(cur) -> Dict[str, Dict]:
+    """Public tables in the database: columns COPY can carry (not generated,
+    not dropped), in order, and total size on disk."""
+    cur.execute("""
+        select c.relname, pg_total_relation_size(c.oid),
+               array_agg(a.attname::text order by a.attnum)
+          from pg_class c
+          join pg_namespace n on n.oid = c.relnamespace and n.nspname = 'public'
+          join pg_attribute a on a.attrelid = c.oid and a.attnum > 0 and not a.attisdropped and a.attgenerated = ''
+         where c.relkind in ('r', 'p')
+         group by c.relname, c.oid""")
+    return {name: {"bytes": size, "columns": columns} for name, size, columns in cur.fetchall()}
+
+def dump_table(pool, snapshot: str, out: str, table: str, columns: List[str], codec: str) -> Dict:
+    """COPY one table out, inside the shared snapshot, into a compressed file."""
+    path = os.path.join(out, table_file(table, codec))
+    started = time.perf_counter()
+    sha = hashlib.sha256()
+    rows = raw = 0
+    with pool.connection() as conn:
+        conn.execute("begin isolation level repeatable read read only")
+        conn.execute(f"set transaction snapshot '{snapshot}'")
+        with conn.cursor() as cur, open_writer(path + ".tmp", codec) as writer:
+            with cur.copy(f"copy public.{quote(table)} ({column_list(columns)}) to stdout") as copy:
+                for data in copy:
+                    # COPY's text format escapes newlines inside values, so
+                    # each one ends a row.
+                    data = bytes(data)
+                    sha.update(data)
+                    rows += data.count(b"\n")
+                    raw += len(data)
+                    writer.write(data)
+        conn.execute("commit")
+    os.replace(path + ".tmp", path)
+    return {
+        "file": os.path.basename(path),
+        "columns": columns,
+        "rows": rows,
+        "sha256": sha.hexdigest(),
+        "bytes": raw,
+        "compressed_bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 2),
+        "snapshot": snapshot,
+    }
+
+def backup(args: argparse.Namespace):
+    """Dump every migrated table, or with --resume every one not dumped yet."""
+    out = args.resume or args.out or os.path.join("backups", f"tables-{datetime.now():%Y%m%d-%H%M%S}")
+    previous = load_manifest(out) if args.resume else None
+    if args.resume and previous is None:
+        print(f"❌ No {MANIFEST} in {out} to resume from")
+        sys.exit(1)
+    if not args.resume and os.path.exists(os.path.join(out, MANIFEST)):
+        print(f"❌ {out} already holds a backup - use --resume {out}, or another --out")
+        sys.exit(1)
+    codec = previous["codec"] if previous else pick_codec(args.codec)
+    os.makedirs(out, exist_ok=True)
+
+    expected = expected_schema(cache_path=None)["tables"]
+    # The coordinator's transaction stays open until every worker has
+    # started: an exported snapshot lives only as long as the transaction
+    # that exported it.
+    with pg_connect(args.dsn, autocommit=True) as coordinator:
+        coordinator.execute("begin isolation level repeatable read read only")
+        with coordinator.cursor() as cur:
+            cur.execute("select pg_export_snapshot(), now(), current_setting('server_version'), current_database()")
+            snapshot, taken_at, version, database = cur.fetchone()
+            # Inlined below: SET TRANSACTION SNAPSHOT takes no parameters.
+            if not re.fullmatch(r"[0-9A-Fa-f-]+", snapshot):
+                print(f"❌ Unexpected snapshot id {snapshot!r}")
+                sys.exit(1)
+            live = live_tables(cur)
+
+        missing = sorted(expected - set(live))
+        if missing:
+            print(f"⚠️  In the migrations but not the database, skipped: {', '.join(missing)}")
+        extra = sorted(set(live) - expected)
+        if extra:
+            print(f"ℹ️  Not from the migrations, not backed up: {', '.join(extra)}")
+
+        manifest = previous or {
+            "format": FORMAT,
+            "codec": codec,
+            "database": database,
+            "host": coordinator.info.host,
+            "server_version": version,
+            "taken_at": taken_at.isoformat(),
+            "migration": max(n for n in os.listdir(MIGRATIONS) if n.endswith(".sql")),
+            "tables": {},
+        }
+        done = {t for t, entry in manifest["tables"].items()
+                if os.path.exists(os.path.join(out, entry["file"]))
+                and os.path.getsize(os.path.join(out, entry["file"])) == entry["compressed_bytes"]}
+        manifest["tables"] = {t: manifest["tables"][t] for t in done}
+        todo = sorted((t for t in expected & set(live) if t not in done), key=lambda t: -live[t]["bytes"])
+        if previous and todo:
+            manifest.setdefault("resumed_at", []).append(taken_at.isoformat())
+        manifest["complete"] = False
+        checkpoint = Checkpoint(out, manifest)
+
+        print(f"ℹ️  {database} on {coordinator.info.host}, PostgreSQL {version}")
+        if done:
+            print(f"ℹ️  {len(done)} tables already dumped; {len(todo)} to go (from a new snapshot)")
+        print(f"📦 Dumping {len(todo)} tables, {sum(live[t]['bytes'] for t in todo) / 1024 / 1024:,.0f} MiB on disk, "
+              f"{args.jobs} at a time, to {out} ({codec})")
+
+        failed = []
+        started = time.perf_counter()
+        with pg_pool(args.dsn, size=args.jobs, autocommit=True) as pool:
+            with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+                futures = {executor.submit(dump_table, pool, snapshot, out, t, live[t]["columns"], codec): t
+                           for t in todo}
+                for future in as_completed(futures):
+                    table = futures[future]
+                    try:
+                        entry = future.result()
+                    except Exception as e:
+                        failed.append(table)
+                        print(f"  ❌ {table}: {e.__class__.__name__}: {str(e).strip()}")
+                        continue
+                    checkpoint.table_done(table, entry)
+                    ratio = entry["bytes"] / entry["compressed_bytes"] if entry["compressed_bytes"] else 0
+                    print(f"  ✅ {table:<32} {entry['rows']:>10,} rows  {entry['compressed_bytes'] / 1024 / 1024:8.1f} MiB "
+                          f"({ratio:4.1f}x)  {entry['seconds']:6.1f}s")
+        coordinator.execute("commit")
+
+    tables = checkpoint.manifest["tables"]
+    checkpoint.manifest["complete"] = not failed and set(tables) == expected & set(live)
+    checkpoint.save()
+    print("\n" + "="*60)
+    print(f"📊 {len(tables)} tables, {sum(e['rows'] for e in tables.values()):,} rows, "
+          f"{sum(e['compressed_bytes'] for e in tables.values()) / 1024 / 1024:,.1f} MiB "
+          f"in {time.perf_counter() - started:.1f}s")
+    if checkpoint.manifest.get("resumed_at"):
+        print("⚠️  Resumed: tables dumped in different runs come from different snapshots")
+    print("="*60)
+    if failed:
+        print(f"❌ {len(failed)} tables failed - rerun with --resume {out}")
+        sys.exit(1)
+    print(f"✅ Backup complete: {out}")
+
+def can_disable_triggers(conn) -> bool:
+    try:
+        conn.execute("set session_replication_role = replica")
+        conn.execute("reset session_replication_role")
+        return True
+    except Exception:
+        return False
+
+def restore_waves(cur, tables: Set[str]) -> List[List[str]]:
+    """Tables grouped so each wave references only tables in earlier waves."""
+    cur.execute("""
+        select c.conrelid::regclass::text, c.confrelid::regclass::text from pg_constraint c
+         where c.contype = 'f' and c.connamespace = 'public'::regnamespace
+           and c.conrelid <> c.confrelid""")
+    needs: Dict[str, Set[str]] = {t: set() for t in tables}
+    for child, parent in cur.fetchall():
+        child, parent = child.split(".")[-1].strip('"'), parent.split(".")[-1].strip('"')
+        if child in tables and parent in tables:
+            needs[child].add(parent)
+    waves, loaded = [], set()
+    while needs:
+        wave = sorted(t for t, parents in needs.items() if parents <= loaded)
+        if not wave:
+            # A cycle of references; load what is left together and let the
+            # constraints complain if the data really does not fit.
+            wave = sorted(needs)
+        waves.append(wave)
+        loaded.update(wave)
+        for t in wave:
+            del needs[t]
+    return waves
+
+def restore_table(pool, directory: str, table: str, entry: Dict, replica: bool) -> Dict:
+    """COPY one file in, in one transaction, committed only if it matches the manifest."""
+    started = time.perf_counter()
+    sha = hashlib.sha256()
+    rows = 0
+    with pool.connection() as conn:
+        conn.execute("begin")
+        try:
+            if replica:
+                conn.execute("set local session_replication_role = replica")
+            with conn.cursor() as cur, open_reader(os.path.join(directory, entry["file"])) as reader:
+                with cur.copy(f"copy public.{quote(table)} ({column_list(entry['columns'])}) from stdin") as copy:
+                    for data in iter(lambda: reader.read(CHUNK), b""):
+                        sha.update(data)
+                        rows += data.count(b"\n")
+                        copy.write(data)
+            if rows != entry["rows"] or sha.hexdigest() != entry["sha256"]:
+                raise ValueError(f"file holds {rows:,} rows / sha256 {sha.hexdigest()[:12]}, "
+                                 f"manifest says {entry['rows']:,} / {entry['sha256'][:12]}")
+            conn.execute("commit")
+        except BaseException:
+            conn.execute("rollback")
+            raise
+        conn.execute(f"analyze public.{quote(table)}")
+    return {"rows": rows, "seconds": time.perf_counter() - started}
+
+def restore(args: argparse.Namespace):
+    """Load a backup directory into an already-migrated database."""
+    manifest = load_manifest(args.restore)
+    if manifest is None:
+        print(f"❌ No {MANIFEST} in {args.restore}")
+        sys.exit(1)
+    if not manifest.get("complete"):
+        print(f"❌ {args.restore} is an incomplete backup - finish it with --resume first")
+        sys.exit(1)
+    entries = manifest["tables"]
+
+    with pg_connect(args.dsn, autocommit=True) as conn:
+        with conn.cursor() as cur:
+            live = live_tables(cur)
+            problems = [f"{t}: no such table" for t in entries if t not in live]
+            problems += [f"{t}: no column {c}" for t, e in entries.items() if t in live
+                         for c in e["columns"] if c not in live[t]["columns"]]
+            if problems:
+                print("❌ The target schema does not match the backup - migrate it first:")
+                for problem in problems:
+                    print(f"   {problem}")
+                sys.exit(1)
+
+            if args.truncate:
+                print(f"🗑️  Truncating {len(entries)} tables")
+                try:
+                    cur.execute(f"truncate {', '.join('public.' + quote(t) for t in entries)}")
+                except Exception as e:
+                    print(f"❌ Cannot truncate ({e.__class__.__name__}: {str(e).strip()})")
+                    sys.exit(1)
+            else:
+                occupied = []
+                for table in entries:
+                    cur.execute(f"select exists (select 1 from public.{quote(table)})")
+                    if cur.fetchone()[0]:
+                        occupied.append(table)
+                if occupied:
+                    print(f"❌ Not empty: {', '.join(occupied)} - pass --truncate to replace their rows")
+                    sys.exit(1)
+
+            replica = can_disable_triggers(conn)
+            if replica:
+                waves = [sorted(entries, key=lambda t: -entries[t]["compressed_bytes"])]
+                print("ℹ️  Triggers and foreign-key checks off for the load; all tables at once")
+            else:
+                waves = restore_waves(cur, set(entries))
+                print(f"⚠️  Cannot set session_replication_role as this role: triggers fire, "
+                      f"and tables load in {len(waves)} waves, parents first")
+
+    print(f"📥 Restoring {len(entries)} tables from {args.restore} (taken {manifest['taken_at']}), "
+          f"{args.jobs} at a time")
+    failed = []
+    started = time.perf_counter()
+    with pg_pool(args.dsn, size=args.jobs, autocommit=True) as pool:
+        with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            for number, wave in enumerate(waves, start=1):
+                if len(waves) > 1:
+                    print(f"  ℹ️  Wave {number}: {', '.join(wave)}")
+                futures = {executor.submit(restore_table, pool, args.restore, t, entries[t], replica): t for t in wave}
+                for future in as_completed(futures):
+                    table = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        failed.append(table)
+                        print(f"  ❌ {table}: {e.__class__.__name__}: {str(e).strip()}")
+                        continue
+                    print(f"  ✅ {table:<32} {result['rows']:>10,} rows  {result['seconds']:6.1f}s")
+                if failed and len(waves) > 1:
+                    print("  ❌ Stopping: later waves reference the tables that failed")
+                    break
+
+    print("\n" + "="*60)
+    print(f"📊 {len(entries) - len(failed)}/{len(entries)} tables restored in {time.perf_counter() - started:.1f}s")
+    print("="*60)
+    if failed:
+        print(f"❌ Failed: {', '.join(sorted(failed))} - fix and rerun with --truncate")
+        sys.exit(1)
+    print("✅ Restore complete")
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Parallel per-table backup and restore")
+    parser.add_argument("--dsn", help="database URL (default $SUPABASE_DB_URL)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--out", help="backup directory (default backups/tables-<timestamp>)")
+    mode.add_argument("--resume", metavar="DIR", help="finish an interrupted backup")
+    mode.add_argument("--restore", metavar="DIR", help="load this backup into the database instead")
+    parser.add_argument("--jobs", type=int, default=JOBS, help=f"tables at once (default {JOBS})")
+    parser.add_argument("--codec", choices=["zst", "gz"], help="compression (default zst, gzip without zstandard)")
+    parser.add_argument("--truncate", action="store_true", help="with --restore, empty the tables first")
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.truncate and not args.restore:
+        parser.error("--truncate goes with --restore")
+    return args
+
+def main():
+    """Back up, or restore"""
+    args = parse_args()
+
+    print("💾 QuotePro Table Backup")
+    print("="*60)
+
+    if args.restore:
+        restore(args)
+    else:
+        backup(args)
+
+if __name__ == "__main__":
+    main()
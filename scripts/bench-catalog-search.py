@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Catalog Search Benchmark
+Replays a query set against the starter catalogs at growing catalog sizes
+
+Retrieval mirrors match_documents: a vector leg (cosine, VECTOR_THRESHOLD
+cutoff, top match_count*4), a keyword leg (every query term must match, as
+plainto_tsquery requires, ranked here by BM25), fused by reciprocal rank with
+k = 60. Embeddings are a local stand-in — hashed word and character-trigram
+vectors — so the run is offline and deterministic.
+
+That stand-in is not Vertex. Absolute recall here says little about
+production; what it shows is how each leg and the fusion behave as a catalog
+grows, and what a threshold change does to the vector leg relative to the
+others. Read the trends, not the numbers.
+
+    python scripts/bench-catalog-search.py
+    python scripts/bench-catalog-search.py --sizes 80,1000,10000 --threshold 0.4
+    python scripts/bench-catalog-search.py --queries my-queries.jsonl --json out.json
+
+A --queries file holds one {"query": "...", "expect": ["item name", ...]}
+per line; only expected items present at a given size are scored there.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "starter-catalogs")
+
+# The same numbers production uses (src/lib/ai/catalog-index.ts, match_documents).
+VECTOR_THRESHOLD = 0.3
+RRF_K = 60
+EMBEDDING_DIMS = 768
+
+SIZES = [80, 250, 1000, 2500, 5000, 10000]
+TOP_K = 10
+
+# BM25's usual constants.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# plainto_tsquery('english') drops these before AND-ing what is left; keeping
+# them would make the keyword leg fail on every "the" a contractor types.
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its no not of on or
+our over so than that the their then there these this to up was were will with
+""".split())
+
+def catalog_item_text(item: Dict) -> str:
+    """catalogItemText from src/lib/ai/embeddings.ts: what gets indexed."""
+    return " — ".join(part for part in (item.get("name"), item.get("category"), item.get("description")) if part)
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+def load_catalogs(directory: str) -> List[Dict]:
+    """Every row of every starter catalog, tagged with its trade."""
+    items = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".csv"):
+            continue
+        with open(os.path.join(directory, filename), newline="") as f:
+            for row in csv.DictReader(f):
+                if not (row.get("name") or "").strip():
+                    continue
+                items.append({
+                    "trade": filename[:-4],
+                    "name": row["name"].strip(),
+                    "category": (row.get("category") or "").strip() or None,
+                    "description": (row.get("description") or "").strip() or None,
+                })
+    return items
+
+def _bucket(feature: str, dims: int) -> Tuple[int, float]:
+    # hash() is salted per process; a digest keeps runs comparable.
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dims, (1.0 if value >> 63 else -1.0)
+
+def embed(text: str, dims: int = EMBEDDING_DIMS) -> Dict[int, float]:
+    """A deterministic stand-in embedding: signed feature hashing.
+
+    Whole words carry the exact matches; character trigrams of each word
+    (with boundary marks) give partial credit for plurals, stems and typos,
+    which is the closest a hash gets to "similar". Unit length, so a dot
+    product is a cosine.
+    """
+    vector: Dict[int, float] = {}
+    for word in tokenize(text):
+        features = [f"w:{word}"]
+        marked = f"#{word}#"
+        features.extend(f"g:{marked[i:i + 3]}" for i in range(len(marked) - 2))
+        for feature in features:
+            dim, sign = _bucket(feature, dims)
+            vector[dim] = vector.get(dim, 0.0) + sign
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {d: v / norm for d, v in vector.items() if v} if norm else {}
+
+class SearchIndex:
+    """A catalog held the way match_documents sees it, in memory.
+
+    Both legs answer from inverted indexes — hashed dimension to documents
+    for the vectors, term to documents for BM25 — so a query touches only the
+    documents it could score, as the HNSW and GIN indexes do.
+    """
+
+    def __init__(self, items: List[Dict], dims: int = EMBEDDING_DIMS):
+        self.items = items
+        self.dims = dims
+        self.vector_postings: Dict[int, List[Tuple[int, float]]] = {}
+        self.term_postings: Dict[str, Dict[int, int]] = {}
+        self.lengths: List[int] = []
+        for doc, item in enumerate(items):
+            text = catalog_item_text(item)
+            for dim, weight in embed(text, dims).items():
+                self.vector_postings.setdefault(dim, []).append((doc, weight))
+            terms = tokenize(text)
+            self.lengths.append(len(terms))
+            for term in terms:
+                postings = self.term_postings.setdefault(term, {})
+                postings[doc] = postings.get(doc, 0) + 1
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+    def vector_search(self, query: str, limit: int, threshold: float) -> List[int]:
+        scores: Dict[int, float] = {}
+        for dim, weight in embed(query, self.dims).items():
+            for doc, doc_weight in self.vector_postings.get(dim, ()):
+                scores[doc] = scores.get(doc, 0.0) + weight * doc_weight
+        hits = [(score, doc) for doc, score in scores.items() if score >= threshold]
+        hits.sort(key=lambda h: (-h[0], h[1]))
+        return [doc for _, doc in hits[:limit]]
+
+    def keyword_search(self, query: str, limit: int) -> List[int]:
+        terms = [t for t in dict.fromkeys(tokenize(query)) if t not in STOP_WORDS]
+        if not terms or any(t not in self.term_postings for t in terms):
+            return []
+        # AND: only documents containing every term, like tsv @@ plainto_tsquery.
+        postings = [self.term_postings[t] for t in terms]
+        candidates = set.intersection(*(set(p) for p in postings))
+        n = len(self.items)
+        scores = []
+        for doc in candidates:
+            score = 0.0
+            for p in postings:
+                tf = p[doc]
+                idf = math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[doc] / self.avg_length)
+                score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            scores.append((score, doc))
+        scores.sort(key=lambda s: (-s[0], s[1]))
+        return [doc for _, doc in scores[:limit]]
+
+    def search(self, query: str, k: int, threshold: float, rrf_k: int = RRF_K,
+               mode: str = "hybrid") -> Tuple[List[int], bool]:
+        """Top k documents, and whether the vector leg came back empty."""
+        pool = k * 4
+        vector = self.vector_search(query, pool, threshold) if mode != "keyword" else []
+        keyword = self.keyword_search(query, pool) if mode != "vector" else []
+        fused: Dict[int, float] = {}
+        for ranked in (vector, keyword):
+            for rank, doc in enumerate(ranked, start=1):
+                fused[doc] = fused.get(doc, 0.0) + 1.0 / (rrf_k + rank)
+        ranked = sorted(fused, key=lambda d: (-fused[d], d))[:k]
+        return ranked, not vector
+
+def generate_queries(items: List[Dict], rng: random.Random) -> List[Dict]:
+    """Queries a contractor might type for each item, with the item as answer.
+
+    Two phrasings per item: the name with its words reversed ("nest
+    thermostat" for "Thermostat — Nest"), and a few content words of the
+    description — the symptom-shaped query, which never says the item's name.
+    """
+    queries = []
+    for item in items:
+        name_words = tokenize(item["name"])
+        if len(name_words) > 1:
+            queries.append({"kind": "name", "query": " ".join(reversed(name_words)), "expect": [item["name"]]})
+        words = [w for w in tokenize(item.get("description") or "") if w not in STOP_WORDS]
+        if len(words) >= 2:
+            picked = sorted(rng.sample(range(len(words)), min(4, len(words))))
+            queries.append({"kind": "description", "query": " ".join(words[i] for i in picked),
+                            "expect": [item["name"]]})
+    return queries
+
+def load_queries(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [{"kind": "file", **json.loads(line)} for line in f if line.strip()]
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_size(items: List[Dict], queries: List[Dict], k: int, threshold: float, rrf_k: int,
+             modes: List[str], dims: int) -> List[Dict]:
+    """Build one index over `items` and replay the queries through each mode."""
+    started = time.perf_counter()
+    index = SearchIndex(items, dims)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # Several trades sell an item of the same name; any of them is a hit.
+    by_name: Dict[str, set] = {}
+    for doc, item in enumerate(items):
+        by_name.setdefault(item["name"].lower(), set()).add(doc)
+
+    rows = []
+    for mode in modes:
+        row = score_queries(index, by_name, queries, k, threshold, rrf_k, mode)
+        if row:
+            rows.append({"size": len(items), "build_ms": build_ms, **row})
+    return rows
+
+def score_queries(index: SearchIndex, by_name: Dict[str, set], queries: List[Dict], k: int,
+                  threshold: float, rrf_k: int, mode: str) -> Optional[Dict]:
+    hits_at_1 = hits_at_k = 0
+    reciprocal_ranks = []
+    latencies = []
+    empty_vector = 0
+    for q in queries:
+        relevant = set().union(*(by_name.get(name.lower(), set()) for name in q["expect"]))
+        if not relevant:
+            continue
+        t0 = time.perf_counter()
+        ranked, vector_empty = index.search(q["query"], k, threshold, rrf_k, mode)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        empty_vector += vector_empty
+        rank = next((i for i, doc in enumerate(ranked, start=1) if doc in relevant), None)
+        hits_at_1 += rank == 1
+        hits_at_k += rank is not None
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    if not latencies:
+        return None
+    n = len(latencies)
+    return {
+        "mode": mode,
+        "queries": n,
+        "recall_at_1": hits_at_1 / n,
+        f"recall_at_{k}": hits_at_k / n,
+        "mrr": statistics.fmean(reciprocal_ranks),
+        "empty_vector_leg": empty_vector / n if mode != "keyword" else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "max_ms": max(latencies),
+    }
+
+def print_table(rows: List[Dict], k: int):
+    print(f"\n{'size':>6} {'mode':<8} {'queries':>7} {'R@1':>6} {f'R@{k}':>6} {'MRR':>6} "
+          f"{'vec∅':>6} {'build':>8} {'p50':>7} {'p95':>7} {'max':>7}")
+    for r in rows:
+        empty = "-" if r["empty_vector_leg"] is None else f"{r['empty_vector_leg']:.0%}"
+        print(f"{r['size']:>6} {r['mode']:<8} {r['queries']:>7} {r['recall_at_1']:>6.3f} "
+              f"{r[f'recall_at_{k}']:>6.3f} {r['mrr']:>6.3f} {empty:>6} {r['build_ms']:>6.0f}ms "
+              f"{r['p50_ms']:>5.2f}ms {r['p95_ms']:>5.2f}ms {r['max_ms']:>5.1f}ms")
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark catalog search over the starter catalogs")
+    parser.add_argument("--catalogs", default=CATALOG_DIR,
+                        help="directory of starter catalog CSVs (default data/starter-catalogs)")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in SIZES),
+                        help=f"catalog sizes to measure (default {','.join(str(s) for s in SIZES)})")
+    parser.add_argument("-k", type=int, default=TOP_K, help=f"match_count (default {TOP_K})")
+    parser.add_argument("--threshold", type=float, default=VECTOR_THRESHOLD,
+                        help=f"vector similarity cutoff (default {VECTOR_THRESHOLD})")
+    parser.add_argument("--rrf-k", type=int, default=RRF_K, help=f"RRF constant (default {RRF_K})")
+    parser.add_argument("--dims", type=int, default=EMBEDDING_DIMS,
+                        help=f"stand-in embedding width (default {EMBEDDING_DIMS})")
+    parser.add_argument("--modes", default="hybrid,vector,keyword",
+                        help="retrieval legs to measure (default hybrid,vector,keyword)")
+    parser.add_argument("--queries", metavar="PATH", help="JSON lines of {query, expect} instead of generated ones")
+    parser.add_argument("--query-items", type=int, default=80,
+                        help="items generated queries are drawn from (default 80, the smallest size)")
+    parser.add_argument("--seed", type=int, default=7, help="shuffle and sampling seed (default 7)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    return parser.parse_args()
+
+def main():
+    """Run the benchmark"""
+    args = parse_args()
+
+    print("🔎 QuotePro Catalog Search Benchmark")
+    print("="*60)
+
+    items = load_catalogs(args.catalogs)
+    if not items:
+        print(f"❌ No catalog rows under {args.catalogs}")
+        sys.exit(1)
+
+    # One fixed shuffle, measured as growing prefixes: each size contains
+    # every smaller one, so the same queries stay answerable throughout.
+    rng = random.Random(args.seed)
+    rng.shuffle(items)
+    sizes = sorted({min(int(s), len(items)) for s in args.sizes.split(",") if s.strip()})
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+
+    if args.queries:
+        queries = load_queries(args.queries)
+    else:
+        queries = generate_queries(items[:min(args.query_items, sizes[0])], rng)
+    print(f"ℹ️  {len(items)} items from {len({i['trade'] for i in items})} trades, {len(queries)} queries")
+    print(f"ℹ️  threshold {args.threshold}, match_count {args.k}, rrf_k {args.rrf_k}, {args.dims} dims")
+
+    rows = []
+    for size in sizes:
+        for row in run_size(items[:size], queries, args.k, args.threshold, args.rrf_k, modes, args.dims):
+            rows.append(row)
+            print(f"  ✅ {size} items, {row['mode']}: MRR {row['mrr']:.3f}, p95 {row['p95_ms']:.2f} ms")
+
+    if not rows:
+        print("❌ No query had an expected item in any measured catalog")
+        sys.exit(1)
+
+    print_table(rows, args.k)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
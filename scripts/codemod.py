@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Codemod Runner
+Applies declarative section replacements to TSX files in one pass per file
+
+A rule names a stretch of source by its opening tokens and says what goes
+there instead:
+
+    {"name": "company-tab",
+     "files": "src/app/*/settings/page.tsx",
+     "match": "{/* Company Profile */} {activeTab === 'company' && (",
+     "replace": "{/* Company Profile */}\\n{activeTab === 'company' && (\\n  <CompanyProfileSettings />\\n)}"}
+
+`match` is compared token by token, so whitespace and line breaks in the
+file do not matter. If it leaves brackets open — as above, `{` and `(` — the
+section runs on to where the file closes them; otherwise it is exactly the
+matched tokens. `replace` is dedented and re-indented to where the section
+starts. `files` is an fnmatch pattern in which `*` also crosses directories
+(default: every .tsx/.ts file under the given paths).
+
+    python scripts/codemod.py rules.json                      # src/app, written in place
+    python scripts/codemod.py rules.json src/components --dry-run
+    python scripts/refactor_settings.py --dry-run             # rules declared in Python
+
+Each file is tokenised once, brackets are paired once, and every rule is
+tried at each token through an index on its first token — no pattern ever
+rescans the file, and nothing backtracks. Files are rewritten only after
+every file has been processed without error, each through a temp file and
+os.replace, so a run either lands whole or not at all.
+
+The lexer knows strings, template literals, comments and regex literals well
+enough that brackets inside them are not counted; JSX text is not parsed.
+An apostrophe there ("Don't") pairs with the next one on its line, so a
+`{...}` between two of them would be missed — a file whose brackets do not
+balance is reported and left alone rather than rewritten on a guess.
+"""
+
+import argparse
+import difflib
+import fnmatch
+import json
+import os
+import pathlib
+import shutil
+import sys
+import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_PATHS = ["src/app"]
+SUFFIXES = (".tsx", ".ts")
+WORKERS = os.cpu_count() or 4
+# Below this many files a process pool costs more than it saves.
+PARALLEL_FROM = 8
+
+OPENERS = {"(": ")", "[": "]", "{": "}"}
+CLOSERS = {")", "]", "}"}
+# After these a `/` starts a regex literal rather than dividing.
+REGEX_AFTER_WORDS = {"return", "typeof", "case", "in", "of", "void", "yield", "await", "delete",
+                     "instanceof", "new", "throw", "else", "do"}
+
+class CodemodError(Exception):
+    pass
+
+# Token: (kind, start, end). Kinds: ws, comment, string, template, regex,
+# word, punct.
+Token = Tuple[str, int, int]
+
+def tokenize(src: str) -> List[Token]:
+    tokens: List[Token] = []
+    i = 0
+    n = len(src)
+    last = None  # last significant token, for the regex-or-divide decision
+
+    def read_template(i: int) -> int:
+        """src[i] is the opening backtick; the index past the closing one."""
+        i += 1
+        while i < n:
+            c = src[i]
+            if c == "\\":
+                i += 2
+            elif c == "`":
+                return i + 1
+            elif c == "$" and src.startswith("${", i):
+                i += 2
+                depth = 1
+                prev = None
+                while i < n and depth:
+                    kind, end = read_token(i, prev)
+                    if kind == "punct":
+                        depth += {"{": 1, "}": -1}.get(src[i], 0)
+                    if kind not in ("ws", "comment"):
+                        prev = (kind, i, end)
+                    i = end
+            else:
+                i += 1
+        raise CodemodError("unterminated template literal")
+
+    def read_token(i: int, prev: Optional[Token]) -> Tuple[str, int]:
+        c = src[i]
+        if c.isspace():
+            j = i + 1
+            while j < n and src[j].isspace():
+                j += 1
+            return "ws", j
+        if src.startswith("//", i):
+            j = src.find("\n", i)
+            return "comment", n if j < 0 else j
+        if src.startswith("/*", i):
+            j = src.find("*/", i + 2)
+            if j < 0:
+                raise CodemodError("unterminated block comment")
+            return "comment", j + 2
+        if c in "'\"":
+            j = i + 1
+            while j < n and src[j] != c and src[j] != "\n":
+                j += 2 if src[j] == "\\" else 1
+            if j < n and src[j] == c:
+                return "string", j + 1
+            return "punct", i + 1  # a stray quote in JSX text
+        if c == "`":
+            return "template", read_template(i)
+        if c == "/" and regex_allowed(prev, i):
+            j = i + 1
+            in_class = False
+            while j < n and src[j] != "\n":
+                if src[j] == "\\":
+                    j += 1
+                elif src[j] == "[":
+                    in_class = True
+                elif src[j] == "]":
+                    in_class = False
+                elif src[j] == "/" and not in_class:
+                    j += 1
+                    while j < n and (src[j].isalnum() or src[j] == "_"):
+                        j += 1
+                    return "regex", j
+                j += 1
+            return "punct", i + 1
+        if c.isalnum() or c in "_$":
+            j = i + 1
+            while j < n and (src[j].isalnum() or src[j] in "_$"):
+                j += 1
+            return "word", j
+        return "punct", i + 1
+
+    def regex_allowed(prev: Optional[Token], i: int) -> bool:
+        if prev is None:
+            return True
+        kind, start, end = prev
+        if kind == "word":
+            return src[start:end] in REGEX_AFTER_WORDS
+        if kind != "punct":
+            return False
+        p = src[start]
+        if p == "<" and end == i:
+            return False  # `</div>`
+        return p not in ")]}" and p not in "'\""
+
+    while i < n:
+        kind, end = read_token(i, last)
+        token = (kind, i, end)
+        tokens.append(token)
+        if kind not in ("ws", "comment"):
+            last = token
+        i = end
+    return tokens
+
+def token_text(src: str, token: Token) -> str:
+    kind, start, end = token
+    text = src[start:end]
+    return " ".join(text.split()) if kind == "comment" else text
+
+def significant(tokens: List[Token]) -> List[Token]:
+    return [t for t in tokens if t[0] != "ws"]
+
+def pair_brackets(src: str, sig: List[Token]) -> Dict[int, int]:
+    """Index of each opening bracket in `sig` → index of its closer."""
+    partner: Dict[int, int] = {}
+    stack: List[int] = []
+    for k, token in enumerate(sig):
+        if token[0] != "punct":
+            continue
+        c = src[token[1]]
+        if c in OPENERS:
+            stack.append(k)
+        elif c in CLOSERS:
+            if not stack or OPENERS[src[sig[stack[-1]][1]]] != c:
+                line = src.count("\n", 0, token[1]) + 1
+                raise CodemodError(f"unbalanced '{c}' at line {line}")
+            partner[stack.pop()] = k
+    if stack:
+        line = src.count("\n", 0, sig[stack[-1]][1]) + 1
+        raise CodemodError(f"unclosed '{src[sig[stack[-1]][1]]}' from line {line}")
+    return partner
+
+def compile_rule(rule: Dict) -> Dict:
+    """Tokenise a rule's pattern once and find which of its brackets stay open."""
+    for key in ("name", "match", "replace"):
+        if key not in rule:
+            raise CodemodError(f"rule {rule.get('name', '?')} needs '{key}'")
+    pattern = rule["match"]
+    sig = significant(tokenize(pattern))
+    if not sig:
+        raise CodemodError(f"rule {rule['name']}: empty match")
+    stack: List[int] = []
+    for k, token in enumerate(sig):
+        c = pattern[token[1]] if token[0] == "punct" else ""
+        if c in OPENERS:
+            stack.append(k)
+        elif c in CLOSERS:
+            if not stack:
+                raise CodemodError(f"rule {rule['name']}: match closes '{c}' it never opened")
+            stack.pop()
+    return {
+        "name": rule["name"],
+        "files": rule.get("files"),
+        "texts": [token_text(pattern, t) for t in sig],
+        # The outermost bracket the match leaves open, as an offset into it:
+        # the section ends where the file closes that one.
+        "open_at": stack[0] if stack else None,
+        "replace": textwrap.dedent(rule["replace"]).strip("\n"),
+    }
+
+def reindent(replacement: str, src: str, start: int) -> str:
+    line_start = src.rfind("\n", 0, start) + 1
+    lead = src[line_start:start]
+    indent = lead if lead.isspace() or not lead else " " * len(lead)
+    lines = replacement.split("\n")
+    return "\n".join(lines[:1] + [indent + line if line else line for line in lines[1:]])
+
+def rewrite(src: str, rules: List[Dict]) -> Tuple[str, Dict[str, int]]:
+    """Apply every rule to one source text. Returns the new text and match counts."""
+    sig = significant(tokenize(src))
+    texts = [token_text(src, t) for t in sig]
+    by_first: Dict[str, List[Dict]] = {}
+    for rule in rules:
+        by_first.setdefault(rule["texts"][0], []).append(rule)
+
+    partner: Optional[Dict[int, int]] = None
+    counts = {rule["name"]: 0 for rule in rules}
+    out: List[str] = []
+    copied = 0  # src offset written so far
+    k = 0
+    while k < len(sig):
+        for rule in by_first.get(texts[k], ()):
+            width = len(rule["texts"])
+            if texts[k:k + width] != rule["texts"]:
+                continue
+            last = k + width - 1
+            if rule["open_at"] is not None:
+                if partner is None:
+                    partner = pair_brackets(src, sig)
+                last = partner[k + rule["open_at"]]
+            start, end = sig[k][1], sig[last][2]
+            out.append(src[copied:start])
+            out.append(reindent(rule["replace"], src, start))
+            copied = end
+            counts[rule["name"]] += 1
+            k = last
+            break
+        k += 1
+    if not copied:
+        return src, counts
+    out.append(src[copied:])
+    return "".join(out), counts
+
+def process(path: str, rules: List[Dict]) -> Tuple[str, Optional[str], Dict[str, int], Optional[str]]:
+    """(path, new text or None if unchanged, counts, error) for one file."""
+    applicable = [r for r in rules if not r["files"] or fnmatch.fnmatch(path, r["files"])]
+    if not applicable:
+        return path, None, {}, None
+    try:
+        with open(path, encoding="utf-8") as f:
+            src = f.read()
+        new, counts = rewrite(src, applicable)
+    except (CodemodError, OSError, UnicodeDecodeError) as e:
+        return path, None, {}, str(e)
+    return path, (new if new != src else None), counts, None
+
+def find_files(paths: Iterable[str]) -> List[str]:
+    files = []
+    for p in paths:
+        p = pathlib.Path(p)
+        if p.is_file():
+            files.append(p.as_posix())
+        else:
+            files.extend(f.as_posix() for f in sorted(p.rglob("*"))
+                         if f.suffix in SUFFIXES and "node_modules" not in f.parts)
+    return files
+
+def write_atomically(path: str, text: str) -> None:
+    tmp = f"{path}.codemod.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    shutil.copymode(path, tmp)
+    os.replace(tmp, path)
+
+def run(rules: List[Dict], paths: Iterable[str], dry_run: bool = False, workers: int = WORKERS) -> int:
+    """Rewrite every file the rules touch; returns the process exit code."""
+    try:
+        compiled = [compile_rule(r) for r in rules]
+    except CodemodError as e:
+        print(f"❌ {e}")
+        return 2
+    files = find_files(paths)
+    print(f"ℹ️  {len(compiled)} rule(s) over {len(files)} file(s)")
+
+    if len(files) >= PARALLEL_FROM and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(process, files, [compiled] * len(files), chunksize=8))
+    else:
+        results = [process(f, compiled) for f in files]
+
+    totals = {rule["name"]: 0 for rule in compiled}
+    changed = []
+    errors = []
+    for path, new, counts, error in results:
+        if error:
+            errors.append((path, error))
+            continue
+        for name, count in counts.items():
+            totals[name] += count
+        if new is not None:
+            changed.append((path, new, counts))
+
+    for path, new, counts in changed:
+        hits = ", ".join(f"{name}×{count}" for name, count in counts.items() if count)
+        print(f"  ✏️  {path}: {hits}")
+        if dry_run:
+            with open(path, encoding="utf-8") as f:
+                old = f.read()
+            sys.stdout.writelines(difflib.unified_diff(
+                old.splitlines(keepends=True), new.splitlines(keepends=True),
+                fromfile=f"a/{path}", tofile=f"b/{path}"))
+    for path, error in errors:
+        print(f"  ❌ {path}: {error}")
+
+    print("\n📊 Matches per rule:")
+    for name, count in totals.items():
+        print(f"   {name:<32} {count}")
+
+    if errors:
+        print(f"\n❌ {len(errors)} file(s) could not be processed - nothing written")
+        return 1
+    if dry_run:
+        print(f"\nℹ️  Dry run: {len(changed)} file(s) would change")
+        return 0
+    for path, new, _ in changed:
+        write_atomically(path, new)
+    print(f"\n✅ {len(changed)} file(s) rewritten")
+    return 0
+
+def cli(rules: Optional[List[Dict]] = None) -> None:
+    """Parse the command line and run; `rules` given means no rules file is expected."""
+    parser = argparse.ArgumentParser(description="Apply declarative section replacements to TSX files")
+    if rules is None:
+        parser.add_argument("rules", help="JSON file holding a list of rules")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS,
+                        help=f"files or directories (default: {' '.join(DEFAULT_PATHS)})")
+    parser.add_argument("--dry-run", action="store_true", help="print a diff instead of writing")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"processes (default {WORKERS})")
+    args = parser.parse_args()
+    if rules is None:
+        with open(args.rules) as f:
+            rules = json.load(f)
+    sys.exit(run(rules, args.paths, dry_run=args.dry_run, workers=args.workers))
+
+if __name__ == "__main__":
+    cli()
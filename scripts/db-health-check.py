@@ -2,160 +2,272 @@
 """
 Database Health Check Script
 Verifies tables, indexes, constraints, RLS policies, and data integrity
+
+The tables and indexes that should exist are read from supabase/migrations
+(parsed once, then cached by file hash); the database's side comes from the
+health_*_stats() functions, which also report index size and scan counts.
+
+Checks run concurrently, and so do the queries inside each check, so a run
+against a remote project costs roughly its slowest round trip rather than the
+sum of all of them. Output is still printed in a fixed order.
+
+    python scripts/db-health-check.py
+    python scripts/db-health-check.py --timeout 3 --deadline 8   # readiness probe
 """
 
+import argparse
 import os
 import sys
-from typing import Dict, List, Tuple
-from supabase import create_client, Client
-
-def get_supabase_client() -> Client:
-    """Initialize Supabase client"""
-    url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
-    
-    if not url or not key:
-        print("❌ Missing Supabase credentials")
-        sys.exit(1)
-    
-    return create_client(url, key)
-
-def check_tables(supabase: Client) -> Tuple[bool, List[str]]:
-    """Verify all required tables exist"""
-    print("\n📋 Checking Tables...")
-    
-    required_tables = [
-        "companies",
-        "quotes",
-        "line_items",
-        "pricing_items",
-        "document_embeddings",
-        "ai_quote_analysis",  # New from Phase 4
-    ]
-    
-    results = []
-    all_good = True
-    
-    for table in required_tables:
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, List, Tuple
+from supabase import Client
+
+from ops import expected_schema, get_client, rpc_or_none, timing
+from ops.schema import SCHEMA_CACHE
+
+# Seconds one check may take, and seconds the whole run may take.
+CHECK_TIMEOUT = 5.0
+DEADLINE = 10.0
+
+# Where the statistics functions the table and index checks read come from.
+STATS_MIGRATION = "supabase/migrations/20261017000000_health_index_stats.sql"
+
+# Tables below this many rows are cheap to scan; their scan mix is not worth
+# a warning.
+SEQ_SCAN_ROWS = 10000
+
+# Queries inside a check fan out on their own pool. Sharing the check pool
+# would deadlock once every worker is a check waiting on a query that has no
+# worker left to run it.
+_queries = ThreadPoolExecutor(max_workers=8, thread_name_prefix="query")
+
+def run_queries(queries: Dict[str, Callable]) -> Dict[str, object]:
+    """Run independent queries concurrently.
+
+    Returns each query's result, or the exception it raised, under its own key
+    and in the order given.
+    """
+    futures = {name: _queries.submit(fn) for name, fn in queries.items()}
+    results = {}
+    for name, future in futures.items():
         try:
-            # Try to query table (SELECT 0 rows)
-            supabase.table(table).select("*").limit(0).execute()
-            results.append(f"  ✅ {table}")
+            results[name] = future.result()
         except Exception as e:
-            results.append(f"  ❌ {table} - {str(e)}")
-            all_good = False
-    
-    for result in results:
-        print(result)
-    
-    return all_good, results
+            results[name] = e
+    return results
+
+def human_bytes(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
 
-def check_indexes(supabase: Client) -> Tuple[bool, List[str]]:
-    """Verify critical indexes exist"""
-    print("\n🔍 Checking Indexes...")
-    
-    # This would require direct SQL access
-    # For now, we'll check via query performance
+def check_tables(supabase: Client, schema: Dict) -> Tuple[bool, List[str]]:
+    """Verify every table the migrations create exists"""
     results = []
-    
-    try:
-        # Check if document_embeddings has vector index
-        result = supabase.table("document_embeddings").select("id").limit(1).execute()
-        results.append("  ✅ document_embeddings accessible")
-        
-        # Check if ai_quote_analysis exists
-        result = supabase.table("ai_quote_analysis").select("id").limit(1).execute()
-        results.append("  ✅ ai_quote_analysis accessible")
-        
-        return True, results
-    except Exception as e:
-        results.append(f"  ❌ Index check failed: {str(e)}")
-        return False, results
+    expected = sorted(schema["tables"])
+    stats = rpc_or_none(supabase, "health_table_stats")
+
+    if stats is None:
+        results.append(f"  ℹ️  health_table_stats() not installed - probing each table instead "
+                       f"(apply {STATS_MIGRATION})")
+        # Try to query each table (SELECT 0 rows)
+        probes = run_queries({
+            table: (lambda t=table: supabase.table(t).select("*").limit(0).execute())
+            for table in expected
+        })
+        missing = {t: str(o) for t, o in probes.items() if isinstance(o, Exception)}
+        stats = []
+    else:
+        present = {row["table_name"] for row in stats}
+        missing = {t: "missing" for t in expected if t not in present}
+
+    for table, reason in missing.items():
+        results.append(f"  ❌ {table} - {reason}")
+    results.append(f"  {'✅' if not missing else '❌'} {len(expected) - len(missing)}/{len(expected)} "
+                   f"tables from the migrations present")
+
+    # A large table read mostly by sequential scans is usually a query
+    # without the index it needs.
+    for row in sorted(stats, key=lambda r: -r["seq_rows_read"]):
+        if (row["live_rows"] >= SEQ_SCAN_ROWS and row["seq_scans"] > row["index_scans"]
+                and row["seq_rows_read"] > row["live_rows"] * row["seq_scans"] // 2):
+            results.append(f"  ⚠️  {row['table_name']}: {row['seq_scans']:,} sequential scans "
+                           f"({row['seq_rows_read']:,} rows read) vs {row['index_scans']:,} index scans, "
+                           f"{row['live_rows']:,} rows, {human_bytes(row['size_bytes'])}")
+
+    return not missing, results
+
+def check_indexes(supabase: Client, schema: Dict) -> Tuple[bool, List[str]]:
+    """Verify the migrations' indexes exist, are valid, and are used"""
+    stats = rpc_or_none(supabase, "health_index_stats")
+    if stats is None:
+        return False, [f"  ❌ health_index_stats() not installed - apply {STATS_MIGRATION}"]
+
+    results = []
+    all_good = True
+    present = {row["index_name"]: row for row in stats}
+
+    for name, spec in sorted(schema["indexes"].items(), key=lambda kv: (kv[1]["table"], kv[0])):
+        row = present.get(name)
+        if row is None:
+            results.append(f"  ❌ {name} on {spec['table']} - missing (created in {spec['migration']})")
+            all_good = False
+        elif not (row["is_valid"] and row["is_ready"]):
+            # Left by a CREATE INDEX CONCURRENTLY that failed: maintained on
+            # every write, never used by the planner.
+            results.append(f"  ❌ {name} - invalid; REINDEX INDEX CONCURRENTLY {name}")
+            all_good = False
+        elif row["scans"] == 0 and not spec["unique"]:
+            results.append(f"  ⚠️  {name} - never scanned, {human_bytes(row['size_bytes'])}")
+        else:
+            results.append(f"  ✅ {name:<44} {human_bytes(row['size_bytes']):>9} {row['scans']:>12,} scans")
+
+    # Indexes nobody wrote a migration for: hotfixes made by hand, or the
+    # remains of an interrupted REINDEX CONCURRENTLY (`*_ccnew`).
+    for name, row in sorted(present.items()):
+        if name in schema["indexes"] or name.endswith(("_pkey", "_key")):
+            continue
+        if not (row["is_valid"] and row["is_ready"]):
+            results.append(f"  ❌ {name} on {row['table_name']} - invalid and not in any migration; drop it")
+            all_good = False
+        else:
+            results.append(f"  ℹ️  {name} on {row['table_name']} - not in any migration, "
+                           f"{human_bytes(row['size_bytes'])}, {row['scans']:,} scans")
+
+    if stats and stats[0].get("stats_since"):
+        results.append(f"  ℹ️  Scan counts since {stats[0]['stats_since'][:10]}")
+    return all_good, results
 
-def check_data_quality(supabase: Client) -> Tuple[bool, List[str]]:
+def check_data_quality(supabase: Client, schema: Dict) -> Tuple[bool, List[str]]:
     """Validate data integrity"""
-    print("\n🔬 Checking Data Quality...")
-    
     results = []
     all_good = True
-    
+
+    def count(table: str, **filters) -> Callable:
+        def run():
+            query = supabase.table(table).select("id", count="exact").limit(0)
+            for column, value in filters.items():
+                query = query.eq(column, value)
+            return query.execute().count
+        return run
+
+    counts = run_queries({
+        "companies": count("companies"),
+        "work_items": count("work_items"),
+        "catalog_items": count("catalog_items", is_active=True),
+        "document_embeddings": count("document_embeddings", entity_type="catalog_item"),
+        "ai_conversations": count("ai_conversations"),
+    })
+
     try:
-        # Count companies
-        companies = supabase.table("companies").select("id", count="exact").execute()
-        company_count = companies.count
-        results.append(f"  ℹ️  Companies: {company_count}")
-        
-        # Count quotes
-        quotes = supabase.table("quotes").select("id", count="exact").execute()
-        quote_count = quotes.count
-        results.append(f"  ℹ️  Quotes: {quote_count}")
-        
-        # Count pricing items
-        pricing = supabase.table("pricing_items").select("id", count="exact").execute()
-        pricing_count = pricing.count
-        results.append(f"  ℹ️  Pricing Items: {pricing_count}")
-        
-        # Count embeddings
-        embeddings = supabase.table("document_embeddings").select("id", count="exact").execute()
-        embedding_count = embeddings.count
-        results.append(f"  ℹ️  Embeddings: {embedding_count}")
-        
+        for table, label in [("companies", "Companies"), ("work_items", "Work Items"),
+                             ("catalog_items", "Active Catalog Items"),
+                             ("document_embeddings", "Catalog Embeddings"),
+                             ("ai_conversations", "AI Conversations")]:
+            if isinstance(counts[table], Exception):
+                raise counts[table]
+            results.append(f"  ℹ️  {label}: {counts[table]}")
+
+        catalog_count = counts["catalog_items"]
+        embedding_count = counts["document_embeddings"]
+
         # Check if catalog is indexed
-        if pricing_count > 0 and embedding_count == 0:
-            results.append("  ⚠️  Warning: Pricing items exist but no embeddings! Run catalog indexing.")
+        if catalog_count > 0 and embedding_count == 0:
+            results.append("  ⚠️  Warning: Catalog items exist but no embeddings! Run catalog indexing.")
             all_good = False
         elif embedding_count > 0:
-            coverage = (embedding_count / pricing_count * 100) if pricing_count > 0 else 0
+            # Embeddings of archived items linger until the indexer prunes
+            # them, so this can read a little over 100%.
+            coverage = (embedding_count / catalog_count * 100) if catalog_count > 0 else 0
             results.append(f"  ✅ Catalog indexed: {coverage:.1f}% coverage")
-        
-        # Check AI analytics table
-        try:
-            analytics = supabase.table("ai_quote_analysis").select("id", count="exact").execute()
-            analytics_count = analytics.count
-            results.append(f"  ✅ AI Analytics: {analytics_count} records")
-        except Exception as e:
-            results.append(f"  ❌ AI Analytics table missing - migration not applied!")
-            all_good = False
-        
+
     except Exception as e:
         results.append(f"  ❌ Data quality check failed: {str(e)}")
         all_good = False
-    
-    for result in results:
-        print(result)
-    
+
     return all_good, results
 
-def check_rls_policies(supabase: Client) -> Tuple[bool, List[str]]:
+def check_rls_policies(supabase: Client, schema: Dict) -> Tuple[bool, List[str]]:
     """Check if RLS policies are active"""
-    print("\n🔒 Checking RLS Policies...")
-    
     results = []
-    
+
     # Note: This requires admin privileges to check pg_policies
     # For basic check, we'll try authenticated queries
     results.append("  ℹ️  RLS policy check requires admin SQL access")
     results.append("  ℹ️  Verify manually: SELECT * FROM pg_policies;")
-    
-    for result in results:
-        print(result)
-    
+
     return True, results
 
+# Printed in this order regardless of which finishes first.
+CHECKS = [
+    ("Tables", "📋 Checking Tables...", check_tables),
+    ("Indexes", "🔍 Checking Indexes...", check_indexes),
+    ("Data Quality", "🔬 Checking Data Quality...", check_data_quality),
+    ("RLS Policies", "🔒 Checking RLS Policies...", check_rls_policies),
+]
+
+def run_checks(supabase: Client, schema: Dict, timeout: float, deadline: float) -> Tuple[Dict[str, bool], bool]:
+    """Run every check concurrently and print each one's output in order.
+
+    A check fails if it outlives its own timeout or the run's deadline,
+    whichever comes first. Returns the pass/fail map and whether every check
+    actually finished.
+    """
+    started = time.monotonic()
+    stop_by = started + deadline
+
+    def timed(fn: Callable) -> Callable:
+        def run():
+            t0 = time.monotonic()
+            ok, lines = fn(supabase, schema)
+            return ok, lines, time.monotonic() - t0
+        return run
+
+    pool = ThreadPoolExecutor(max_workers=len(CHECKS), thread_name_prefix="check")
+    futures = [(name, header, pool.submit(timed(fn))) for name, header, fn in CHECKS]
+
+    checks = {}
+    finished = True
+    for name, header, future in futures:
+        print(f"\n{header}")
+        # Every check started at `started`, so its own budget runs from there.
+        wait = min(started + timeout, stop_by) - time.monotonic()
+        try:
+            ok, lines, latency = future.result(timeout=max(wait, 0))
+        except FutureTimeout:
+            print(f"  ❌ Timed out after {min(timeout, deadline):.1f}s")
+            checks[name] = False
+            finished = False
+            continue
+        except Exception as e:
+            print(f"  ❌ Check crashed: {str(e)}")
+            checks[name] = False
+            continue
+        for line in lines:
+            print(line)
+        print(f"  ⏱️  {latency * 1000:.0f} ms")
+        checks[name] = ok
+
+    pool.shutdown(wait=False, cancel_futures=True)
+    print(f"\n⏱️  Total: {(time.monotonic() - started) * 1000:.0f} ms")
+    return checks, finished
+
 def print_summary(checks: Dict[str, bool]):
     """Print overall health summary"""
     print("\n" + "="*50)
     print("📊 HEALTH CHECK SUMMARY")
     print("="*50)
-    
+
     all_passed = all(checks.values())
-    
+
     for check_name, passed in checks.items():
         status = "✅ PASS" if passed else "❌ FAIL"
         print(f"{status} - {check_name}")
-    
+
     print("="*50)
-    
+
     if all_passed:
         print("🎉 All checks passed! Database is healthy.")
         return 0
@@ -163,23 +275,45 @@ def print_summary(checks: Dict[str, bool]):
         print("⚠️  Some checks failed. Review output above.")
         return 1
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="QuotePro database health check")
+    parser.add_argument("--timeout", type=float, default=CHECK_TIMEOUT,
+                        help=f"seconds each check may take (default {CHECK_TIMEOUT:g})")
+    parser.add_argument("--deadline", type=float, default=DEADLINE,
+                        help=f"seconds the whole run may take (default {DEADLINE:g})")
+    parser.add_argument("--schema-cache", default=SCHEMA_CACHE,
+                        help=f"where parsed migrations are cached between runs (default {SCHEMA_CACHE})")
+    timing.add_arguments(parser)
+    return parser.parse_args()
+
 def main():
     """Run all health checks"""
+    args = parse_args()
+
     print("🏥 QuotePro Database Health Check")
     print("="*50)
-    
-    supabase = get_supabase_client()
-    
-    checks = {}
-    
-    # Run all checks
-    checks["Tables"], _ = check_tables(supabase)
-    checks["Indexes"], _ = check_indexes(supabase)
-    checks["Data Quality"], _ = check_data_quality(supabase)
-    checks["RLS Policies"], _ = check_rls_policies(supabase)
-    
+
+    timing.start(args, "db-health-check")
+    # A request that outlives its check is abandoned, not cancelled — the HTTP
+    # timeout is what actually stops it. One retry at most: a probe that backs
+    # off for longer than its deadline has already answered.
+    supabase = get_client(timeout=args.timeout, retries=1)
+
+    # What should exist, from the migrations; only new or edited files are parsed.
+    schema = expected_schema(cache_path=args.schema_cache)
+    print(f"ℹ️  Expecting {len(schema['tables'])} tables and {len(schema['indexes'])} indexes "
+          f"from the migrations ({schema['parsed']} parsed, the rest cached)")
+
+    checks, finished = run_checks(supabase, schema, args.timeout, args.deadline)
+
     # Print summary
     exit_code = print_summary(checks)
+    timing.finish(args)
+    sys.stdout.flush()
+    if not finished:
+        # A hung request still holds a worker thread, and interpreter shutdown
+        # would wait on it — exactly what a readiness probe cannot afford.
+        os._exit(exit_code)
     sys.exit(exit_code)
 
 if __name__ == "__main__":
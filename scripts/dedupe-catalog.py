@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Catalog Near-Duplicate Finder
+Finds catalog items that are the same thing under slightly different names, and suggests merges
+
+A company that loads several starter trades and then uploads its own price
+list ends up with the same item several times over: "Standard Service
+Call" from two trades, "Emergency Service Fee - Before 4 PM" beside
+"Emergency Service Fee Before 4pm". The unique index only catches exact
+names.
+Comparing every pair of items is quadratic, so this script uses MinHash and
+locality-sensitive hashing instead.
+
+- Shingling: each item becomes a set of shingles, the character 4-grams of
+  its normalized name plus the word pairs of its description.
+- Signatures: a MinHash signature of NUM_PERM hashes estimates the Jaccard
+  similarity of any two of those sets.
+- LSH: signatures are cut into bands. Items that share any whole band
+  become candidate pairs. Bands and rows are chosen so items at
+  --threshold almost always share one, and dissimilar items almost never
+  do.
+- Verification: every candidate pair is checked with exact Jaccard, so the
+  banding's false positives never reach the output.
+
+The work is close to linear in catalog size.
+
+Connected duplicates form a cluster. Each cluster gets one item to keep and
+a suggested action:
+- merge: every price and unit agrees
+- review: they differ, because "Emergency Fee (After 8 pm)" and
+  "Emergency Fee (Weekday after 5)" can be two real prices
+The item kept is the one linked to QuickBooks, then the one with an image,
+then the contractor's own over a starter row, then the oldest.
+
+    python scripts/dedupe-catalog.py --company <uuid>
+    python scripts/dedupe-catalog.py --threshold 0.5 --csv dupes.csv          # every company
+    python scripts/dedupe-catalog.py --starter --file product.csv --json starter-dupes.json
+
+--starter checks the starter library in data/starter-catalogs across trades
+(plus any --file price lists) instead of the database: the duplicates every
+multi-trade tenant would inherit. Nothing is changed; apply a merge by
+archiving the duplicates into archived_catalog_items, as the 20260821500000
+migration does.
+
+Needs numpy.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from ops import get_client, iter_rows
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "starter-catalogs")
+
+# Hashes per signature: more is a finer estimate and a sharper LSH cut.
+NUM_PERM = 128
+# Jaccard similarity of shingle sets at which two items count as duplicates.
+THRESHOLD = 0.6
+# Characters per name shingle.
+SHINGLE = 4
+# Prices within this fraction of the kept item's count as the same price.
+PRICE_TOLERANCE = 0.01
+# Clusters printed per scope, and duplicates printed per cluster.
+SHOW = 15
+LINES = 5
+
+CATALOG_COLUMNS = "id,company_id,name,description,category,base_price,unit,source,image_path,qbo_item_id,created_at"
+
+# 2^61 - 1, and the 32 bits of each hash kept: a*x + b stays under 2^64
+# for 32-bit a, x and b, so uint64 arithmetic never overflows.
+MERSENNE = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        print("❌ This needs numpy: pip install numpy")
+        sys.exit(1)
+    return numpy
+
+def normalize(text: Optional[str]) -> str:
+    text = (text or "").lower().replace("&", " and ")
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+def shingles(item: Dict, with_description: bool) -> Set[str]:
+    """Character k-grams of the name, word pairs of the description."""
+    name = f" {normalize(item['name'])} "
+    found = {name[i:i + SHINGLE] for i in range(len(name) - SHINGLE + 1)} or {name}
+    if with_description:
+        words = normalize(item.get("description")).split()
+        found |= {f"d:{a} {b}" for a, b in zip(words, words[1:])}
+    return found
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+class MinHasher:
+    """NUM_PERM universal hashes, (a*x + b) mod MERSENNE, over 32-bit shingle hashes."""
+
+    def __init__(self, np, num_perm: int, seed: int):
+        rng = np.random.RandomState(seed)
+        self.np = np
+        self.a = rng.randint(1, MAX_HASH, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def signature(self, found: Set[str]):
+        np = self.np
+        # blake2b, not hash(): str hashes are salted per process.
+        x = np.array([int.from_bytes(hashlib.blake2b(s.encode(), digest_size=4).digest(), "little")
+                      for s in found], dtype=np.uint64)
+        hashed = (np.outer(x, self.a) + self.b) % np.uint64(MERSENNE) & np.uint64(MAX_HASH)
+        return hashed.min(axis=0)
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) whose S-curve knee, (1/bands)^(1/rows), sits at or just
+    below the threshold. Below rather than above: a missed pair is gone,
+    while an extra candidate only costs one exact Jaccard check."""
+    options = [(num_perm // r, r) for r in range(1, num_perm + 1)]
+    under = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    return max(under, key=lambda br: (1 / br[0]) ** (1 / br[1])) if under else options[0]
+
+def candidate_pairs(signatures, bands: int, rows: int) -> Set[Tuple[int, int]]:
+    """Index pairs sharing at least one whole band of their signatures."""
+    pairs = set()
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = {}
+        for i, signature in enumerate(signatures):
+            buckets.setdefault(signature[band * rows:(band + 1) * rows].tobytes(), []).append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+    return pairs
+
+def clusters_of(n: int, edges: List[Tuple[int, int, float]]) -> List[List[int]]:
+    """Connected components of the verified pairs (union-find), largest first."""
+    parent = list(range(n))
+
+    def root(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j, _ in edges:
+        parent[root(i)] = root(j)
+    groups: Dict[int, List[int]] = {}
+    for k in sorted({k for i, j, _ in edges for k in (i, j)}):
+        groups.setdefault(root(k), []).append(k)
+    return sorted(groups.values(), key=len, reverse=True)
+
+def keep_rank(item: Dict) -> Tuple:
+    """Sort key; the smallest is kept. QuickBooks link, image, the
+    contractor's own over a starter row, then the oldest (or the most common
+    trade, for the starter library)."""
+    return (not item.get("qbo_item_id"), not item.get("image_path"), item.get("source") == "starter",
+            item.get("created_at") or "", item.get("order", 0), str(item.get("id")))
+
+def same_price(a: Dict, b: Dict) -> bool:
+    pa, pb = float(a.get("base_price") or 0), float(b.get("base_price") or 0)
+    return abs(pa - pb) <= PRICE_TOLERANCE * max(pa, pb, 1) and (a.get("unit") or "each") == (b.get("unit") or "each")
+
+def find_duplicates(np, items: List[Dict], args: argparse.Namespace) -> Dict:
+    """Clusters of near-duplicates in one scope, with a suggestion for each."""
+    started = time.perf_counter()
+    sets = [shingles(item, not args.names_only) for item in items]
+    hasher = MinHasher(np, args.num_perm, args.seed)
+    signatures = [hasher.signature(s) for s in sets]
+    bands, rows = choose_bands(args.num_perm, args.threshold)
+    candidates = candidate_pairs(signatures, bands, rows)
+    edges = [(i, j, sim) for i, j in candidates if (sim := jaccard(sets[i], sets[j])) >= args.threshold]
+
+    clusters = clusters_of(len(items), edges)
+    cluster_of = {k: number for number, members in enumerate(clusters) for k in members}
+    sims = [[] for _ in clusters]
+    for i, j, sim in edges:
+        sims[cluster_of[i]].append(sim)
+    suggestions = []
+    for members, cluster_sims in zip(clusters, sims):
+        ranked = sorted(members, key=lambda k: keep_rank(items[k]))
+        keep, rest = ranked[0], ranked[1:]
+        suggestions.append({
+            "action": "merge" if all(same_price(items[keep], items[k]) for k in rest) else "review",
+            "similarity": [round(min(cluster_sims), 3), round(max(cluster_sims), 3)],
+            "keep": items[keep],
+            "duplicates": [dict(items[k], similarity=round(jaccard(sets[keep], sets[k]), 3)) for k in rest],
+        })
+    return {
+        "items": len(items),
+        "bands": bands,
+        "rows": rows,
+        "candidates": len(candidates),
+        "verified": len(edges),
+        "seconds": time.perf_counter() - started,
+        "clusters": suggestions,
+    }
+
+def read_price_list(path: str, trade: Optional[str], order: int) -> Iterator[Dict]:
+    """Rows of a starter CSV or a product.csv-style price list.
+
+    The header is the first row naming an item column; product.csv has a
+    blank row and a blank first column before it.
+    """
+    headers = {"name": ("name", "item"), "description": ("description", "details"),
+               "base_price": ("price", "base price", "base_price"), "unit": ("unit",), "category": ("category",)}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        cols = None
+        for row in reader:
+            lowered = [c.strip().lower() for c in row]
+            if cols is None:
+                if any(h in lowered for h in headers["name"]):
+                    cols = {field: next((lowered.index(h) for h in names if h in lowered), None)
+                            for field, names in headers.items()}
+                continue
+
+            def cell(field: str) -> str:
+                at = cols[field]
+                return row[at].strip() if at is not None and at < len(row) else ""
+
+            if not cell("name"):
+                continue
+            # The first amount: "65.00 per ¼ hour ($165 min.)" is 65.
+            price = re.search(r"\d[\d,]*(?:\.\d+)?", cell("base_price"))
+            yield {
+                "id": f"{os.path.basename(path)}:{reader.line_num}",
+                "name": cell("name"),
+                "description": cell("description") or None,
+                "category": cell("category") or None,
+                "base_price": float(price.group().replace(",", "")) if price else 0.0,
+                "unit": cell("unit") or "each",
+                "trade": trade,
+                "source": "starter" if trade else "import",
+                "order": order,
+            }
+
+def starter_items(directory: str, files: List[str]) -> List[Dict]:
+    """The whole starter library, most common trades first, plus --file lists."""
+    with open(os.path.join(directory, "_trades.json")) as f:
+        trades = json.load(f)
+    items = []
+    for order, trade in enumerate(trades):
+        slug = re.sub(r"[^a-z0-9]+", "-", trade["name"].lower().replace("&", " and ")).strip("-")
+        items.extend(read_price_list(os.path.join(directory, f"{slug}.csv"), slug, order))
+    for path in files:
+        items.extend(read_price_list(path, None, len(trades)))
+    return items
+
+def print_scope(label: str, result: Dict, show: int):
+    n = result["items"]
+    pairs = n * (n - 1) // 2
+    dupes = sum(len(c["duplicates"]) for c in result["clusters"])
+    merges = sum(c["action"] == "merge" for c in result["clusters"])
+    icon = "✅" if not result["clusters"] else "⚠️ "
+    print(f"\n{icon} {label}: {n:,} items, {len(result['clusters'])} clusters, {dupes} duplicates "
+          f"({merges} clusters to merge, {len(result['clusters']) - merges} to review)")
+    print(f"   ℹ️  {result['candidates']:,} candidate pairs of {pairs:,} ({result['bands']} bands × {result['rows']} rows), "
+          f"{result['verified']:,} verified, {result['seconds']:.2f}s")
+    for cluster in result["clusters"][:show]:
+        keep = cluster["keep"]
+        where = f" [{keep['trade']}]" if keep.get("trade") else ""
+        print(f"   {'🔀' if cluster['action'] == 'merge' else '🔍'} keep  {keep['name']}{where}  ${float(keep['base_price']):,.2f}")
+        for dup in cluster["duplicates"][:LINES]:
+            where = f" [{dup['trade']}]" if dup.get("trade") else ""
+            print(f"        {dup['similarity']:.2f}  {dup['name']}{where}  ${float(dup['base_price']):,.2f}")
+        if len(cluster["duplicates"]) > LINES:
+            print(f"        … and {len(cluster['duplicates']) - LINES} more")
+    if len(result["clusters"]) > show:
+        print(f"   … and {len(result['clusters']) - show} more clusters")
+
+def write_csv(path: str, results: List[Tuple[str, Dict]]):
+    """One row per duplicate, beside the item it would merge into."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["scope", "cluster", "action", "similarity", "keep_id", "keep_name", "keep_price",
+                         "duplicate_id", "duplicate_name", "duplicate_price", "duplicate_source"])
+        for label, result in results:
+            for number, cluster in enumerate(result["clusters"], start=1):
+                keep = cluster["keep"]
+                for dup in cluster["duplicates"]:
+                    writer.writerow([label, number, cluster["action"], dup["similarity"], keep["id"], keep["name"],
+                                     keep["base_price"], dup["id"], dup["name"], dup["base_price"], dup.get("source")])
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Find near-duplicate catalog items with MinHash/LSH")
+    parser.add_argument("--company", action="append", default=[], help="company id to check (repeatable; default all)")
+    parser.add_argument("--starter", action="store_true", help="check the starter library instead of the database")
+    parser.add_argument("--file", action="append", default=[], metavar="CSV",
+                        help="with --starter, also a price list such as product.csv (repeatable)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"Jaccard similarity that counts as a duplicate (default {THRESHOLD})")
+    parser.add_argument("--names-only", action="store_true", help="compare names alone, not descriptions")
+    parser.add_argument("--num-perm", type=int, default=NUM_PERM, help=f"MinHash signature length (default {NUM_PERM})")
+    parser.add_argument("--seed", type=int, default=1, help="hash seed (default 1)")
+    parser.add_argument("--show", type=int, default=SHOW, help=f"clusters printed per scope (default {SHOW})")
+    parser.add_argument("--csv", metavar="PATH", help="write merge suggestions as CSV, one row per duplicate")
+    parser.add_argument("--json", metavar="PATH", help="write the clusters as JSON")
+    parser.add_argument("--catalogs", default=CATALOG_DIR, help="starter catalog directory")
+    parser.add_argument("--page-size", type=int, default=1000, help="rows per request (default 1000)")
+    args = parser.parse_args()
+    if not 0 < args.threshold <= 1:
+        parser.error("--threshold is a similarity between 0 and 1")
+    if args.num_perm < 8:
+        parser.error("--num-perm must be at least 8")
+    if args.file and not args.starter:
+        parser.error("--file goes with --starter")
+    return args
+
+def main():
+    """Shingle, sign, band, verify, suggest"""
+    args = parse_args()
+    np = require_numpy()
+
+    print("🧬 QuotePro Catalog Near-Duplicate Finder")
+    print("="*60)
+
+    results = []
+    if args.starter:
+        items = starter_items(args.catalogs, args.file)
+        label = "Starter library" + (f" + {', '.join(map(os.path.basename, args.file))}" if args.file else "")
+        results.append((label, find_duplicates(np, items, args)))
+        print_scope(label, results[-1][1], args.show)
+    else:
+        supabase = get_client()
+        scope = {"id": ("in_", args.company)} if args.company else None
+        companies = list(iter_rows(supabase, "companies", "id,name", args.page_size, filters=scope))
+        for company in companies:
+            items = list(iter_rows(supabase, "catalog_items", CATALOG_COLUMNS, args.page_size,
+                                   filters={"company_id": company["id"], "is_active": True}))
+            if len(items) < 2:
+                continue
+            label = f"{company['name']} ({company['id']})"
+            results.append((label, find_duplicates(np, items, args)))
+            print_scope(label, results[-1][1], args.show)
+
+    clusters = sum(len(r["clusters"]) for _, r in results)
+    dupes = sum(len(c["duplicates"]) for _, r in results for c in r["clusters"])
+    print("\n" + "="*60)
+    print(f"📊 {len(results)} catalogs, {sum(r['items'] for _, r in results):,} items: "
+          f"{clusters} clusters, {dupes} near-duplicates")
+    print("="*60)
+
+    if args.csv:
+        write_csv(args.csv, results)
+        print(f"📊 Suggestions written to {args.csv}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"threshold": args.threshold, "num_perm": args.num_perm,
+                       "scopes": [{"scope": label, **result} for label, result in results]},
+                      f, indent=2, default=str)
+        print(f"📊 Clusters written to {args.json}")
+
+if __name__ == "__main__":
+    main()
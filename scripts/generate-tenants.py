@@ -0,0 +1,569 @@
+#!/usr/bin/env python3
+"""
+Synthetic Tenant Generator
+Builds a deterministic multi-tenant dataset for load testing, at any scale
+
+Companies are drawn from the starter catalogs: each gets a trade from
+_trades.json (the common residential trades most often) and that trade's
+catalog, lightly repriced. Around the catalog it gets customers and
+addresses, work items in every status, quote lines picked from the catalog,
+invoices for completed jobs, and payments against them.
+
+The data is skewed the way real usage is. Company sizes are lognormal, so a
+few tenants are twenty times the median. Repeat customers account for most
+of the work. Recent work is still in the pipeline, and old work has settled
+into completed, archived, rejected or expired.
+
+Each company is generated from its own seeded RNG, so the dataset depends on
+--seed and --as-of alone, not on --workers or the order chunks finish in.
+Worker processes each take chunks of companies and stream rows into CSV
+buffers that are flushed, parents before children, whenever they pass
+FLUSH_BYTES. Memory stays flat however many rows are written.
+
+    python scripts/generate-tenants.py --companies 100 --out /tmp/tenants
+    python scripts/generate-tenants.py --companies 1000 --workers 8 --dsn "$SUPABASE_DB_URL"
+    python scripts/generate-tenants.py --undo --dsn "$SUPABASE_DB_URL"
+
+With --out, each table gets a directory of CSV parts and load.sql COPYs them
+in order (`cd /tmp/tenants && psql "$SUPABASE_DB_URL" -f load.sql`). With
+--dsn, rows are COPYed straight in. Every company carries
+settings.synthetic = TAG, which is what --undo deletes by; the rest of each
+tenant goes with it by cascade. 1000 companies at the default size comes to
+roughly 10M rows.
+"""
+
+import abc
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, time as clock, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ops import pg_connect
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "starter-catalogs")
+
+# Marks every generated company; --undo deletes by it.
+TAG = "loadtest-v1"
+
+COMPANIES = 100
+# Mean work items per company. Sizes are lognormal around it with
+# SIZE_SIGMA, capped at MAX_SIZE times the mean.
+WORK_ITEMS = 1800
+SIZE_SIGMA = 1.0
+MAX_SIZE = 25
+
+# Companies per task handed to a worker, and per CSV part file.
+CHUNK = 10
+# Buffered CSV per worker before it is written out.
+FLUSH_BYTES = 8 << 20
+
+# Parents before children: the order rows are flushed and loaded in.
+TABLES = {
+    "companies": ["id", "name", "trade", "email", "phone", "plan", "settings", "created_at", "updated_at"],
+    "customers": ["id", "company_id", "name", "email", "phone", "metadata", "created_at", "updated_at"],
+    "customer_addresses": ["id", "customer_id", "label", "address", "city", "state", "zip", "is_primary",
+                           "lat", "lng", "created_at"],
+    "catalog_items": ["id", "company_id", "name", "description", "category", "base_price", "unit",
+                      "labor_hours", "material_cost", "trade", "source", "is_active", "metadata",
+                      "created_at", "updated_at"],
+    "work_items": ["id", "company_id", "customer_id", "address_id", "status", "kind", "source", "urgency",
+                   "quote_number", "job_number", "job_name", "description", "subtotal", "tax_rate",
+                   "tax_amount", "total", "scheduled_start", "scheduled_end", "sent_at", "viewed_at",
+                   "accepted_at", "rejected_at", "completed_at", "archived_at", "expires_at", "metadata",
+                   "created_at", "updated_at"],
+    "quote_items": ["id", "work_item_id", "name", "description", "quantity", "unit_price", "unit",
+                    "sort_order", "created_at"],
+    "invoices": ["id", "company_id", "work_item_id", "customer_id", "invoice_number", "subtotal", "tax_amount",
+                 "total", "amount_paid", "status", "due_date", "sent_at", "paid_at", "payment_method",
+                 "metadata", "created_at", "updated_at"],
+    "payments": ["id", "invoice_id", "amount", "method", "reference_number", "paid_at", "metadata",
+                 "created_at"],
+}
+
+# Status mix by age. Work younger than OPEN_DAYS is still moving; older work
+# has mostly landed somewhere final, bar the leads nobody followed up.
+OPEN_DAYS = 45
+OPEN_STATUSES = {"lead": 15, "quote_draft": 12, "quote_sent": 18, "quote_viewed": 10, "quote_accepted": 8,
+                 "job_scheduled": 15, "job_in_progress": 5, "job_completed": 12, "quote_rejected": 3,
+                 "archived": 2}
+SETTLED_STATUSES = {"job_completed": 45, "archived": 15, "quote_expired": 15, "quote_rejected": 12,
+                    "lead": 8, "job_cancelled": 5}
+QUOTED = {"quote_sent", "quote_viewed", "quote_accepted", "quote_rejected", "quote_expired",
+          "job_scheduled", "job_in_progress", "job_completed", "job_cancelled"}
+VIEWED = QUOTED - {"quote_sent"}
+ACCEPTED = {"quote_accepted", "job_scheduled", "job_in_progress", "job_completed", "job_cancelled"}
+SCHEDULED = {"job_scheduled", "job_in_progress", "job_completed"}
+
+SOURCES = {"direct": 30, "phone": 25, "website": 15, "referral": 15, "google_ads": 8, "facebook": 5, "other": 2}
+URGENCIES = {"low": 25, "medium": 55, "high": 20}
+PLANS = {"free": 55, "pro": 30, "team": 12, "enterprise": 3}
+METHODS = {"card": 45, "stripe": 25, "check": 15, "bank_transfer": 10, "cash": 5}
+
+FIRST_NAMES = ["Angela", "Marcus", "Priya", "Tom", "Dana", "Ray", "Helen", "Nathan", "Sofia", "James", "Mei",
+               "Carlos", "Grace", "Omar", "Linda", "Victor", "Aisha", "Brian", "Rosa", "Kevin", "Nora", "Luis",
+               "Emily", "Dmitri", "Hannah", "Samuel", "Fatima", "Derek", "Julia", "Andre"]
+LAST_NAMES = ["Reyes", "Webb", "Nair", "Brennan", "Kowalski", "Okafor", "Vasquez", "Cole", "Nguyen", "Patel",
+              "Schmidt", "Johnson", "Garcia", "Kim", "Murphy", "Haddad", "Rossi", "Novak", "Silva", "Larsen",
+              "Chen", "Walker", "Ibrahim", "Foster", "Moreno", "Tanaka", "Hughes", "Duarte", "Bishop", "Quinn"]
+STREETS = ["Bluebonnet Ln", "Wheless Ln", "Ashdale Dr", "Circle Ave", "Bishop Rd", "Fairway St", "Clayton Ln",
+           "Shoal Creek Blvd", "Oak Hollow Dr", "Maple Ave", "Cedar St", "Ridge Rd", "Lakeview Dr", "Elm St",
+           "Sunset Blvd", "Pine Valley Ct", "Mill Creek Rd", "Harbor Way", "Prairie Ln", "Summit Ave"]
+# (city, state, zip prefix, lat, lng, timezone)
+CITIES = [
+    ("Austin", "TX", "787", 30.27, -97.74, "America/Chicago"),
+    ("Round Rock", "TX", "786", 30.51, -97.68, "America/Chicago"),
+    ("Denver", "CO", "802", 39.74, -104.99, "America/Denver"),
+    ("Phoenix", "AZ", "850", 33.45, -112.07, "America/Phoenix"),
+    ("Sacramento", "CA", "958", 38.58, -121.49, "America/Los_Angeles"),
+    ("Portland", "OR", "972", 45.52, -122.68, "America/Los_Angeles"),
+    ("Columbus", "OH", "432", 39.96, -83.00, "America/New_York"),
+    ("Charlotte", "NC", "282", 35.23, -80.84, "America/New_York"),
+    ("Tampa", "FL", "336", 27.95, -82.46, "America/New_York"),
+    ("Minneapolis", "MN", "554", 44.98, -93.27, "America/Chicago"),
+]
+COMPANY_SUFFIXES = ["Co", "LLC", "& Sons", "Pros", "Services", "Group", "Experts", "Solutions"]
+
+class Weighted:
+    """Choices drawn by weight, from a {value: weight} mapping."""
+
+    def __init__(self, weights: Dict):
+        self.values = list(weights)
+        self.cumulative = []
+        total = 0
+        for weight in weights.values():
+            total += weight
+            self.cumulative.append(total)
+
+    def pick(self, rng: random.Random):
+        return rng.choices(self.values, cum_weights=self.cumulative)[0]
+
+OPEN = Weighted(OPEN_STATUSES)
+SETTLED = Weighted(SETTLED_STATUSES)
+SOURCE = Weighted(SOURCES)
+URGENCY = Weighted(URGENCIES)
+PLAN = Weighted(PLANS)
+METHOD = Weighted(METHODS)
+
+def slugify_trade(name: str) -> str:
+    """slugifyTrade from src/lib/catalog/starter.ts."""
+    slug = re.sub(r"[^a-z0-9]+", "-", name.lower().replace("&", " and "))
+    return slug.strip("-")
+
+def kind_for(status: str) -> str:
+    """set_work_item_kind() from the baseline migration; triggers are off during the load."""
+    if status in ("lead", "archived"):
+        return status
+    if status.startswith("quote_"):
+        return "quote"
+    if status.startswith("job_"):
+        return "job"
+    return "unknown"
+
+def money(value: float) -> float:
+    return math.floor(value * 100 + 0.5) / 100
+
+def load_trades(directory: str) -> List[Dict]:
+    """Every trade in _trades.json with its catalog rows, most common trades first."""
+    with open(os.path.join(directory, "_trades.json")) as f:
+        trades = json.load(f)
+    loaded = []
+    for trade in trades:
+        slug = slugify_trade(trade["name"])
+        items, seen = [], set()
+        with open(os.path.join(directory, f"{slug}.csv"), newline="") as f:
+            for row in csv.DictReader(f):
+                name = (row.get("name") or "").strip()[:200]
+                # One active item per name per company is a unique index.
+                if not name or name.lower() in seen:
+                    continue
+                seen.add(name.lower())
+                items.append({
+                    "name": name,
+                    "description": (row.get("description") or "").strip() or None,
+                    "category": (row.get("category") or "").strip() or None,
+                    "unit": (row.get("unit") or "").strip() or "each",
+                    "price": max(float(row.get("price") or 0), 1.0),
+                    "labor_hours": float(row["labor_hours"]) if row.get("labor_hours") else None,
+                    "material_cost": float(row["material_cost"]) if row.get("material_cost") else None,
+                })
+        loaded.append({"name": trade["name"], "slug": slug, "category": trade.get("category"), "items": items})
+    return loaded
+
+def company_rows(index: int, seed: int, as_of: datetime, mean_size: int,
+                 trades: List[Dict]) -> Iterator[Tuple[str, List]]:
+    """Every row of one company, as (table, values), parents before their children."""
+    rng = random.Random(f"{seed}:{index}")
+    meta = json.dumps({"synthetic": TAG})
+
+    def uid() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+    def between(start: datetime, end: datetime) -> datetime:
+        return start + (end - start) * rng.random()
+
+    # Trades in _trades.json order, which puts the common ones first; a
+    # Zipf-like weight gives most companies one of those.
+    trade = rng.choices(trades, weights=[1 / (rank + 1) ** 0.8 for rank in range(len(trades))])[0]
+    city, state, zip_prefix, lat, lng, tz = rng.choice(CITIES)
+    size = min(MAX_SIZE, rng.lognormvariate(-SIZE_SIGMA ** 2 / 2, SIZE_SIGMA))
+    work_count = max(5, round(mean_size * size))
+    customer_count = max(3, round(work_count * rng.uniform(0.35, 0.6)))
+
+    company_id = uid()
+    company_created = as_of - timedelta(days=rng.uniform(30, 3 * 365))
+    owner = rng.choice(LAST_NAMES)
+    tax_rate = rng.choice([0, 6.25, 7.0, 8.25, 8.5, 9.0])
+    settings = {"tax_rate": tax_rate, "currency": "USD", "timezone": tz,
+                "ai": {"model": "gemini-2.0-flash", "temperature": 0.1}, "synthetic": TAG}
+    name = f"{owner} {trade['category'] or 'Home'} {rng.choice(COMPANY_SUFFIXES)} {index}"
+    yield "companies", [company_id, name, trade["slug"], f"office@{slugify_trade(name)}.example.com",
+                        f"+1-555-{index // 10000 % 1000:03d}-{index % 10000:04d}", PLAN.pick(rng),
+                        json.dumps(settings), company_created, company_created]
+
+    # Customers, one address each and a second for some.
+    customers = []
+    for n in range(customer_count):
+        customer_id = uid()
+        created = between(company_created, as_of)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield "customers", [customer_id, company_id, f"{first} {last}", f"{first}.{last}{n}@example.com".lower(),
+                            f"+1-555-{n // 10000:03d}-{n % 10000:04d}", meta, created, created]
+        addresses = []
+        for a in range(2 if rng.random() < 0.1 else 1):
+            address_id = uid()
+            addresses.append(address_id)
+            yield "customer_addresses", [address_id, customer_id, "Home" if a == 0 else "Rental",
+                                         f"{rng.randint(100, 9899)} {rng.choice(STREETS)}", city, state,
+                                         f"{zip_prefix}{rng.randint(0, 99):02d}", a == 0,
+                                         round(lat + rng.uniform(-0.2, 0.2), 5),
+                                         round(lng + rng.uniform(-0.2, 0.2), 5), created]
+        customers.append((customer_id, addresses, created))
+
+    # The trade's catalog, repriced a little per company; a few items retired.
+    catalog = []
+    for item in trade["items"]:
+        item_id = uid()
+        price = money(item["price"] * rng.uniform(0.85, 1.2))
+        active = rng.random() >= 0.05
+        yield "catalog_items", [item_id, company_id, item["name"], item["description"], item["category"], price,
+                                item["unit"], item["labor_hours"], item["material_cost"], trade["slug"], "starter",
+                                active, meta, company_created, company_created]
+        if active:
+            catalog.append((item, price))
+
+    quotes = jobs = invoices = 0
+    for _ in range(work_count):
+        # Squaring favours the earliest customers: a few regulars, a long tail.
+        customer_id, addresses, customer_created = customers[int(customer_count * rng.random() ** 2)]
+        # Square root favours recent dates: the business has been growing.
+        created = customer_created + (as_of - customer_created) * math.sqrt(rng.random())
+        age = (as_of - created).days
+        status = (OPEN if age < OPEN_DAYS else SETTLED).pick(rng)
+        item_id = uid()
+
+        lines = []
+        if status != "lead" and catalog:
+            for _ in range(1 + min(int(rng.expovariate(1 / 3)), 24)):
+                item, price = rng.choice(catalog)
+                quantity = 1 if item["unit"] in ("visit", "each") else rng.randint(1, 12)
+                lines.append((item, price, quantity))
+        subtotal = money(sum(price * quantity for _, price, quantity in lines))
+        tax = money(subtotal * tax_rate / 100)
+
+        # Each event follows the one before it, and none is later than as_of.
+        def after(moment: datetime, low: float, high: float) -> datetime:
+            return min(as_of, moment + timedelta(hours=rng.uniform(low, high)))
+
+        sent = viewed = accepted = rejected = completed = archived = expires = start = end = None
+        if status in QUOTED:
+            sent = after(created, 1, 72)
+            expires = sent + timedelta(days=30)
+        if status in VIEWED:
+            viewed = after(sent, 0.5, 48)
+        if status in ACCEPTED:
+            accepted = after(viewed, 1, 120)
+        if status == "quote_rejected":
+            rejected = after(viewed, 24, 240)
+        if status in SCHEDULED:
+            day = (accepted + timedelta(days=rng.uniform(1, 21))).date()
+            if status == "job_scheduled":
+                day = max(day, as_of.date())
+            else:
+                day = min(day, as_of.date())
+            start = datetime.combine(day, clock(rng.randint(8, 15)), tzinfo=timezone.utc)
+            end = start + timedelta(hours=rng.choice([1, 2, 2, 3, 4, 6, 8]))
+            if status != "job_scheduled":
+                end = min(end, as_of)
+        if status == "job_completed":
+            completed = end
+        if status == "archived":
+            archived = created + timedelta(days=rng.uniform(OPEN_DAYS, 120)) if age > 120 else as_of
+        updated = max(t for t in (created, sent, viewed, accepted, rejected, completed, archived) if t)
+
+        quote_number = job_number = None
+        if sent:
+            quotes += 1
+            quote_number = f"Q-{quotes:05d}"
+        if status.startswith("job_"):
+            jobs += 1
+            job_number = f"J-{jobs:05d}"
+        label = lines[0][0]["name"] if lines else "New enquiry"
+        yield "work_items", [item_id, company_id, customer_id, rng.choice(addresses), status, kind_for(status),
+                             SOURCE.pick(rng), URGENCY.pick(rng), quote_number, job_number, label[:120],
+                             f"{label} for {trade['name'].lower()}", subtotal, tax_rate, tax, money(subtotal + tax),
+                             start, end, sent, viewed, accepted, rejected, completed, archived, expires, meta,
+                             created, updated]
+        for order, (item, price, quantity) in enumerate(lines):
+            yield "quote_items", [uid(), item_id, item["name"], item["description"], quantity, price, item["unit"],
+                                  order, created]
+
+        # Nearly every completed job is invoiced; most are paid by now.
+        if status != "job_completed" or rng.random() >= 0.95 or subtotal <= 0:
+            continue
+        invoices += 1
+        invoice_id = uid()
+        total = money(subtotal + tax)
+        due = (completed + timedelta(days=30)).date()
+        if due < as_of.date():
+            outcome = rng.choices(["paid", "overdue", "partial"], weights=[80, 12, 8])[0]
+        else:
+            outcome = rng.choices(["sent", "paid", "partial"], weights=[60, 35, 5])[0]
+        paid = total if outcome == "paid" else money(total * rng.uniform(0.3, 0.7)) if outcome == "partial" else 0
+        paid_at = min(as_of, completed + timedelta(days=rng.uniform(0, 40))) if paid else None
+        method = METHOD.pick(rng) if paid else None
+        yield "invoices", [invoice_id, company_id, item_id, customer_id, f"INV-{invoices:05d}", subtotal, tax, total,
+                           paid, outcome, due, completed, paid_at if outcome == "paid" else None, method, meta,
+                           completed, paid_at or completed]
+        # A paid invoice is sometimes settled in two payments. reference_number
+        # is unique across all payments (payments_reference_number_key), so
+        # each takes its own id.
+        if paid:
+            first = money(paid * rng.uniform(0.3, 0.6)) if outcome == "paid" and rng.random() < 0.15 else paid
+            for amount in (first, money(paid - first)):
+                if amount > 0:
+                    payment_id = uid()
+                    yield "payments", [payment_id, invoice_id, amount, method, f"SYN-{payment_id}", paid_at, meta,
+                                       paid_at]
+
+def csv_value(value):
+    if value is None:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return value
+
+class Sink(abc.ABC):
+    """Per-table CSV buffers, flushed parents first once they pass FLUSH_BYTES."""
+
+    def __init__(self):
+        self.buffers = {table: io.StringIO() for table in TABLES}
+        self.writers = {table: csv.writer(buf, lineterminator="\n") for table, buf in self.buffers.items()}
+        self.rows = {table: 0 for table in TABLES}
+        self.pending = 0
+
+    def add(self, table: str, values: List):
+        self.writers[table].writerow([csv_value(v) for v in values])
+        self.rows[table] += 1
+        self.pending += 1
+        # tell() is cheap, but not free at millions of rows.
+        if self.pending % 1000 == 0 and sum(buf.tell() for buf in self.buffers.values()) > FLUSH_BYTES:
+            self.flush()
+
+    def flush(self):
+        for table, buf in self.buffers.items():
+            if buf.tell():
+                self.write(table, buf.getvalue())
+                buf.seek(0)
+                buf.truncate()
+        self.done()
+
+    @abc.abstractmethod
+    def write(self, table: str, data: str):
+        """Take one table's buffered CSV rows."""
+
+    def done(self):
+        pass
+
+class FileSink(Sink):
+    """CSV parts under out/<table>/, one part per chunk of companies."""
+
+    def __init__(self, out: str, part: int):
+        super().__init__()
+        self.out = out
+        self.part = part
+
+    def write(self, table: str, data: str):
+        with open(os.path.join(self.out, table, f"part-{self.part:05d}.csv"), "a") as f:
+            f.write(data)
+
+class CopySink(Sink):
+    """COPY straight into the database, committing after each flush."""
+
+    def __init__(self, conn):
+        super().__init__()
+        self.conn = conn
+
+    def write(self, table: str, data: str):
+        with self.conn.cursor() as cur:
+            with cur.copy(f"copy {table} ({', '.join(TABLES[table])}) from stdin with (format csv)") as copy:
+                copy.write(data)
+
+    def done(self):
+        self.conn.commit()
+
+# Per-process state, set once by _init rather than pickled with every task.
+_worker: Dict = {}
+
+def _init(args: argparse.Namespace, trades: List[Dict], as_of: datetime):
+    _worker.update(args=args, trades=trades, as_of=as_of, conn=None)
+    if not args.out:
+        conn = pg_connect(args.dsn)
+        with conn.cursor() as cur:
+            # Rows arrive parents-first and consistent, so foreign key checks
+            # and triggers only cost time — and notify_indexer would queue an
+            # embedding job for every one of millions of rows.
+            cur.execute("set session_replication_role = replica")
+        conn.commit()
+        _worker["conn"] = conn
+
+def generate_chunk(chunk: int) -> Dict[str, int]:
+    """Generate companies [chunk * CHUNK, (chunk + 1) * CHUNK) and write them out."""
+    args = _worker["args"]
+    sink = FileSink(args.out, chunk) if args.out else CopySink(_worker["conn"])
+    for index in range(chunk * CHUNK, min((chunk + 1) * CHUNK, args.companies)):
+        for table, values in company_rows(index, args.seed, _worker["as_of"], args.work_items, _worker["trades"]):
+            sink.add(table, values)
+    sink.flush()
+    return sink.rows
+
+def check_replica_role(dsn: str):
+    """Fail before starting the workers if triggers cannot be switched off."""
+    with pg_connect(dsn) as conn:
+        try:
+            conn.execute("set session_replication_role = replica")
+        except Exception as e:
+            print(f"❌ Cannot disable triggers for the load ({e.__class__.__name__}: {str(e).strip()})")
+            print("   Connect as a superuser, or use --out and load the CSVs as one")
+            sys.exit(1)
+
+def write_load_script(out: str):
+    """load.sql: every CSV part, COPYed in table order, in one transaction."""
+    lines = ["-- Generated by scripts/generate-tenants.py. Run from this directory:",
+             "--   psql \"$SUPABASE_DB_URL\" -f load.sql",
+             "\\set ON_ERROR_STOP on",
+             "begin;",
+             "set local session_replication_role = replica;"]
+    for table, columns in TABLES.items():
+        for part in sorted(os.listdir(os.path.join(out, table))):
+            lines.append(f"\\copy {table} ({', '.join(columns)}) from '{table}/{part}' with (format csv)")
+    lines.append("commit;")
+    lines.append(f"analyze {', '.join(TABLES)};")
+    with open(os.path.join(out, "load.sql"), "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+def undo(dsn: Optional[str]):
+    """Delete every generated company; cascades take the rest of each tenant."""
+    with pg_connect(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute("select id from companies where settings->>'synthetic' = %s", (TAG,))
+            ids = [row[0] for row in cur.fetchall()]
+        print(f"🗑️  Deleting {len(ids)} generated companies...")
+        started = time.monotonic()
+        for n, company_id in enumerate(ids, start=1):
+            with conn.cursor() as cur:
+                cur.execute("delete from companies where id = %s", (company_id,))
+            conn.commit()
+            if n % 50 == 0:
+                print(f"  ℹ️  {n}/{len(ids)} deleted ({time.monotonic() - started:.0f}s)")
+    print(f"✅ Done in {time.monotonic() - started:.1f}s")
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic multi-tenant dataset")
+    parser.add_argument("--companies", type=int, default=COMPANIES, help=f"companies (default {COMPANIES})")
+    parser.add_argument("--work-items", type=int, default=WORK_ITEMS,
+                        help=f"mean work items per company (default {WORK_ITEMS})")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (default 1)")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=date.today(),
+                        help="the dataset's 'today', YYYY-MM-DD (default today); fix it to reproduce a dataset")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="generator processes")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="write CSV parts and load.sql to this directory")
+    target.add_argument("--dsn", nargs="?", const=os.getenv("SUPABASE_DB_URL"),
+                        help="COPY straight into this database (default $SUPABASE_DB_URL)")
+    parser.add_argument("--undo", action="store_true", help="delete every generated company instead (needs --dsn)")
+    parser.add_argument("--catalogs", default=CATALOG_DIR, help="starter catalog directory")
+    args = parser.parse_args()
+    if args.undo and args.out:
+        parser.error("--undo needs --dsn")
+    if not args.out and not args.dsn:
+        parser.error("no database URL - pass --dsn URL or set SUPABASE_DB_URL")
+    if args.companies < 1 or args.work_items < 1 or args.workers < 1:
+        parser.error("--companies, --work-items and --workers must be at least 1")
+    return args
+
+def main():
+    """Generate the dataset"""
+    args = parse_args()
+
+    print("🏭 QuotePro Synthetic Tenant Generator")
+    print("="*60)
+
+    if args.undo:
+        undo(args.dsn)
+        return
+
+    trades = load_trades(args.catalogs)
+    as_of = datetime.combine(args.as_of, clock(18), tzinfo=timezone.utc)
+    print(f"ℹ️  {args.companies} companies × ~{args.work_items} work items, seed {args.seed}, as of {args.as_of}")
+    print(f"ℹ️  Roughly {args.companies * args.work_items * 5.5 / 1e6:.1f}M rows "
+          f"across {len(TABLES)} tables, {args.workers} workers")
+    if not args.out:
+        check_replica_role(args.dsn)
+    else:
+        for table in TABLES:
+            os.makedirs(os.path.join(args.out, table), exist_ok=True)
+            for stale in os.listdir(os.path.join(args.out, table)):
+                os.remove(os.path.join(args.out, table, stale))
+
+    totals = {table: 0 for table in TABLES}
+    chunks = math.ceil(args.companies / CHUNK)
+    started = time.monotonic()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init, initargs=(args, trades, as_of)) as pool:
+        futures = [pool.submit(generate_chunk, chunk) for chunk in range(chunks)]
+        for done, future in enumerate(as_completed(futures), start=1):
+            for table, count in future.result().items():
+                totals[table] += count
+            rows = sum(totals.values())
+            elapsed = time.monotonic() - started
+            print(f"  📊 {min(done * CHUNK, args.companies)}/{args.companies} companies, {rows:,} rows "
+                  f"({rows / elapsed if elapsed else 0:,.0f} rows/s)")
+
+    if args.out:
+        write_load_script(args.out)
+    else:
+        with pg_connect(args.dsn) as conn:
+            conn.execute(f"analyze {', '.join(TABLES)}")
+
+    elapsed = time.monotonic() - started
+    print("\n" + "="*60)
+    for table, count in totals.items():
+        print(f"   {table:<20} {count:>12,}")
+    print(f"📊 {sum(totals.values()):,} rows in {elapsed:.1f}s")
+    if args.out:
+        print(f"   Load with: cd {args.out} && psql \"$SUPABASE_DB_URL\" -f load.sql")
+    print("="*60)
+
+if __name__ == "__main__":
+    main()
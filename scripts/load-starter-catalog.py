@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Starter Catalog Loader
+Bulk-loads starter catalog CSVs into one company's catalog_items
+
+Rows are parsed and validated as a stream and written in large batches — one
+round trip per few thousand rows rather than one per item. With a database
+URL the rows are COPYed into a staging table and merged in one statement;
+without one they go through PostgREST in batched inserts and upserts.
+
+    python scripts/load-starter-catalog.py --company <uuid> residential-hvac-service-and-repair
+    python scripts/load-starter-catalog.py --company <uuid> --all --labor-rate 120 --markup 0.5
+    python scripts/load-starter-catalog.py --company <uuid> --file product.csv --source import
+    python scripts/load-starter-catalog.py --company <uuid> --all --dsn "$SUPABASE_DB_URL"
+    python scripts/load-starter-catalog.py --all --dry-run   # validate only
+
+An item is the same item when its name matches an active one in the company,
+case-insensitively — the catalog_items_company_name_active_idx key. Existing
+items are left alone unless --update is given; a contractor may have edited
+them, and a loader has no business undoing that.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ops import batches, get_client, iter_rows, pg_connect
+from ops.rows import PAGE_SIZE
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "starter-catalogs")
+
+# Rows per write. PostgREST takes a few thousand comfortably in one body; the
+# COPY path streams regardless and only uses this for progress.
+BATCH_SIZE = 2000
+
+# Header aliases, as in src/lib/csv.ts. The starter files use the canonical
+# names; product.csv says "item" and "price".
+ALIASES = {
+    "name": ["name", "item", "item name", "service", "product", "title", "task"],
+    "base_price": ["price", "base price", "base_price", "rate", "cost", "amount", "unit price", "charge"],
+    "category": ["category", "type", "group", "section", "trade"],
+    "description": ["description", "details", "notes", "desc", "summary"],
+    "unit": ["unit", "uom", "per", "units", "measure"],
+}
+
+COLUMNS = ["company_id", "name", "description", "category", "base_price", "unit",
+           "labor_hours", "material_cost", "trade", "source"]
+
+# src/lib/catalog/starter.ts: the standard call-out takes the contractor's fee
+# verbatim; premium variants are priced like everything else.
+PREMIUM_VARIANT = re.compile(r"\b(emergency|after[- ]?hours?|weekend|holiday|overtime|24[/-]?7|night)\b", re.I)
+STANDARD_CALL_OUT = re.compile(r"\b(diagnostic|service call|call[- ]?out|trip charge)\b", re.I)
+
+class RowError(ValueError):
+    """A CSV row that cannot become a catalog item."""
+
+def slugify_trade(name: str) -> str:
+    """slugifyTrade from src/lib/catalog/starter.ts."""
+    slug = re.sub(r"[^a-z0-9]+", "-", name.lower().replace("&", " and "))
+    return slug.strip("-")
+
+def round_money(value: float) -> float:
+    """roundMoney from src/lib/money.ts: half-up to the cent."""
+    if not math.isfinite(value):
+        return 0.0
+    return math.floor((value + sys.float_info.epsilon) * 100 + 0.5) / 100
+
+def parse_price(raw: str) -> Optional[float]:
+    """parsePrice from src/lib/csv.ts: `$1,299.00`, `1.299,00`, `(50)`."""
+    trimmed = (raw or "").strip()
+    if not trimmed:
+        return None
+    negative = trimmed.startswith("(") and trimmed.endswith(")")
+    cleaned = re.sub(r"[^0-9.,-]", "", trimmed.strip("()"))
+    if cleaned.rfind(",") > cleaned.rfind("."):
+        cleaned = cleaned.replace(".", "").replace(",", ".", 1)
+    else:
+        cleaned = cleaned.replace(",", "")
+    if not re.search(r"[0-9]", cleaned):
+        return None
+    try:
+        value = float(cleaned)
+    except ValueError:
+        return None
+    return -value if negative else value
+
+def price_item(name: str, labor_hours: float, material_cost: float, rates: Dict) -> float:
+    """priceItem from src/lib/catalog/starter.ts."""
+    if rates["service_call_fee"] > 0 and not PREMIUM_VARIANT.search(name) and STANDARD_CALL_OUT.search(name):
+        return round_money(rates["service_call_fee"])
+    price = labor_hours * rates["labor_rate"] + material_cost * (1 + rates["markup"])
+    # Never zero: a $0 line item quotes work as free.
+    return round_money(max(price, 1))
+
+def map_headers(header: List[str]) -> Dict[str, int]:
+    found = {}
+    for index, raw in enumerate(header):
+        key = re.sub(r"\s+", " ", re.sub(r"[_-]+", " ", raw.strip().lower()))
+        for field, aliases in ALIASES.items():
+            if field not in found and key in aliases:
+                found[field] = index
+    # Our pricing model, located by exact name as starter.ts does.
+    exact = [h.strip().lower() for h in header]
+    for field in ("labor_hours", "material_cost"):
+        if field in exact:
+            found[field] = exact.index(field)
+    return found
+
+def _number(row: List[str], at: Optional[int], field: str) -> float:
+    raw = row[at].strip() if at is not None and at < len(row) else ""
+    if not raw:
+        return 0.0
+    try:
+        value = float(raw)
+    except ValueError:
+        raise RowError(f"{field} is not a number: {raw!r}")
+    if value < 0 or not math.isfinite(value):
+        raise RowError(f"{field} must be a non-negative number: {raw!r}")
+    return value
+
+def read_catalog(path: str, company_id: Optional[str], trade: Optional[str], source: str,
+                 rates: Optional[Dict]) -> Iterator[Tuple[Optional[Dict], Optional[str]]]:
+    """Yield (catalog_items row, None) or (None, error) for each row of a CSV.
+
+    Streams: one row in memory at a time. Rows before the first one that maps
+    a name column are skipped, which is how product.csv's leading blank line
+    goes. A bad row is reported, with its file and line, and the read goes on.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        cols = None
+        for row in reader:
+            if cols is None:
+                mapped = map_headers(row)
+                if "name" in mapped:
+                    cols = mapped
+                continue
+            if not any(cell.strip() for cell in row):
+                continue
+
+            def cell(field: str) -> str:
+                at = cols.get(field)
+                return row[at].strip() if at is not None and at < len(row) else ""
+
+            try:
+                name = cell("name")
+                if not name:
+                    raise RowError("missing name")
+                if len(name) > 200:
+                    raise RowError(f"name longer than 200 characters: {name[:40]!r}...")
+                labor_hours = _number(row, cols.get("labor_hours"), "labor_hours")
+                material_cost = _number(row, cols.get("material_cost"), "material_cost")
+                listed = parse_price(cell("base_price"))
+                if listed is not None and listed < 0:
+                    raise RowError(f"negative price: {cell('base_price')!r}")
+
+                # As loadStarterCatalog: the pricing model when there is one
+                # and rates to apply it with, else the file's own price.
+                if rates and (labor_hours > 0 or material_cost > 0):
+                    base_price = price_item(name, labor_hours, material_cost, rates)
+                elif listed is not None:
+                    base_price = round_money(max(listed, 1))
+                else:
+                    raise RowError("no price and no pricing model to compute one")
+            except RowError as e:
+                yield None, f"{os.path.basename(path)}:{reader.line_num}: {e}"
+                continue
+
+            yield {
+                "company_id": company_id,
+                "name": name,
+                "description": cell("description") or None,
+                "category": cell("category") or None,
+                "base_price": base_price,
+                "unit": cell("unit") or "each",
+                "labor_hours": labor_hours or None,
+                "material_cost": material_cost or None,
+                "trade": trade,
+                "source": source,
+            }, None
+
+def read_all(files: List[Tuple[str, Optional[str]]], company_id: Optional[str], source: str,
+             rates: Optional[Dict], stats: Dict) -> Iterator[Dict]:
+    """Every valid row across the files, first occurrence of each name only.
+
+    The unique key is per company, not per file, so two trades that both sell
+    a "Standard Diagnostic Fee" load it once — and a batch can never carry
+    the same key twice, which an upsert would reject outright.
+    """
+    seen = set()
+    for path, trade in files:
+        for item, error in read_catalog(path, company_id, trade, source, rates):
+            if error:
+                stats["invalid"] += 1
+                if stats["invalid"] <= 10:
+                    print(f"  ⚠️  {error}")
+                continue
+            key = item["name"].lower()
+            if key in seen:
+                stats["duplicates"] += 1
+                continue
+            seen.add(key)
+            stats["read"] += 1
+            yield item
+
+def load_rest(rows: Iterator[Dict], company_id: str, batch_size: int, update: bool, stats: Dict):
+    """Write through PostgREST: one insert, and with --update one upsert, per batch.
+
+    PostgREST's on_conflict names columns, and the unique key is an expression
+    over lower(name) on active rows only, so it cannot be targeted directly.
+    The company's active names are read once instead (a few pages), and each
+    row that matches one is upserted on its id.
+    """
+    supabase = get_client()
+    existing = {r["name"].lower(): r["id"]
+                for r in iter_rows(supabase, "catalog_items", "id,name",
+                                   filters={"company_id": company_id, "is_active": True})}
+    # iter_rows reads full pages until an empty one.
+    stats["round_trips"] += math.ceil(len(existing) / PAGE_SIZE) + 1
+
+    for batch in batches(rows, batch_size):
+        fresh = [r for r in batch if r["name"].lower() not in existing]
+        known = [{**r, "id": existing[r["name"].lower()]} for r in batch if r["name"].lower() in existing]
+        if fresh:
+            supabase.table("catalog_items").insert(fresh, returning="minimal").execute()
+            stats["round_trips"] += 1
+            stats["inserted"] += len(fresh)
+        if known and update:
+            supabase.table("catalog_items").upsert(known, on_conflict="id", returning="minimal").execute()
+            stats["round_trips"] += 1
+            stats["updated"] += len(known)
+        else:
+            stats["unchanged"] += len(known)
+        print(f"  ℹ️  {stats['inserted'] + stats['updated'] + stats['unchanged']} rows written")
+
+def load_copy(rows: Iterator[Dict], dsn: str, update: bool, stats: Dict):
+    """COPY every row into a staging table, then merge in one statement.
+
+    The merge targets the real unique index, so concurrent writers cannot
+    slip a duplicate in between a lookup and a write. All of it is one
+    transaction: the catalog gets every row or none.
+    """
+    columns = ", ".join(COLUMNS)
+    assignments = ", ".join(f"{c} = excluded.{c}" for c in COLUMNS if c not in ("company_id", "name"))
+    conflict = f"do update set {assignments}" if update else "do nothing"
+
+    with pg_connect(dsn) as conn:
+        with conn.cursor() as cur:
+            cur.execute("create temp table catalog_staging (like catalog_items including defaults) on commit drop")
+            with cur.copy(f"copy catalog_staging ({columns}) from stdin") as copy:
+                for n, row in enumerate(rows, start=1):
+                    copy.write_row([row[c] for c in COLUMNS])
+                    if n % BATCH_SIZE == 0:
+                        print(f"  ℹ️  {n} rows copied")
+            stats["round_trips"] += 2
+            # xmax is zero on a freshly inserted row and set on an updated one.
+            cur.execute(
+                f"""insert into catalog_items ({columns})
+                    select {columns} from catalog_staging
+                    on conflict (company_id, lower(name)) where is_active {conflict}
+                    returning (xmax = 0)"""
+            )
+            stats["round_trips"] += 1
+            outcome = [inserted for (inserted,) in cur.fetchall()]
+            stats["inserted"] = sum(outcome)
+            stats["updated"] = len(outcome) - stats["inserted"]
+            stats["unchanged"] = stats["read"] - len(outcome)
+
+def resolve_files(args: argparse.Namespace) -> List[Tuple[str, Optional[str]]]:
+    """(path, trade slug) for every file to load, trades in _trades.json order."""
+    files = []
+    if args.all:
+        with open(os.path.join(args.catalogs, "_trades.json")) as f:
+            slugs = [slugify_trade(t["name"]) for t in json.load(f) if t.get("name")]
+        args.trades = slugs + [t for t in args.trades if t not in slugs]
+    for slug in args.trades:
+        path = os.path.join(args.catalogs, f"{slug}.csv")
+        if not os.path.exists(path):
+            print(f"❌ Unknown trade: {slug} (no {path})")
+            sys.exit(1)
+        files.append((path, slug))
+    # Files outside the starter set are the contractor's own: no trade, so
+    # they are eligible on every quote (see migration 20260812000000).
+    files.extend((path, None) for path in args.file)
+    return files
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bulk-load starter catalogs into catalog_items")
+    parser.add_argument("trades", nargs="*", help="trade slugs, e.g. residential-hvac-service-and-repair")
+    parser.add_argument("--all", action="store_true", help="every trade in _trades.json")
+    parser.add_argument("--file", action="append", default=[], metavar="CSV",
+                        help="another CSV to load, such as product.csv (repeatable)")
+    parser.add_argument("--company", help="company id to load into (required unless --dry-run)")
+    parser.add_argument("--source", default="starter", help="catalog_items.source for the rows (default starter)")
+    parser.add_argument("--labor-rate", type=float,
+                        help="price items from labor_hours and material_cost at this hourly rate")
+    parser.add_argument("--markup", type=float, default=0.0, help="materials markup as a fraction (default 0)")
+    parser.add_argument("--service-call-fee", type=float, default=0.0,
+                        help="used verbatim for standard diagnostic/call-out items")
+    parser.add_argument("--update", action="store_true",
+                        help="overwrite existing items of the same name instead of leaving them")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"rows per PostgREST write (default {BATCH_SIZE})")
+    parser.add_argument("--dsn", default=os.getenv("SUPABASE_DB_URL"),
+                        help="Postgres URL for the COPY path (default $SUPABASE_DB_URL)")
+    parser.add_argument("--rest", action="store_true", help="use PostgREST even when a DSN is set")
+    parser.add_argument("--dry-run", action="store_true", help="parse and validate only; write nothing")
+    parser.add_argument("--catalogs", default=CATALOG_DIR, help="starter catalog directory")
+    args = parser.parse_args()
+    if not (args.trades or args.all or args.file):
+        parser.error("name at least one trade, --all, or --file")
+    if not args.company and not args.dry_run:
+        parser.error("--company is required unless --dry-run")
+    return args
+
+def main():
+    """Load the catalogs"""
+    args = parse_args()
+
+    print("📦 QuotePro Starter Catalog Loader")
+    print("="*60)
+
+    files = resolve_files(args)
+    rates = None
+    if args.labor_rate is not None:
+        rates = {"labor_rate": args.labor_rate, "markup": args.markup, "service_call_fee": args.service_call_fee}
+
+    stats = {"read": 0, "invalid": 0, "duplicates": 0, "inserted": 0, "updated": 0, "unchanged": 0,
+             "round_trips": 0}
+    rows = read_all(files, args.company, args.source, rates, stats)
+    started = time.monotonic()
+
+    if args.dry_run:
+        for _ in rows:
+            pass
+        print(f"  ✅ {stats['read']} rows valid across {len(files)} file(s)")
+    elif args.dsn and not args.rest:
+        print(f"  ℹ️  COPY into a staging table, then one merge")
+        load_copy(rows, args.dsn, args.update, stats)
+    else:
+        load_rest(rows, args.company, args.batch_size, args.update, stats)
+
+    elapsed = time.monotonic() - started
+    print("\n" + "="*60)
+    print(f"📊 {stats['read']} rows read, {stats['duplicates']} duplicate names skipped, "
+          f"{stats['invalid']} invalid")
+    if not args.dry_run:
+        print(f"   {stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} left as they were")
+        print(f"   {stats['round_trips']} round trips, {elapsed:.1f}s "
+              f"({stats['read'] / elapsed if elapsed else 0:.0f} rows/s)")
+    print("="*60)
+
+    sys.exit(1 if stats["invalid"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Shared plumbing for the operational scripts
+
+One Supabase client per process, on a pooled keep-alive (HTTP/2 when `h2` is
+installed) connection that retries transient failures and times every
+request; a psycopg pool for scripts given a DSN; the keyset-paging and
+batching helpers the scripts all need; mergeable quantile sketches for
+percentiles over more rows than a script should hold; and zstd/gzip file
+streams for what they write to disk.
+
+The scripts put their own directory on sys.path when run, so from any of them:
+
+    from ops import get_client, iter_rows, timings
+
+and `ops.timing` adds the shared --profile/--metrics-log/--prom flags.
+"""
+
+from ops.client import get_client
+from ops.codec import open_reader, open_writer, pick_codec
+from ops.pg import pg_connect, pg_pool
+from ops.rows import anti_join, batches, count_rows, fetch_in, iter_rows, rpc_or_none
+from ops.schema import expected_schema
+from ops.sketch import QuantileSketch
+from ops.timing import timed, timings
+
+__all__ = [
+    "QuantileSketch",
+    "anti_join",
+    "batches",
+    "count_rows",
+    "expected_schema",
+    "fetch_in",
+    "get_client",
+    "iter_rows",
+    "open_reader",
+    "open_writer",
+    "pg_connect",
+    "pg_pool",
+    "pick_codec",
+    "rpc_or_none",
+    "timed",
+    "timings",
+]
@@ -0,0 +1,155 @@
+"""The shared Supabase client: one per process, pooled, retrying, timed."""
+
+import importlib.util
+import os
+import random
+import sys
+import threading
+import time
+from typing import Optional
+
+from ops.timing import timings
+
+# Connections kept to PostgREST. The scripts' thread pools (validate-data's
+# --workers, db-health-check's query pool) share them, so this is also the
+# ceiling on requests in flight.
+MAX_CONNECTIONS = 16
+# Seconds an idle connection is kept for reuse.
+KEEPALIVE = 30.0
+# Attempts after the first, and the backoff before each: exponential from
+# BACKOFF, capped at BACKOFF_CAP, with full jitter so a fleet of clients that
+# failed together does not retry together.
+RETRIES = 4
+BACKOFF = 0.25
+BACKOFF_CAP = 8.0
+
+# Responses worth another try: the gateway or PostgREST could not reach the
+# database, or gave up waiting for a connection.
+TRANSIENT = {502, 503, 504, 520, 522, 524}
+# Safe to repeat whatever happened the first time.
+IDEMPOTENT = {"GET", "HEAD", "OPTIONS"}
+
+_client = None
+_lock = threading.Lock()
+
+def _transport_class():
+    import httpx
+
+    class RetryTransport(httpx.HTTPTransport):
+        """Retries transient failures and records every request in `timings`.
+
+        Reads retry on any transient status or broken connection. Writes and
+        RPCs (all POSTs) retry only when the request cannot have run: the
+        connection was never made, or PostgREST answered 503 because it
+        had no database connection to run it on.
+        """
+
+        def __init__(self, retries: int, **kwargs):
+            super().__init__(**kwargs)
+            self.retries = retries
+
+        def handle_request(self, request):
+            target = request.url.path.split("/rest/v1/", 1)[-1]
+            query = request.url.query.decode() or None
+            safe = request.method in IDEMPOTENT
+            attempt = 0
+            # One clock for every attempt: a query's cost includes its retries.
+            started = time.perf_counter()
+            while True:
+                try:
+                    response = super().handle_request(request)
+                    # Read here so the timing covers the body, and so a retried
+                    # response is released before the next attempt.
+                    response.read()
+                except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                    if attempt < self.retries:
+                        attempt = self._backoff(attempt)
+                        continue
+                    timings.record(request.method, target, time.perf_counter() - started, attempt,
+                                   error=True, query=query)
+                    raise
+                except httpx.TransportError:
+                    if safe and attempt < self.retries:
+                        attempt = self._backoff(attempt)
+                        continue
+                    timings.record(request.method, target, time.perf_counter() - started, attempt,
+                                   error=True, query=query)
+                    raise
+                status = response.status_code
+                if status in TRANSIENT and attempt < self.retries and (safe or status == 503):
+                    response.close()
+                    attempt = self._backoff(attempt, response.headers.get("retry-after"))
+                    continue
+                timings.record(request.method, target, time.perf_counter() - started, attempt,
+                               error=status >= 400, rows=_rows(response), nbytes=len(response.content),
+                               status=status, query=query)
+                return response
+
+        @staticmethod
+        def _backoff(attempt: int, retry_after: Optional[str] = None) -> int:
+            delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF * 2 ** attempt))
+            if retry_after and retry_after.isdigit():
+                delay = min(BACKOFF_CAP, float(retry_after))
+            time.sleep(delay)
+            return attempt + 1
+
+    return RetryTransport
+
+def _rows(response) -> Optional[int]:
+    """Rows in a PostgREST response, from its Content-Range (`0-999/*`, `*/0`)."""
+    span = response.headers.get("content-range", "").split("/", 1)[0]
+    if span == "*":
+        return 0
+    first, _, last = span.partition("-")
+    if first.isdigit() and last.isdigit():
+        return int(last) - int(first) + 1
+    return None
+
+def get_client(timeout: Optional[float] = None, connections: int = MAX_CONNECTIONS, retries: int = RETRIES):
+    """The process's Supabase client, created on first use.
+
+    supabase-py gives each client its own httpx session; this replaces the
+    PostgREST one with a pooled session whose transport keeps connections
+    alive (multiplexed over HTTP/2 when `h2` is installed), retries transient
+    failures and times each request. Every later call returns the same
+    client, whatever its arguments — a script's threads share one pool.
+
+    `timeout` is per request; None keeps supabase-py's default.
+    """
+    global _client
+    with _lock:
+        if _client is not None:
+            return _client
+
+        from supabase import create_client
+        import httpx
+
+        url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+        key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+
+        if not url or not key:
+            print("❌ Missing Supabase credentials (NEXT_PUBLIC_SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)")
+            sys.exit(1)
+
+        client = create_client(url, key)
+        # With the service role key there is no sign-in, so supabase-py never
+        # rebuilds its PostgREST client and this session stays in place.
+        rest = client.postgrest
+        cold = rest.session
+        http2 = importlib.util.find_spec("h2") is not None
+        transport = _transport_class()(
+            retries,
+            http2=http2,
+            limits=httpx.Limits(max_connections=connections, max_keepalive_connections=connections,
+                                keepalive_expiry=KEEPALIVE),
+        )
+        rest.session = httpx.Client(
+            base_url=cold.base_url,
+            headers=cold.headers,
+            timeout=httpx.Timeout(timeout) if timeout is not None else cold.timeout,
+            transport=transport,
+            follow_redirects=True,
+        )
+        cold.close()
+        _client = client
+        return client
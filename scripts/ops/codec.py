@@ -0,0 +1,42 @@
+"""Compressed file streams: zstd when `zstandard` is installed, gzip otherwise.
+
+Files are named for their codec (`.zst`, `.gz`), and readers go by the
+name, so a directory written on a machine with zstandard reads back on any
+machine that has it too.
+"""
+
+import gzip
+import sys
+from typing import Optional
+
+def pick_codec(requested: Optional[str] = None) -> str:
+    """"zst" if zstandard is importable, else "gz"; --codec zst without it exits."""
+    try:
+        import zstandard  # noqa: F401
+        return requested or "zst"
+    except ImportError:
+        if requested == "zst":
+            print("❌ zstd needs zstandard: pip install zstandard")
+            sys.exit(1)
+        if requested is None:
+            print("⚠️  zstandard not installed - writing gzip (pip install zstandard for smaller, faster files)")
+        return "gz"
+
+def open_writer(path: str, codec: str, level: Optional[int] = None):
+    """A binary stream that compresses into `path`."""
+    if codec == "zst":
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=10 if level is None else level)
+        return compressor.stream_writer(open(path, "wb"), closefd=True)
+    return gzip.open(path, "wb", compresslevel=6 if level is None else level)
+
+def open_reader(path: str):
+    """A binary stream of `path` decompressed, by its extension."""
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            print(f"❌ Reading {path} needs zstandard: pip install zstandard")
+            sys.exit(1)
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return gzip.open(path, "rb")
@@ -0,0 +1,38 @@
+"""Direct Postgres access for scripts given a DSN ($SUPABASE_DB_URL)."""
+
+import os
+import sys
+from typing import Optional
+
+# Connections a pool keeps open; scripts that fan out wider than this wait
+# for one to come back rather than opening more.
+POOL_SIZE = 8
+
+def _dsn(dsn: Optional[str]) -> str:
+    dsn = dsn or os.getenv("SUPABASE_DB_URL")
+    if not dsn:
+        print("❌ No database URL - pass --dsn or set SUPABASE_DB_URL")
+        sys.exit(1)
+    return dsn
+
+def pg_connect(dsn: Optional[str] = None, **kwargs):
+    """One psycopg 3 connection, for scripts that run a single transaction."""
+    try:
+        import psycopg
+    except ImportError:
+        print("❌ This needs psycopg 3: pip install 'psycopg[binary]'")
+        sys.exit(1)
+    return psycopg.connect(_dsn(dsn), **kwargs)
+
+def pg_pool(dsn: Optional[str] = None, size: int = POOL_SIZE, **kwargs):
+    """A psycopg connection pool, opened; use `with pool.connection() as conn:`.
+
+    Connections are opened once and handed between threads, so a run that
+    issues thousands of statements pays for `size` handshakes, not thousands.
+    """
+    try:
+        from psycopg_pool import ConnectionPool
+    except ImportError:
+        print("❌ This needs psycopg_pool: pip install 'psycopg[binary,pool]'")
+        sys.exit(1)
+    return ConnectionPool(_dsn(dsn), min_size=1, max_size=size, kwargs=kwargs or None, open=True)
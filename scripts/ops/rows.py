@@ -0,0 +1,114 @@
+"""Reading and writing rows through PostgREST in as few requests as it takes."""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+# Rows per page. Also the most PostgREST hands back before the project's
+# max-rows cap truncates a response; iter_rows copes either way.
+PAGE_SIZE = 1000
+# Values per `in.(…)` filter. Each uuid is 37 characters of query string, and
+# gateways start refusing URLs somewhere past 8 KB.
+IN_CHUNK = 150
+
+def _filtered(query, filters: Optional[Dict]):
+    for column, value in (filters or {}).items():
+        op, value = value if isinstance(value, tuple) else ("eq", value)
+        query = getattr(query, op)(column, value)
+    return query
+
+def iter_rows(supabase, table: str, columns: str = "*", page_size: int = PAGE_SIZE,
+              filters: Optional[Dict] = None, order: str = "id", descending: bool = False) -> Iterator[Dict]:
+    """Yield every row of a table, one keyset page at a time.
+
+    Pages are ordered by id and resumed from the last id seen (`id > last`),
+    never by offset, so each page is an index range scan and rows inserted
+    mid-run cannot shift a page boundary. `columns` must include `id`;
+    `filters` are applied to every page, as equality unless the value is an
+    `(operator, value)` pair such as `("gte", watermark)`.
+
+    With `order` set to another column, pages are ordered by (order, id) and
+    resumed past that pair instead, which is what a merge join needs. Rows
+    where that column is null are skipped: they reference nothing.
+    `descending` walks either ordering newest-first, matching an index such
+    as `(company_id, created_at DESC)` when company_id is a filter.
+
+    Stops on an empty page rather than a short one: a page shorter than
+    `page_size` may just mean the server capped it, and stopping there is the
+    silent truncation this replaces.
+    """
+    last = None
+    while True:
+        query = _filtered(supabase.table(table).select(columns), filters)
+        if order != "id":
+            query = query.not_.is_(order, "null").order(order, desc=descending)
+        query = query.order("id", desc=descending).limit(page_size)
+        if last is not None:
+            past = "lt" if descending else "gt"
+            if order == "id":
+                query = getattr(query, past)("id", last["id"])
+            else:
+                # Quoted: a timestamp's colons are reserved in a logic tree.
+                key = f'"{last[order]}"'
+                query = query.or_(f"{order}.{past}.{key},and({order}.eq.{key},id.{past}.{last['id']})")
+        page = query.execute().data
+        if not page:
+            return
+        yield from page
+        last = page[-1]
+
+def anti_join(left: Iterable[Dict], left_key: str, right: Iterable[Dict], right_key: str) -> Iterator[Dict]:
+    """Yield the left rows whose key has no match on the right.
+
+    A merge: both inputs must be sorted ascending by their key, and neither is
+    ever held in memory — the right side is walked once, in step with the left.
+    """
+    right = iter(right)
+    current = next(right, None)
+    for row in left:
+        key = row[left_key]
+        while current is not None and current[right_key] < key:
+            current = next(right, None)
+        if current is None or current[right_key] != key:
+            yield row
+
+def count_rows(supabase, table: str, filters: Optional[Dict] = None) -> int:
+    """Exact row count; transfers no rows."""
+    query = _filtered(supabase.table(table).select("id", count="exact").limit(0), filters)
+    return query.execute().count
+
+def rpc_or_none(supabase, function: str, params: Optional[Dict] = None):
+    """Call an RPC; None when the function is not installed (PGRST202).
+
+    For the operator functions that ship as optional migrations, so a script
+    can fall back or say which migration to apply. Any other error is real
+    and propagates.
+    """
+    try:
+        return supabase.rpc(function, params or {}).execute().data
+    except Exception as e:
+        if getattr(e, "code", None) == "PGRST202":  # function not in schema cache
+            return None
+        raise
+
+def fetch_in(supabase, table: str, column: str, values: Iterable, columns: str = "*",
+             filters: Optional[Dict] = None, chunk: int = IN_CHUNK) -> Iterator[Dict]:
+    """Rows whose `column` is one of `values`, IN_CHUNK values per request.
+
+    For lookups that would otherwise be one `.eq()` round trip per value.
+    Rows come back in no particular order; a chunk's matches are capped by
+    the server's max-rows like any other response, so `column` should be
+    unique or nearly so.
+    """
+    for batch in batches(values, chunk):
+        query = _filtered(supabase.table(table).select(columns).in_(column, batch), filters)
+        yield from query.execute().data
+
+def batches(rows: Iterable, size: int) -> Iterator[List]:
+    """`rows` in lists of `size`, the last one shorter."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,132 @@
+"""The schema the migrations describe: which tables and indexes should exist.
+
+Each migration file is reduced to the effects that matter here — tables and
+indexes created, dropped and renamed — and the effects are replayed in file
+order. Parsing is cached per file by content hash, so a run re-reads only
+migrations added or edited since the last one.
+
+This is not a SQL parser. Comments, string literals and dollar-quoted
+function bodies are blanked out first (a `create table` inside a function is
+not schema), then each statement is matched by how it starts. Only the public
+schema counts; constraint-backed indexes (primary keys, UNIQUE constraints)
+are not tracked, being implied by their tables.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "supabase", "migrations")
+# Parse results between runs, keyed by migration file name and content hash.
+SCHEMA_CACHE = ".db-health-check-cache.json"
+# Bumped whenever parsing changes, so stale cache entries are not trusted.
+PARSER_VERSION = 1
+
+_NOISE = re.compile(r"--[^\n]*|/\*.*?\*/|\$(\w*)\$.*?\$\1\$|'(?:[^']|'')*'", re.DOTALL)
+_NAME = r'(?:(?:"?(\w+)"?)\.)?"?(\w+)"?'
+_CREATE_TABLE = re.compile(
+    rf"create\s+(?:unlogged\s+)?table\s+(?:if\s+not\s+exists\s+)?{_NAME}", re.I)
+_CREATE_INDEX = re.compile(
+    rf"create\s+(unique\s+)?index\s+(?:concurrently\s+)?(?:if\s+not\s+exists\s+)?\"?(\w+)\"?\s+"
+    rf"on\s+(?:only\s+)?{_NAME}(?:\s+using\s+(\w+))?", re.I)
+_DROP = re.compile(r"drop\s+(table|index)\s+(?:concurrently\s+)?(?:if\s+exists\s+)?(.+?)(?:\s+(?:cascade|restrict))?$",
+                   re.I | re.S)
+_RENAME = re.compile(
+    rf"alter\s+(table|index)\s+(?:if\s+exists\s+)?(?:only\s+)?{_NAME}\s+rename\s+to\s+\"?(\w+)\"?$", re.I)
+
+def _public(schema: Optional[str]) -> bool:
+    return schema is None or schema.lower() == "public"
+
+def parse_migration(sql: str) -> List[List]:
+    """The schema effects of one migration, in order."""
+    effects: List[List] = []
+    for statement in _NOISE.sub(" ", sql).split(";"):
+        statement = " ".join(statement.split())
+        if not statement:
+            continue
+        m = _CREATE_TABLE.match(statement)
+        if m:
+            if _public(m.group(1)):
+                effects.append(["table", m.group(2).lower()])
+            continue
+        m = _CREATE_INDEX.match(statement)
+        if m:
+            if _public(m.group(3)):
+                effects.append(["index", m.group(2).lower(), m.group(4).lower(), bool(m.group(1)),
+                                (m.group(5) or "btree").lower()])
+            continue
+        m = _DROP.match(statement)
+        if m:
+            for name in m.group(2).split(","):
+                schema, _, bare = name.strip().strip('"').rpartition(".")
+                if _public(schema or None):
+                    effects.append([f"drop_{m.group(1).lower()}", bare.strip('"').lower()])
+            continue
+        m = _RENAME.match(statement)
+        if m and _public(m.group(2)):
+            effects.append([f"rename_{m.group(1).lower()}", m.group(3).lower(), m.group(4).lower()])
+    return effects
+
+def _load_cache(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if cache.get("version") == PARSER_VERSION else {}
+
+def _save_cache(path: str, files: Dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"version": PARSER_VERSION, "files": files}, f, indent=1)
+    os.replace(tmp, path)
+
+def expected_schema(directory: str = MIGRATIONS, cache_path: Optional[str] = SCHEMA_CACHE) -> Dict:
+    """{"tables": {name}, "indexes": {name: {table, unique, method, migration}}, "parsed": n}
+
+    `parsed` is how many files actually had to be parsed this time.
+    """
+    cached = _load_cache(cache_path).get("files", {}) if cache_path else {}
+    files = {}
+    tables = set()
+    indexes: Dict[str, Dict] = {}
+    parsed = 0
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".sql"):
+            continue
+        with open(os.path.join(directory, name), "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        entry = cached.get(name)
+        if entry is None or entry["sha256"] != digest:
+            entry = {"sha256": digest, "effects": parse_migration(raw.decode("utf-8"))}
+            parsed += 1
+        files[name] = entry
+
+        for effect in entry["effects"]:
+            kind = effect[0]
+            if kind == "table":
+                tables.add(effect[1])
+            elif kind == "index":
+                _, index, table, unique, method = effect
+                indexes[index] = {"table": table, "unique": unique, "method": method, "migration": name}
+            elif kind == "drop_table":
+                tables.discard(effect[1])
+                for index in [i for i, spec in indexes.items() if spec["table"] == effect[1]]:
+                    del indexes[index]
+            elif kind == "drop_index":
+                indexes.pop(effect[1], None)
+            elif kind == "rename_table" and effect[1] in tables:
+                tables.discard(effect[1])
+                tables.add(effect[2])
+                for spec in indexes.values():
+                    if spec["table"] == effect[1]:
+                        spec["table"] = effect[2]
+            elif kind == "rename_index" and effect[1] in indexes:
+                indexes[effect[2]] = indexes.pop(effect[1])
+
+    if cache_path and (parsed or set(files) != set(cached)):
+        _save_cache(cache_path, files)
+    return {"tables": tables, "indexes": indexes, "parsed": parsed}
@@ -0,0 +1,66 @@
+"""Mergeable quantile sketches, for percentiles over more values than fit in memory.
+
+Values are counted in logarithmic buckets (the DDSketch scheme): every
+quantile comes back within ACCURACY of the true value, relative to it, and
+memory grows with the log of the value range, not with the number of values.
+Two sketches merge by adding bucket counts, so a per-tenant sketch computed
+on a worker thread folds into the global one exactly, with no loss of
+accuracy beyond what each already had.
+"""
+
+import math
+from typing import Dict, Optional
+
+# Relative error of any quantile: 1% of 2000 ms is 20 ms either way.
+ACCURACY = 0.01
+
+class QuantileSketch:
+    """Quantiles of non-negative values, within ACCURACY of the true value."""
+
+    def __init__(self, accuracy: float = ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        if value <= 0:
+            self.zeros += 1
+        else:
+            index = math.ceil(math.log(value) / self.log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "QuantileSketch"):
+        """Fold `other` into this sketch; both must share an accuracy."""
+        if other.accuracy != self.accuracy:
+            raise ValueError("cannot merge sketches of different accuracy")
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The q-quantile (0..1), or None for an empty sketch."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # The bucket's midpoint in relative terms; clamped so p0 and
+                # p100 report the real extremes.
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
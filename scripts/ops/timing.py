@@ -0,0 +1,221 @@
+"""Per-query instrumentation, shared by every request a script makes.
+
+Each query — every PostgREST request through get_client(), and any block a
+caller wraps in timed() — becomes one event: wall time, rows returned,
+approximate bytes, retries, status. Events are aggregated per label, bucketed
+into a latency histogram, kept in a short list of the slowest, and optionally
+streamed as JSON lines. At the end of a run the aggregates can be written as a
+Prometheus textfile for node_exporter to pick up, so nightly runs can be
+compared across releases and alerted on.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, IO, Iterator, List, Optional
+
+# Upper bounds, in seconds, of the latency histogram's buckets.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Individual queries remembered for --profile.
+SLOWEST = 100
+# Characters of query string kept per event; filters on long in.() lists
+# would otherwise dominate the log.
+QUERY_CHARS = 300
+
+class Timings:
+    """Latency, rows, bytes and retries per label — `GET catalog_items`,
+    `POST rpc/validation_orphans`, or whatever a caller passes to timed()."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.by_label: Dict[str, Dict] = {}
+        self.slowest: List = []  # min-heap of (seconds, seq, event)
+        self.seq = itertools.count()
+        self.sink: Optional[IO] = None
+        self.job = "ops"
+
+    def record(self, kind: str, target: str, seconds: float, retries: int = 0, error: bool = False,
+               rows: Optional[int] = None, nbytes: Optional[int] = None, status: Optional[int] = None,
+               query: Optional[str] = None):
+        label = f"{kind} {target}"
+        event = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            "job": self.job,
+            "kind": kind,
+            "target": target,
+            "ms": round(seconds * 1000, 2),
+            "rows": rows,
+            "bytes": nbytes,
+            "retries": retries,
+            "status": status,
+            "error": error,
+        }
+        if query:
+            event["query"] = query[:QUERY_CHARS]
+        with self.lock:
+            entry = self.by_label.get(label)
+            if entry is None:
+                entry = self.by_label[label] = {
+                    "kind": kind, "target": target, "calls": 0, "seconds": 0.0, "max": 0.0,
+                    "rows": 0, "bytes": 0, "retries": 0, "errors": 0, "buckets": [0] * len(BUCKETS)}
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+            entry["max"] = max(entry["max"], seconds)
+            entry["rows"] += rows or 0
+            entry["bytes"] += nbytes or 0
+            entry["retries"] += retries
+            entry["errors"] += error
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    entry["buckets"][i] += 1
+                    break
+            item = (seconds, next(self.seq), event)
+            if len(self.slowest) < SLOWEST:
+                heapq.heappush(self.slowest, item)
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, item)
+            if self.sink is not None:
+                self.sink.write(json.dumps(event) + "\n")
+
+    def log_to(self, path: str):
+        """Also append every event to `path` as a JSON line."""
+        self.sink = open(path, "a", buffering=1)
+
+    def close(self):
+        with self.lock:
+            if self.sink is not None:
+                self.sink.close()
+                self.sink = None
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self.lock:
+            return {label: dict(entry, buckets=list(entry["buckets"])) for label, entry in self.by_label.items()}
+
+    def report(self, top: Optional[int] = 15):
+        """Print the labels that took longest in total, slowest first."""
+        rows = sorted(self.snapshot().items(), key=lambda kv: -kv[1]["seconds"])
+        if not rows:
+            return
+        calls = sum(e["calls"] for _, e in rows)
+        total = sum(e["seconds"] for _, e in rows)
+        print(f"\n⏱️  {calls} queries, {total:.2f}s in flight")
+        for label, e in rows[:top]:
+            extra = ""
+            if e["retries"]:
+                extra += f", {e['retries']} retried"
+            if e["errors"]:
+                extra += f", {e['errors']} failed"
+            print(f"   {label:<44} {e['calls']:>6} × {e['seconds'] / e['calls'] * 1000:7.1f} ms "
+                  f"(max {e['max'] * 1000:.0f} ms, {e['rows']} rows, {e['bytes'] / 1024:.0f} KiB{extra})")
+        if len(rows) > top:
+            print(f"   … and {len(rows) - top} more")
+
+    def profile(self, n: int):
+        """Print the n slowest individual queries of the run."""
+        with self.lock:
+            slowest = sorted(self.slowest, reverse=True)[:n]
+        if not slowest:
+            return
+        print(f"\n🐢 Slowest {len(slowest)} queries:")
+        for seconds, _, e in slowest:
+            rows = "" if e["rows"] is None else f", {e['rows']} rows"
+            retried = f", {e['retries']} retried" if e["retries"] else ""
+            print(f"   {seconds * 1000:8.1f} ms  {e['kind']} {e['target']}{rows}{retried}")
+            if e.get("query"):
+                print(f"               ?{e['query']}")
+
+    def write_prometheus(self, path: str):
+        """Write the aggregates in Prometheus text format, atomically.
+
+        Meant for node_exporter's textfile collector, which may read the
+        directory at any moment — hence the temp file and rename.
+        """
+        def labels(e: Dict, **extra) -> str:
+            pairs = {"job": self.job, "kind": e["kind"], "target": e["target"], **extra}
+            return ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs.items())
+
+        entries = sorted(self.snapshot().values(), key=lambda e: (e["kind"], e["target"]))
+        lines = [
+            "# HELP ops_query_duration_seconds Wall time of one query, retries included.",
+            "# TYPE ops_query_duration_seconds histogram",
+        ]
+        for e in entries:
+            cumulative = 0
+            for bound, count in zip(BUCKETS, e["buckets"]):
+                cumulative += count
+                lines.append(f"ops_query_duration_seconds_bucket{{{labels(e, le=bound)}}} {cumulative}")
+            lines.append(f'ops_query_duration_seconds_bucket{{{labels(e, le="+Inf")}}} {e["calls"]}')
+            lines.append(f"ops_query_duration_seconds_sum{{{labels(e)}}} {e['seconds']:.6f}")
+            lines.append(f"ops_query_duration_seconds_count{{{labels(e)}}} {e['calls']}")
+        for name, key, help_text in (
+            ("ops_query_max_seconds", "max", "Slowest single query."),
+            ("ops_query_rows", "rows", "Rows returned, where the response says."),
+            ("ops_query_bytes", "bytes", "Response bytes received."),
+            ("ops_query_retries", "retries", "Attempts beyond the first."),
+            ("ops_query_errors", "errors", "Queries that failed after any retries."),
+        ):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for e in entries:
+                lines.append(f"{name}{{{labels(e)}}} {e[key]}")
+        lines.append("# HELP ops_run_finished_seconds When this run finished, as a Unix timestamp.")
+        lines.append("# TYPE ops_run_finished_seconds gauge")
+        lines.append(f'ops_run_finished_seconds{{job="{_escape(self.job)}"}} {time.time():.0f}')
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+timings = Timings()
+
+@contextmanager
+def timed(target: str, kind: str = "sql") -> Iterator[Dict]:
+    """Record the enclosed block as one query; for work that does not go through get_client().
+
+    Yields a dict the block may fill in with "rows" and "bytes":
+
+        with timed("merge catalog_items") as q:
+            cur.execute(...)
+            q["rows"] = cur.rowcount
+    """
+    started = time.perf_counter()
+    extra: Dict = {}
+    failed = False
+    try:
+        yield extra
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        timings.record(kind, target, time.perf_counter() - started, error=failed,
+                       rows=extra.get("rows"), nbytes=extra.get("bytes"))
+
+def add_arguments(parser):
+    """The instrumentation flags every script offers."""
+    parser.add_argument("--profile", type=int, metavar="N", help="print the N slowest queries")
+    parser.add_argument("--metrics-log", metavar="PATH", help="append every query as a JSON line")
+    parser.add_argument("--prom", metavar="PATH",
+                        help="write query metrics in Prometheus text format (for a textfile collector)")
+
+def start(args, job: str):
+    """Name the run and open the JSON-lines log, if asked for."""
+    timings.job = job
+    if args.metrics_log:
+        timings.log_to(args.metrics_log)
+
+def finish(args):
+    """Print the profile and write the metrics file, if asked for."""
+    if args.profile:
+        timings.profile(args.profile)
+    if args.prom:
+        timings.write_prometheus(args.prom)
+    timings.close()
@@ -1,17 +1,23 @@
 #!/usr/bin/env python3
 """
 Script to refactor settings page by replacing inline sections with extracted components.
-Runs in one pass to avoid partial state issues.
+The rules run through scripts/codemod.py: one tokenising pass over the file, and
+nothing is written unless every rule applied cleanly.
+
+    python scripts/refactor_settings.py --dry-run
+    python scripts/refactor_settings.py
 """
 
-import re
+from codemod import cli
 
-# Read the original file
-with open('src/app/(dashboard)/settings/page.tsx', 'r') as f:
-    content = f.read()
+SETTINGS_PAGE = "src/app/*/settings/page.tsx"
 
-# 1. Update imports - add component imports, remove unused UI imports
-old_imports = """import { Button } from '@/components/ui/button'
+RULES = [
+    # 1. Update imports - add component imports, remove unused UI imports
+    {
+        "name": "imports",
+        "files": SETTINGS_PAGE,
+        "match": '''import { Button } from '@/components/ui/button'
 import { Input } from '@/components/ui/input'
 import { Label } from '@/components/ui/label'
 import { Textarea } from '@/components/ui/textarea'
@@ -32,9 +38,8 @@ import {
   DialogHeader,
   DialogTitle,
   DialogTrigger,
-} from "@/components/ui/dialog\""""
-
-new_imports = """import { Button } from '@/components/ui/button'
+} from "@/components/ui/dialog"''',
+        "replace": """import { Button } from '@/components/ui/button'
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs'
 import { toast } from 'sonner'
 import { Wrench, Building2, Package, FileText, User, CreditCard, Users } from 'lucide-react'
@@ -52,13 +57,16 @@ import { PricingItemsManager } from '@/components/features/settings/PricingItems
 import { QuoteDefaultsSettings } from '@/components/features/settings/QuoteDefaultsSettings'
 import { TeamMemberManager } from '@/components/features/settings/TeamMemberManager'
 import { AccountSettings } from '@/components/features/settings/AccountSettings'
-import { SubscriptionSettings } from '@/components/features/settings/SubscriptionSettings'"""
-
-content = content.replace(old_imports, new_imports)
-
-# 2. Replace Company Profile tab section
-company_pattern = r"(          {/\* Company Profile \*/}\n          {activeTab === 'company' && \(\n            <Card>.*?</Card>\n          \)\})"
-company_replacement = """          {/* Company Profile */}
+import { SubscriptionSettings } from '@/components/features/settings/SubscriptionSettings'""",
+    },
+    # 2. Replace Company Profile tab section
+    {
+        "name": "company-tab",
+        "files": SETTINGS_PAGE,
+        "match": """{/* Company Profile */}
+{activeTab === 'company' && (""",
+        "replace": """
+          {/* Company Profile */}
           {activeTab === 'company' && (
             <CompanyProfileSettings
               companyName={companyName}
@@ -74,13 +82,16 @@ company_replacement = """          {/* Company Profile */}
               isSaving={isSaving}
               onSave={handleCompanyUpdate}
             />
-          )}"""
-
-content = re.sub(company_pattern, company_replacement, content, flags=re.DOTALL)
-
-# 3. Replace Products & Services tab section (this is the biggest one)
-products_pattern = r"(          {/\* Products & Services Tab \*/}\n          {activeTab === 'products' && \(\n            <div className=\"space-y-6\">.*?            </div>\n          \)\})"
-products_replacement = """          {/* Products & Services Tab */}
+          )}""",
+    },
+    # 3. Replace Products & Services tab section (this is the biggest one)
+    {
+        "name": "products-tab",
+        "files": SETTINGS_PAGE,
+        "match": """{/* Products & Services Tab */}
+{activeTab === 'products' && (""",
+        "replace": """
+          {/* Products & Services Tab */}
           {activeTab === 'products' && (
             <PricingItemsManager
               pricingItems={pricingItems}
@@ -107,13 +118,16 @@ products_replacement = """          {/* Products & Services Tab */}
               }}
               onDownloadTemplate={handleDownloadTemplate}
             />
-          )}"""
-
-content = re.sub(products_pattern, products_replacement, content, flags=re.DOTALL)
-
-# 4. Replace Quote Settings tab
-quotes_pattern = r"(          {/\* Quote Settings Tab \*/}\n          {activeTab === 'quotes' && \(\n            <Card>.*?</Card>\n          \)\})"
-quotes_replacement = """          {/* Quote Settings Tab */}
+          )}""",
+    },
+    # 4. Replace Quote Settings tab
+    {
+        "name": "quotes-tab",
+        "files": SETTINGS_PAGE,
+        "match": """{/* Quote Settings Tab */}
+{activeTab === 'quotes' && (""",
+        "replace": """
+          {/* Quote Settings Tab */}
           {activeTab === 'quotes' && (
             <QuoteDefaultsSettings
               defaultTerms={defaultTerms}
@@ -125,13 +139,16 @@ quotes_replacement = """          {/* Quote Settings Tab */}
               isSaving={isSaving}
               onSave={handleQuoteSettingsUpdate}
             />
-          )}"""
-
-content = re.sub(quotes_pattern, quotes_replacement, content, flags=re.DOTALL)
-
-# 5. Replace Account tab
-account_pattern = r"(          {/\* Account Tab \*/}\n          {activeTab === 'account' && \(\n            <div className=\"space-y-6\">.*?            </div>\n          \)\})"
-account_replacement = """          {/* Account Tab */}
+          )}""",
+    },
+    # 5. Replace Account tab
+    {
+        "name": "account-tab",
+        "files": SETTINGS_PAGE,
+        "match": """{/* Account Tab */}
+{activeTab === 'account' && (""",
+        "replace": """
+          {/* Account Tab */}
           {activeTab === 'account' && (
             <AccountSettings
               email={email}
@@ -143,13 +160,16 @@ account_replacement = """          {/* Account Tab */}
               onPasswordChange={handlePasswordChange}
               onSignOut={handleSignOut}
             />
-          )}"""
-
-content = re.sub(account_pattern, account_replacement, content, flags=re.DOTALL)
-
-# 6. Replace Team Members tab
-team_pattern = r"(          {/\* Team Members Tab \*/}\n          {activeTab === 'team' && \(\n            <div className=\"space-y-6\">.*?            </div>\n          \)\})"
-team_replacement = """          {/* Team Members Tab */}
+          )}""",
+    },
+    # 6. Replace Team Members tab
+    {
+        "name": "team-tab",
+        "files": SETTINGS_PAGE,
+        "match": """{/* Team Members Tab */}
+{activeTab === 'team' && (""",
+        "replace": """
+          {/* Team Members Tab */}
           {activeTab === 'team' && (
             <TeamMemberManager
               teamMembers={teamMembers}
@@ -163,22 +183,21 @@ team_replacement = """          {/* Team Members Tab */}
               onUpdateRole={handleUpdateMemberRole}
               onRemove={handleRemoveTeamMember}
             />
-          )}"""
-
-content = re.sub(team_pattern, team_replacement, content, flags=re.DOTALL)
-
-# 7. Replace Subscription tab
-subscription_pattern = r"(          {/\* Subscription Tab \*/}\n          {activeTab === 'subscription' && \(\n            <Card>.*?</Card>\n          \)\})"
-subscription_replacement = """          {/* Subscription Tab */}
+          )}""",
+    },
+    # 7. Replace Subscription tab
+    {
+        "name": "subscription-tab",
+        "files": SETTINGS_PAGE,
+        "match": """{/* Subscription Tab */}
+{activeTab === 'subscription' && (""",
+        "replace": """
+          {/* Subscription Tab */}
           {activeTab === 'subscription' && (
             <SubscriptionSettings />
-          )}"""
-
-content = re.sub(subscription_pattern, subscription_replacement, content, flags=re.DOTALL)
-
-# Write the refactored file
-with open('src/app/(dashboard)/settings/page.tsx', 'w') as f:
-    f.write(content)
+          )}""",
+    },
+]
 
-print("✅ Settings page refactored successfully!")
-print("📊 Check file size with: wc -l src/app/(dashboard)/settings/page.tsx")
+if __name__ == "__main__":
+    cli(RULES)
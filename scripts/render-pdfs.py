@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Batch PDF Renderer
+Renders HTML fragments to PDF on a pool of warm headless browsers
+
+Each worker starts one Chromium through Playwright and keeps it for the whole
+run, so a document costs a page render rather than a browser start. Jobs come
+from a manifest through a bounded queue — reading runs only as far ahead of
+rendering as the queue allows, so a manifest of thousands stays out of memory.
+
+    python scripts/render-pdfs.py jobs.jsonl
+    python scripts/render-pdfs.py --dir exports/html --out-dir exports/pdf --css print.css
+    python scripts/render-pdfs.py jobs.jsonl --workers 8 --timeout 20 --metrics metrics.json
+
+A manifest line is {"html": "path/to/doc.html", "out": "path/to/doc.pdf"},
+optionally with "css" (a print stylesheet for that job) and "title". A
+fragment without <html> is wrapped the way docs/primer/build-pdf.py wraps the
+primer; relative links resolve against the fragment's own directory.
+
+Without Playwright (`pip install playwright && playwright install chromium`)
+it falls back to one Chrome process per job — correct, and as slow as that
+sounds.
+
+Quote and invoice PDFs are drawn by @react-pdf/renderer in
+src/lib/pdf/documents.tsx, not by a browser; they come through here only once
+exported as HTML.
+"""
+
+import argparse
+import json
+import os
+import pathlib
+import queue
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List, Optional
+
+try:
+    from playwright.sync_api import TimeoutError as PlaywrightTimeout, sync_playwright
+except ImportError:
+    PlaywrightTimeout = sync_playwright = None
+
+WORKERS = 4
+# Jobs buffered ahead of the workers, per worker.
+QUEUE_DEPTH = 4
+# Seconds one document may take to load and print.
+JOB_TIMEOUT = 30.0
+# A browser is restarted after this many documents; long-lived Chromium
+# processes grow, and a fresh one costs a second against hundreds of renders.
+RECYCLE_AFTER = 500
+
+CHROME = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+
+def find_chrome() -> Optional[str]:
+    """$CHROME, then the macOS app, then whatever Chrome/Chromium is on PATH."""
+    if os.environ.get("CHROME"):
+        return os.environ["CHROME"]
+    if pathlib.Path(CHROME).exists():
+        return CHROME
+    for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"):
+        found = shutil.which(name)
+        if found:
+            return found
+    return None
+
+def document(job: Dict) -> str:
+    """The full HTML page for a job: the fragment wrapped, its CSS layered on."""
+    source = pathlib.Path(job["html"]).resolve()
+    html = source.read_text()
+    css = "".join(pathlib.Path(p).read_text() for p in job.get("css", []))
+    if "<html" not in html.lower():
+        title = job.get("title") or source.stem
+        html = f"""<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+</head>
+<body>
+{html}
+</body>
+</html>
+"""
+    style = f"<style>{css}</style>" if css else ""
+    return html.replace("</body>", f"{style}\n</body>", 1) if "</body>" in html else html + style
+
+def staged(job: Dict) -> pathlib.Path:
+    """Write a job's document to a temp file beside its source, and return it.
+
+    Loaded by its file:// URI, so relative images, fonts and stylesheets
+    resolve against the fragment's directory. Chromium refuses file://
+    subresources to a page set from a string. The caller deletes it.
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".html", dir=pathlib.Path(job["html"]).resolve().parent,
+                                     delete=False) as f:
+        f.write(document(job))
+    return pathlib.Path(f.name)
+
+def write_atomically(out: pathlib.Path, data: bytes) -> None:
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(f".{out.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, out)
+
+class Metrics:
+    """Counters and latencies, shared by the workers."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ok = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.browser_starts = 0
+        self.latencies: List[float] = []
+        self.errors: List[str] = []
+
+    def record(self, seconds: Optional[float] = None, error: Optional[str] = None, timeout: bool = False):
+        with self.lock:
+            if error is None:
+                self.ok += 1
+                self.latencies.append(seconds)
+            else:
+                self.failed += 1
+                self.timed_out += timeout
+                if len(self.errors) < 20:
+                    self.errors.append(error)
+
+    def summary(self, elapsed: float) -> Dict:
+        lat = sorted(self.latencies)
+
+        def pct(p: float) -> Optional[float]:
+            return round(lat[min(len(lat) - 1, int(p / 100 * len(lat)))] * 1000, 1) if lat else None
+
+        return {
+            "ok": self.ok,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "browser_starts": self.browser_starts,
+            "elapsed_s": round(elapsed, 2),
+            "docs_per_s": round(self.ok / elapsed, 2) if elapsed else None,
+            "mean_ms": round(statistics.fmean(lat) * 1000, 1) if lat else None,
+            "p50_ms": pct(50),
+            "p95_ms": pct(95),
+            "max_ms": round(lat[-1] * 1000, 1) if lat else None,
+            "errors": self.errors,
+        }
+
+def close_quietly(target) -> bool:
+    """Close a page or browser that may already be gone; False if it was."""
+    try:
+        target.close()
+        return True
+    except Exception:
+        return False
+
+def playwright_worker(jobs: "queue.Queue", metrics: Metrics, timeout: float, recycle_after: int):
+    """Render jobs on one warm browser until the queue hands over a None.
+
+    Playwright's sync API belongs to the thread that started it, so every
+    worker owns its browser outright; nothing is shared but the queue.
+    """
+    with sync_playwright() as pw:
+        browser = None
+        rendered = 0
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            started = time.perf_counter()
+            page = staged_path = None
+            try:
+                if browser is None or rendered >= recycle_after or not browser.is_connected():
+                    if browser is not None:
+                        close_quietly(browser)
+                    browser = None
+                    browser = pw.chromium.launch()
+                    rendered = 0
+                    with metrics.lock:
+                        metrics.browser_starts += 1
+                page = browser.new_page()
+                page.set_default_timeout(timeout * 1000)
+                staged_path = staged(job)
+                page.goto(staged_path.as_uri(), wait_until="load")
+                pdf = page.pdf(print_background=True, prefer_css_page_size=True, format="A4")
+                write_atomically(pathlib.Path(job["out"]), pdf)
+                metrics.record(time.perf_counter() - started)
+            except Exception as e:
+                message = (str(e).splitlines() or [type(e).__name__])[0]
+                metrics.record(error=f"{job['html']}: {message}", timeout=isinstance(e, PlaywrightTimeout))
+            finally:
+                # Nothing here may raise: a dead worker stops draining the
+                # queue, and once all are dead the reader blocks forever.
+                if page is not None and not close_quietly(page):
+                    # The browser crashed or went away; the next job relaunches it.
+                    close_quietly(browser)
+                    browser = None
+                if staged_path is not None:
+                    try:
+                        staged_path.unlink(missing_ok=True)
+                    except OSError:
+                        pass
+                rendered += 1
+        if browser is not None:
+            close_quietly(browser)
+
+def chrome_worker(jobs: "queue.Queue", metrics: Metrics, timeout: float, chrome: str):
+    """The fallback: a cold Chrome per job, exactly what the pool exists to avoid."""
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        started = time.perf_counter()
+        out = pathlib.Path(job["out"])
+        tmp = out.with_name(f".{out.name}.tmp")
+        page = None
+        try:
+            out.parent.mkdir(parents=True, exist_ok=True)
+            page = staged(job)
+            subprocess.run(
+                [chrome, "--headless", "--disable-gpu", "--no-pdf-header-footer",
+                 "--run-all-compositor-stages-before-draw", f"--print-to-pdf={tmp}", page.as_uri()],
+                check=True, capture_output=True, timeout=timeout,
+            )
+            os.replace(tmp, out)
+            metrics.record(time.perf_counter() - started)
+        except subprocess.TimeoutExpired:
+            metrics.record(error=f"{job['html']}: timed out after {timeout:g}s", timeout=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            metrics.record(error=f"{job['html']}: {e}")
+        finally:
+            if page is not None:
+                page.unlink(missing_ok=True)
+            tmp.unlink(missing_ok=True)
+            with metrics.lock:
+                metrics.browser_starts += 1
+
+def read_jobs(args: argparse.Namespace) -> Iterator[Dict]:
+    """Jobs from the manifest or the directory, one at a time."""
+    shared_css = args.css or []
+    if args.dir:
+        out_dir = pathlib.Path(args.out_dir or args.dir)
+        for source in sorted(pathlib.Path(args.dir).glob("*.html")):
+            yield {"html": str(source), "out": str(out_dir / f"{source.stem}.pdf"), "css": shared_css}
+        return
+    with open(args.manifest) as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            job = json.loads(line)
+            if "html" not in job or "out" not in job:
+                print(f"  ⚠️  {args.manifest}:{n}: needs both html and out - skipped")
+                continue
+            own = job.get("css") or []
+            job["css"] = shared_css + ([own] if isinstance(own, str) else own)
+            yield job
+
+def run(args: argparse.Namespace) -> Dict:
+    """Feed the bounded queue from the manifest and wait for the pool to drain it."""
+    metrics = Metrics()
+    jobs: "queue.Queue" = queue.Queue(maxsize=args.workers * QUEUE_DEPTH)
+
+    if sync_playwright is not None and not args.cold:
+        target, extra = playwright_worker, (args.recycle_after,)
+        print(f"ℹ️  {args.workers} warm browser(s) via Playwright")
+    else:
+        chrome = find_chrome()
+        if not chrome:
+            print("❌ Neither Playwright nor Chrome found - pip install playwright && playwright install chromium")
+            sys.exit(1)
+        target, extra = chrome_worker, (chrome,)
+        if not args.cold:
+            print("⚠️  Playwright not installed - one cold Chrome per document "
+                  "(pip install playwright && playwright install chromium)")
+
+    workers = [threading.Thread(target=target, args=(jobs, metrics, args.timeout, *extra),
+                                name=f"render-{i}", daemon=True)
+               for i in range(args.workers)]
+    for w in workers:
+        w.start()
+
+    started = time.perf_counter()
+    queued = 0
+    for job in read_jobs(args):
+        jobs.put(job)  # blocks while the queue is full: the backpressure
+        queued += 1
+        if queued % 100 == 0:
+            elapsed = time.perf_counter() - started
+            print(f"  ℹ️  {queued} queued, {metrics.ok} rendered ({metrics.ok / elapsed:.1f}/s)")
+    for _ in workers:
+        jobs.put(None)
+    for w in workers:
+        w.join()
+    return metrics.summary(time.perf_counter() - started)
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Render HTML documents to PDF on warm headless browsers")
+    parser.add_argument("manifest", nargs="?", help="JSON lines of {html, out[, css, title]}")
+    parser.add_argument("--dir", help="render every *.html in this directory instead of a manifest")
+    parser.add_argument("--out-dir", help="where --dir writes its PDFs (default: beside the HTML)")
+    parser.add_argument("--css", action="append", metavar="PATH",
+                        help="print stylesheet applied to every job (repeatable)")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"browsers in the pool (default {WORKERS})")
+    parser.add_argument("--timeout", type=float, default=JOB_TIMEOUT,
+                        help=f"seconds one document may take (default {JOB_TIMEOUT:g})")
+    parser.add_argument("--recycle-after", type=int, default=RECYCLE_AFTER,
+                        help=f"documents per browser before it is restarted (default {RECYCLE_AFTER})")
+    parser.add_argument("--cold", action="store_true", help="one Chrome process per job even if Playwright is here")
+    parser.add_argument("--metrics", metavar="PATH", help="also write the run's metrics as JSON")
+    args = parser.parse_args()
+    if bool(args.manifest) == bool(args.dir):
+        parser.error("give either a manifest or --dir")
+    return args
+
+def main():
+    """Render the batch"""
+    args = parse_args()
+
+    print("🖨️  QuotePro Batch PDF Renderer")
+    print("="*60)
+
+    summary = run(args)
+
+    print("\n" + "="*60)
+    print(f"📊 {summary['ok']} rendered, {summary['failed']} failed ({summary['timed_out']} timed out) "
+          f"in {summary['elapsed_s']}s - {summary['docs_per_s']} docs/s")
+    if summary["ok"]:
+        print(f"   per document: mean {summary['mean_ms']} ms, p50 {summary['p50_ms']} ms, "
+              f"p95 {summary['p95_ms']} ms, max {summary['max_ms']} ms")
+    print(f"   {summary['browser_starts']} browser start(s)")
+    for error in summary["errors"]:
+        print(f"  ❌ {error}")
+    print("="*60)
+
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    sys.exit(1 if summary["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+ADK Session Sweeper
+Deletes expired adk_sessions_v2 rows in small batches, once or continuously
+
+Every session keeps its whole state and event history as JSONB, mostly in
+TOAST, and nothing else removes a session once it expires. This script
+does. Each batch is one short transaction: it claims the oldest expired
+rows through adk_sessions_v2_expires_idx with FOR UPDATE SKIP LOCKED, so a
+session that is being read or written is passed over, not waited on, and
+deletes them.
+
+The batch size adapts. A batch that comes in well under --target-ms grows
+the next one, up to --max-batch. The next batch is halved when any of these
+happens:
+- a batch runs over --target-ms
+- another backend is seen waiting on a lock the batch holds, checked just
+  before commit
+- the batch hits lock_timeout
+--pause spaces batches out.
+
+    python scripts/sweep-adk-sessions.py --dry-run
+    python scripts/sweep-adk-sessions.py --grace 1h
+    python scripts/sweep-adk-sessions.py --daemon --interval 300 --prom /var/lib/node_exporter/adk_sweep.prom
+
+A one-shot run stops once nothing expired is left to claim. --daemon sweeps
+again every --interval seconds until interrupted. Rows and TOASTed bytes
+reclaimed are counted per batch through ops.timing (--metrics-log,
+--prom). The space goes back to the table for reuse once vacuumed, and
+autovacuum does that.
+
+Needs psycopg.
+"""
+
+import argparse
+import re
+import time
+from datetime import timedelta
+from typing import Dict
+
+from ops import pg_connect, timing, timed, timings
+
+# Rows per batch: where it starts, and the bounds it adapts between.
+BATCH = 500
+MIN_BATCH = 50
+MAX_BATCH = 5000
+# A batch should hold its locks for about this long.
+TARGET_MS = 200
+# Growth when a batch is comfortably fast; a slow or contended one halves.
+GROWTH = 1.5
+# How long a batch waits for a lock it cannot skip (the table lock, say)
+# before giving up the batch.
+LOCK_TIMEOUT_MS = 1000
+# Lock timeouts in a row after which a sweep gives up until the next one.
+MAX_TIMEOUTS = 5
+# Seconds between batches, and between sweeps with --daemon.
+PAUSE = 0.1
+INTERVAL = 60
+
+DELETE_SQL = """
+    with claimed as (
+      select app_name, user_id, session_id from adk_sessions_v2
+       where expires_at is not null and expires_at < now() - %s::interval
+       order by expires_at
+       limit %s
+       for update skip locked
+    ), gone as (
+      delete from adk_sessions_v2 s using claimed c
+       where s.app_name = c.app_name and s.user_id = c.user_id and s.session_id = c.session_id
+      returning pg_column_size(s.state) + pg_column_size(s.events) as bytes
+    )
+    select count(*), coalesce(sum(bytes), 0) from gone"""
+
+# Backends waiting on a lock this one holds.
+BLOCKED_SQL = "select count(*) from pg_stat_activity where pg_backend_pid() = any(pg_blocking_pids(pid))"
+
+def parse_interval(text: str) -> timedelta:
+    """`90s`, `15m`, `1h`, `2d` or plain seconds."""
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smhd]?)", text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"not a duration: {text!r} (e.g. 30m, 1h, 2d)")
+    unit = {"": "seconds", "s": "seconds", "m": "minutes", "h": "hours", "d": "days"}[match.group(2)]
+    return timedelta(**{unit: float(match.group(1))})
+
+def backlog(conn, grace: timedelta) -> Dict:
+    """Expired sessions waiting, their JSONB bytes, and the table's size."""
+    with conn.cursor() as cur:
+        cur.execute("""
+            select count(*), coalesce(sum(pg_column_size(state) + pg_column_size(events)), 0), min(expires_at)
+              from adk_sessions_v2 where expires_at is not null and expires_at < now() - %s::interval""",
+                    (grace,))
+        rows, nbytes, oldest = cur.fetchone()
+        cur.execute("select pg_total_relation_size('adk_sessions_v2'), (select count(*) from adk_sessions_v2)")
+        table_bytes, total = cur.fetchone()
+    return {"expired": rows, "bytes": nbytes, "oldest": oldest, "table_bytes": table_bytes, "rows": total}
+
+class BatchSize:
+    """Rows per batch: grown by GROWTH after a full batch that was fast and
+    uncontended, halved after one that was slow or got in someone's way."""
+
+    def __init__(self, start: int, low: int, high: int, target_ms: float):
+        self.size, self.low, self.high, self.target_ms = start, low, high, target_ms
+
+    def observe(self, ms: float, full: bool, contended: bool):
+        if contended or ms > self.target_ms:
+            self.size = max(self.low, self.size // 2)
+        elif full and ms < self.target_ms / 2:
+            self.size = min(self.high, int(self.size * GROWTH) + 1)
+
+def delete_batch(conn, size: int, grace: timedelta, lock_timeout_ms: int):
+    """Claim and delete one batch; return (rows, bytes, blocked), or None on
+    lock timeout."""
+    import psycopg
+    try:
+        with conn.transaction():
+            with conn.cursor() as cur:
+                cur.execute(f"set local lock_timeout = {int(lock_timeout_ms)}")
+                cur.execute(DELETE_SQL, (grace, size))
+                rows, nbytes = cur.fetchone()
+                cur.execute(BLOCKED_SQL)
+                blocked = cur.fetchone()[0]
+        return rows, nbytes, blocked
+    except psycopg.errors.LockNotAvailable:
+        return None
+
+def sweep(conn, sizer: BatchSize, args: argparse.Namespace) -> Dict:
+    """Delete batches until a claim comes back empty, or locks keep timing out."""
+    totals = {"rows": 0, "bytes": 0, "batches": 0, "timeouts": 0, "contended": 0}
+    timeouts_in_a_row = 0
+    while True:
+        size = sizer.size
+        started = time.perf_counter()
+        with timed("delete adk_sessions_v2") as q:
+            result = delete_batch(conn, size, args.grace, args.lock_timeout)
+            if result:
+                q["rows"], q["bytes"] = result[0], result[1]
+        ms = (time.perf_counter() - started) * 1000
+        if result is None:
+            totals["timeouts"] += 1
+            timeouts_in_a_row += 1
+            sizer.observe(ms, False, True)
+            if args.verbose:
+                print(f"  ⚠️  lock timeout after {ms:.0f} ms; batch now {sizer.size}")
+            if timeouts_in_a_row == MAX_TIMEOUTS:
+                print(f"⚠️  {MAX_TIMEOUTS} lock timeouts in a row - something holds adk_sessions_v2; stopping this sweep")
+                return totals
+            time.sleep(max(args.pause, 1.0))
+            continue
+        timeouts_in_a_row = 0
+        rows, nbytes, blocked = result
+        totals["rows"] += rows
+        totals["bytes"] += nbytes
+        totals["batches"] += 1
+        totals["contended"] += bool(blocked)
+        sizer.observe(ms, rows == size, bool(blocked))
+        if args.verbose:
+            waiting = f", {blocked} waiting on it" if blocked else ""
+            print(f"  🧹 {rows:>5} rows, {nbytes / 1024:8.0f} KiB in {ms:6.1f} ms{waiting}; next {sizer.size}")
+        if rows == 0:
+            return totals
+        if args.pause:
+            time.sleep(args.pause)
+
+def print_sweep(totals: Dict, seconds: float):
+    extra = ""
+    if totals["contended"]:
+        extra += f", {totals['contended']} batches shrunk for waiters"
+    if totals["timeouts"]:
+        extra += f", {totals['timeouts']} lock timeouts"
+    print(f"✅ Swept {totals['rows']:,} sessions, {totals['bytes'] / 1024 / 1024:,.1f} MiB of state and events, "
+          f"in {totals['batches']} batches over {seconds:.1f}s{extra}")
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Delete expired adk_sessions_v2 rows in small batches")
+    parser.add_argument("--dsn", help="database URL (default $SUPABASE_DB_URL)")
+    parser.add_argument("--grace", type=parse_interval, default=timedelta(0),
+                        help="only sessions expired at least this long ago, e.g. 1h (default 0)")
+    parser.add_argument("--dry-run", action="store_true", help="report the backlog and delete nothing")
+    parser.add_argument("--daemon", action="store_true", help="keep sweeping every --interval seconds")
+    parser.add_argument("--interval", type=float, default=INTERVAL,
+                        help=f"seconds between sweeps with --daemon (default {INTERVAL})")
+    parser.add_argument("--batch", type=int, default=BATCH, help=f"starting batch size (default {BATCH})")
+    parser.add_argument("--min-batch", type=int, default=MIN_BATCH, help=f"smallest batch (default {MIN_BATCH})")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help=f"largest batch (default {MAX_BATCH})")
+    parser.add_argument("--target-ms", type=float, default=TARGET_MS,
+                        help=f"how long one batch should take (default {TARGET_MS})")
+    parser.add_argument("--lock-timeout", type=int, default=LOCK_TIMEOUT_MS, metavar="MS",
+                        help=f"give up a batch that waits this long on a lock (default {LOCK_TIMEOUT_MS})")
+    parser.add_argument("--pause", type=float, default=PAUSE, help=f"seconds between batches (default {PAUSE})")
+    parser.add_argument("--verbose", action="store_true", help="print every batch")
+    timing.add_arguments(parser)
+    args = parser.parse_args()
+    if not 1 <= args.min_batch <= args.batch <= args.max_batch:
+        parser.error("need 1 <= --min-batch <= --batch <= --max-batch")
+    return args
+
+def main():
+    """Sweep once, or forever with --daemon"""
+    args = parse_args()
+    timing.start(args, "sweep-adk-sessions")
+
+    print("🧹 QuotePro ADK Session Sweeper")
+    print("="*60)
+
+    sizer = BatchSize(args.batch, args.min_batch, args.max_batch, args.target_ms)
+    with pg_connect(args.dsn, autocommit=True) as conn:
+        before = backlog(conn, args.grace)
+        print(f"ℹ️  adk_sessions_v2: {before['rows']:,} sessions, {before['table_bytes'] / 1024 / 1024:,.1f} MiB "
+              f"with TOAST and indexes")
+        oldest = f", oldest expired {before['oldest']:%Y-%m-%d %H:%M}" if before["oldest"] else ""
+        print(f"ℹ️  {before['expired']:,} expired, {before['bytes'] / 1024 / 1024:,.1f} MiB of state and events{oldest}")
+        if args.dry_run:
+            return
+
+        try:
+            while True:
+                started = time.perf_counter()
+                totals = sweep(conn, sizer, args)
+                print_sweep(totals, time.perf_counter() - started)
+                if args.prom:
+                    timings.write_prometheus(args.prom)
+                if not args.daemon:
+                    break
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            print("\nℹ️  Interrupted; the batch in flight was rolled back or committed whole")
+
+        after = backlog(conn, args.grace)
+    print("="*60)
+    print(f"📊 {after['expired']:,} expired sessions left; table {after['table_bytes'] / 1024 / 1024:,.1f} MiB "
+          f"(space is reused after vacuum, not returned to the OS)")
+    print("="*60)
+    timing.finish(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,139 +1,409 @@
 #!/usr/bin/env python3
 """
 Data Validation Script
-Validates existing quote data, pricing items, and catalog indexing
+Validates existing work items, catalog items, catalog indexing and references,
+and reports AI spend and latency from ai_conversations
+
+Counts and distributions come from the validation_* RPCs when they are
+installed, and from a streamed client-side pass when they are not.
+
+    python scripts/validate-data.py
+    python scripts/validate-data.py --no-aggregate   # force the client-side path
+    python scripts/validate-data.py --full           # ignore the saved watermarks
+    python scripts/validate-data.py --per-tenant --workers 8
+    python scripts/validate-data.py --worklist reindex.jsonl
+    python scripts/validate-data.py --check-content --worklist reindex.jsonl   # drifted only
+    python scripts/validate-data.py --ai-since 2026-07-01
+
+The client-side path is incremental: each run saves per-table watermarks and
+flagged rows to a state file, and the next run reads only what changed since.
+
+--per-tenant validates each company separately, several at a time, and
+reports every tenant as well as the totals across all of them.
 """
 
+import argparse
+import hashlib
+import io
+import json
 import os
 import sys
-from typing import Dict, List
-from supabase import create_client, Client
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from supabase import Client
+from datetime import datetime, timedelta
+from decimal import Decimal
 
-def get_supabase_client() -> Client:
-    """Initialize Supabase client"""
-    url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-    key = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+from ops import QuantileSketch, anti_join, count_rows, get_client, iter_rows, rpc_or_none, timing, timings
+
+# Rows per request. Also the most PostgREST will hand back before its max-rows
+# cap silently truncates a response, so raising this past the project's cap
+# buys nothing — iter_rows copes either way.
+PAGE_SIZE = 1000
+
+# Where the client-side path keeps its watermarks between runs.
+STATE_FILE = ".validate-data-state.json"
+
+# Ids per re-index batch: one embedContent call's worth (BATCH in
+# src/lib/ai/embeddings.ts).
+REINDEX_BATCH = 100
+
+# The ai_conversations columns the analytics read. Never `messages`: it holds
+# whole transcripts, and would turn a scan of numbers into a download of
+# every conversation ever had.
+AI_COLUMNS = "id,company_id,agent_name,model,status,tokens_input,tokens_output,cost_usd,latency_ms,created_at"
+
+# Share of AI conversations that may end in error before it is flagged.
+AI_ERROR_RATE = 0.05
+
+# Tenants validated at once with --per-tenant, and streamed at once for the AI
+# analytics. Each keeps one request in flight, so this is also how many
+# database connections the run ties up.
+WORKERS = 4
+
+def catalog_problems(item: Dict) -> List[Dict]:
+    problems = []
+    if not (item.get("name") or "").strip():
+        problems.append({"problem": "missing name"})
+    if not item.get("company_id"):
+        problems.append({"problem": "missing company_id"})
     
-    if not url or not key:
-        print("❌ Missing Supabase credentials")
-        sys.exit(1)
+    # Validate price
+    price = item.get("base_price")
+    if price is None:
+        problems.append({"problem": "missing price"})
+    elif float(price) < 0:
+        problems.append({"problem": "negative price", "price": price})
+    return problems
+
+# How each table is checked row by row on the client-side path. `bucket` is
+# the column its distribution is counted over, and the label for nulls.
+ROW_CHECKS = {
+    "work_items": {
+        "columns": "id,company_id,customer_id,total,status",
+        "bucket": ("status", "unknown"),
+        "problems": lambda item: [{"problem": f"missing {field}"}
+                                  for field in ("company_id", "customer_id", "total")
+                                  if item.get(field) is None],
+    },
+    "catalog_items": {
+        "columns": "id,company_id,name,base_price,category",
+        "bucket": ("category", "Uncategorized"),
+        "problems": catalog_problems,
+    },
+    "document_embeddings": {
+        "columns": "id,entity_type",
+        "bucket": ("entity_type", "unknown"),
+        "problems": lambda item: [],
+    },
+}
+
+# How far behind the last watermark an incremental run starts reading.
+# updated_at is stamped with NOW(), the time a transaction started, so a row
+# written by one that began before the last run's newest row but committed
+# after that run can sit below its watermark. Rows written by transactions
+# longer than this are still missed until a --full run.
+LOOKBACK = timedelta(minutes=10)
+
+# An incremental run tracks flagged rows by id. Past this many it stops
+# tracking the table and does a full pass next time instead.
+FLAGGED_CAP = 10000
+
+def scan_table(supabase: Client, table: str, page_size: int, previous: Optional[Dict],
+               company_id: Optional[str] = None) -> Dict:
+    """Check a table's rows client-side and return its validation state.
+
+    The state is what gets persisted between runs: a watermark (the newest
+    updated_at seen), the row count, the distribution over the table's bucket
+    column, and the problems found per flagged row id.
+
+    Given the previous run's state, only rows changed since its watermark,
+    less LOOKBACK, are read. Unchanged rows cannot have changed their problems or their bucket,
+    so flagged ids carry forward and each distribution bucket is re-counted
+    with a count-only query. Deletions are the one change a watermark cannot
+    see, so the rows created before it are counted first — fewer than last
+    time means something was deleted, and the table gets a full pass.
+    
+    With `company_id`, every read is scoped to that tenant.
+    """
+    spec = ROW_CHECKS[table]
+    scope = {"company_id": company_id} if company_id else {}
+    bucket_column, null_bucket = spec["bucket"]
+    columns = f"{spec['columns']},created_at,updated_at"
     
-    return create_client(url, key)
+    if previous and previous["watermark"] is None:
+        previous = None  # nothing was there to build on
+    if previous:
+        survivors = count_rows(supabase, table, {**scope, "created_at": ("lte", previous["watermark"])})
+        if survivors != previous["total"]:
+            print(f"  ℹ️  {previous['total'] - survivors} {table} rows deleted since last run - full pass")
+            previous = None
+    
+    if previous:
+        state = {"watermark": previous["watermark"], "flagged": dict(previous["flagged"])}
+        # Rows the last run already saw are re-read; re-checking them is harmless.
+        since = (datetime.fromisoformat(previous["watermark"]) - LOOKBACK).isoformat()
+        rows = iter_rows(supabase, table, columns, page_size, filters={**scope, "updated_at": ("gte", since)})
+    else:
+        state = {"watermark": None, "flagged": {}}
+        rows = iter_rows(supabase, table, columns, page_size, filters=scope)
+    
+    distribution = {}
+    changed = 0
+    for row in rows:
+        changed += 1
+        if state["watermark"] is None or row["updated_at"] > state["watermark"]:
+            state["watermark"] = row["updated_at"]
+        problems = spec["problems"](row)
+        if problems:
+            state["flagged"][row["id"]] = problems
+        else:
+            state["flagged"].pop(row["id"], None)
+        bucket = row.get(bucket_column) or null_bucket
+        distribution[bucket] = distribution.get(bucket, 0) + 1
+    
+    if previous:
+        print(f"  ℹ️  Incremental: {changed} rows changed since {since}")
+        state["total"] = count_rows(supabase, table, scope)
+        seen, distribution = distribution, {}
+        for bucket in sorted(set(previous["distribution"]) | set(seen)):
+            n = count_rows(supabase, table, {**scope, bucket_column: bucket})
+            if bucket == null_bucket:
+                n += count_rows(supabase, table, {**scope, bucket_column: ("is_", "null")})
+            if n:
+                distribution[bucket] = n
+    else:
+        state["total"] = changed
+    state["distribution"] = distribution
+    return state
 
-def validate_quotes(supabase: Client) -> Dict:
-    """Validate quote data integrity"""
-    print("\n📝 Validating Quotes...")
+def table_stats(supabase: Client, table: str, page_size: int, state: Dict,
+                company_id: Optional[str] = None) -> Dict:
+    """Client-side twin of the validation_*_stats RPCs, incremental when it can be.
+
+    `state` holds every table's state from the last run and is updated in
+    place; an empty one forces a full pass. A tenant-scoped scan keeps its
+    own entry, so global and per-tenant runs don't invalidate each other.
+    """
+    key = f"{table}@{company_id}" if company_id else table
+    current = scan_table(supabase, table, page_size, state.get(key), company_id)
+    state[key] = current
+    if len(current["flagged"]) > FLAGGED_CAP:
+        del state[key]
+    
+    missing = [{"id": i, **p} for i, ps in sorted(current["flagged"].items()) for p in ps
+               if p["problem"] != "negative price"]
+    negative = [{"id": i, "price": p["price"]} for i, ps in sorted(current["flagged"].items()) for p in ps
+                if p["problem"] == "negative price"]
+    return {
+        "total": current["total"],
+        "distribution": current["distribution"],
+        "missing_fields": len(missing),
+        "missing_samples": missing[:10],
+        "negative_prices": len(negative),
+        "negative_samples": negative[:10],
+    }
+
+def work_item_stats(supabase: Client, page_size: int, state: Dict, company_id: Optional[str] = None) -> Dict:
+    """Client-side twin of validation_work_item_stats: same shape, streamed."""
+    stats = table_stats(supabase, "work_items", page_size, state, company_id)
+    return {"total": stats["total"], "status_distribution": stats["distribution"],
+            "missing_fields": stats["missing_fields"], "missing_samples": stats["missing_samples"]}
+
+def catalog_stats(supabase: Client, page_size: int, state: Dict, company_id: Optional[str] = None) -> Dict:
+    """Client-side twin of validation_catalog_stats: same shape, streamed."""
+    stats = table_stats(supabase, "catalog_items", page_size, state, company_id)
+    stats["category_distribution"] = stats.pop("distribution")
+    return stats
+
+def embedding_stats(supabase: Client, page_size: int, state: Dict, company_id: Optional[str] = None) -> Dict:
+    """Client-side twin of validation_embedding_stats: same shape, streamed."""
+    stats = table_stats(supabase, "document_embeddings", page_size, state, company_id)
+    scope = {"company_id": company_id} if company_id else {}
+    return {"catalog_items": count_rows(supabase, "catalog_items", scope),
+            "total": stats["total"], "entity_distribution": stats["distribution"]}
+
+def aggregate_or_stream(supabase: Client, function: str, fallback, page_size: int, aggregate: bool,
+                        state: Dict, company_id: Optional[str] = None) -> Dict:
+    """Server-side aggregates when available and allowed, else the streamed twin."""
+    params = {"p_company_id": company_id} if company_id else None
+    stats = rpc_or_none(supabase, function, params) if aggregate else None
+    if stats is not None:
+        print("  ℹ️  Aggregated server-side")
+        return stats
+    if aggregate:
+        print(f"  ℹ️  {function}() not installed - counting client-side")
+    return fallback(supabase, page_size, state, company_id)
+
+def catalog_item_text(item: Dict) -> str:
+    """What a catalog item looks like to a search: catalogItemText in
+    src/lib/ai/embeddings.ts, which is what document_embeddings.content holds.
+    Keep the two identical or every row reads as drifted."""
+    return " — ".join(part for part in (item.get("name"), item.get("category"), item.get("description")) if part)
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def embedding_diff(supabase: Client, company_id: str, page_size: int = PAGE_SIZE,
+                   check_content: bool = False) -> Iterator[Tuple[str, str]]:
+    """Compare one company's catalog with its catalog embeddings, by id.
+
+    Yields ("missing", item_id) for an item with no embedding, ("stale",
+    item_id) for one whose embedding is older than the item — the same test
+    indexCatalog uses to decide what to re-embed — and ("dangling",
+    entity_id) for an embedding whose item is gone.
+
+    With `check_content`, an embedding is judged by what it embedded instead:
+    the item's text is rebuilt, fingerprinted and compared with a fingerprint
+    of the stored content, and a mismatch yields ("drifted", item_id). The
+    timestamp test is dropped in that mode — a price change bumps updated_at
+    without touching the text, and re-embedding for it buys nothing.
+
+    Both sides stream in id order: catalog_items by primary key, embeddings
+    down the (company_id, entity_type, entity_id) unique index. One pass over
+    each, in step, and neither is held in memory.
+    """
+    item_columns = "id,updated_at,name,category,description" if check_content else "id,updated_at"
+    embedding_columns = "id,entity_id,updated_at,content" if check_content else "id,entity_id,updated_at"
+    items = iter_rows(supabase, "catalog_items", item_columns, page_size,
+                      filters={"company_id": company_id})
+    embeddings = iter_rows(supabase, "document_embeddings", embedding_columns, page_size,
+                           filters={"company_id": company_id, "entity_type": "catalog_item"},
+                           order="entity_id")
+    embedding = next(embeddings, None)
+    for item in items:
+        while embedding is not None and embedding["entity_id"] < item["id"]:
+            yield "dangling", embedding["entity_id"]
+            embedding = next(embeddings, None)
+        if embedding is None or embedding["entity_id"] != item["id"]:
+            yield "missing", item["id"]
+            continue
+        if check_content:
+            if fingerprint(catalog_item_text(item)) != fingerprint(embedding["content"]):
+                yield "drifted", item["id"]
+        elif embedding["updated_at"] < item["updated_at"]:
+            yield "stale", item["id"]
+        embedding = next(embeddings, None)
+    while embedding is not None:
+        yield "dangling", embedding["entity_id"]
+        embedding = next(embeddings, None)
+
+class WorkList:
+    """Re-index work, written as JSON lines of at most REINDEX_BATCH ids.
+
+    Each line is {"company_id", "action", "item_ids"}: "index" for items to
+    (re-)embed, "unindex" for embeddings to drop — the arguments of
+    indexCatalogItem and unindexCatalogItem, batched per company so a
+    consumer makes one embedding call per line. Safe to share between
+    --per-tenant workers.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.batches = 0
+        self.lock = threading.Lock()
+        self.file = open(path, "w")
+    
+    def write(self, company_id: str, action: str, item_ids: List[str]):
+        line = json.dumps({"company_id": company_id, "action": action, "item_ids": item_ids})
+        with self.lock:
+            self.file.write(line + "\n")
+            self.batches += 1
+    
+    def close(self):
+        self.file.close()
+
+def embedding_coverage(supabase: Client, company_ids: Iterable[str], page_size: int = PAGE_SIZE,
+                       worklist: Optional[WorkList] = None, check_content: bool = False) -> Dict:
+    """Run embedding_diff for each company and tally it.
+
+    Returns the number of catalog items checked, the count of each kind of
+    gap and up to ten sample ids of each. With a work list, every gap is also
+    queued there as it is found.
+    """
+    coverage = {"items": 0, "missing": 0, "stale": 0, "drifted": 0, "dangling": 0,
+                "samples": {"missing": [], "stale": [], "drifted": [], "dangling": []}}
+    for company_id in company_ids:
+        coverage["items"] += count_rows(supabase, "catalog_items", {"company_id": company_id})
+        pending = {"index": [], "unindex": []}
+        for kind, item_id in embedding_diff(supabase, company_id, page_size, check_content):
+            coverage[kind] += 1
+            if len(coverage["samples"][kind]) < 10:
+                coverage["samples"][kind].append(item_id)
+            if worklist is None:
+                continue
+            batch = pending["unindex" if kind == "dangling" else "index"]
+            batch.append(item_id)
+            if len(batch) == REINDEX_BATCH:
+                worklist.write(company_id, "unindex" if kind == "dangling" else "index", batch[:])
+                batch.clear()
+        for action, batch in pending.items():
+            if batch:
+                worklist.write(company_id, action, batch)
+    return coverage
+
+def validate_quotes(supabase: Client, page_size: int = PAGE_SIZE, aggregate: bool = True,
+                    state: Optional[Dict] = None, company_id: Optional[str] = None) -> Dict:
+    """Validate work item (lead/quote/job) data integrity"""
+    print("\n📝 Validating Work Items...")
     
     issues = []
     stats = {}
     
     try:
-        # Get all quotes
-        quotes = supabase.table("quotes").select("*").execute()
-        stats["total_quotes"] = len(quotes.data)
+        agg = aggregate_or_stream(supabase, "validation_work_item_stats", work_item_stats, page_size, aggregate,
+              {} if state is None else state, company_id)
+        stats["total_work_items"] = agg["total"]
+        stats["status_distribution"] = agg["status_distribution"]
         
-        # Check for required fields
-        missing_fields = []
-        for quote in quotes.data:
-            if not quote.get("company_id"):
-                missing_fields.append(f"Quote {quote['id']}: missing company_id")
-            if not quote.get("customer_name"):
-                missing_fields.append(f"Quote {quote['id']}: missing customer_name")
-            if quote.get("total") is None:
-                missing_fields.append(f"Quote {quote['id']}: missing total")
+        issues.extend(f"Work item {s['id']}: {s['problem']}" for s in agg["missing_samples"])
+        if agg["missing_fields"] > 10:
+            issues.append(f"... and {agg['missing_fields'] - 10} more")
         
-        if missing_fields:
-            issues.extend(missing_fields[:10])  # Show first 10
-            if len(missing_fields) > 10:
-                issues.append(f"... and {len(missing_fields) - 10} more")
-        
-        # Check status distribution
-        statuses = {}
-        for quote in quotes.data:
-            status = quote.get("status", "unknown")
-            statuses[status] = statuses.get(status, 0) + 1
-        
-        stats["status_distribution"] = statuses
-        
-        # Check for orphaned quotes (no line items)
-        quotes_with_items = set()
-        quote_items = supabase.table("quote_items").select("quote_id").execute()
-        for item in quote_items.data:
-            quotes_with_items.add(item["quote_id"])
-        
-        orphaned = [q["id"] for q in quotes.data if q["id"] not in quotes_with_items]
-        if orphaned:
-            stats["orphaned_quotes"] = len(orphaned)
-            issues.append(f"⚠️  {len(orphaned)} quotes have no line items")
-        
-        print(f"  ✅ Total quotes: {stats['total_quotes']}")
-        print(f"  ℹ️  Status distribution: {statuses}")
-        if orphaned:
-            print(f"  ⚠️  Orphaned quotes: {len(orphaned)}")
+        print(f"  ✅ Total work items: {stats['total_work_items']}")
+        print(f"  ℹ️  Status distribution: {stats['status_distribution']}")
         
     except Exception as e:
-        issues.append(f"❌ Quote validation failed: {str(e)}")
+        issues.append(f"❌ Work item validation failed: {str(e)}")
         print(f"  ❌ Error: {str(e)}")
     
     return {"stats": stats, "issues": issues}
 
-def validate_pricing_items(supabase: Client) -> Dict:
-    """Validate pricing items catalog"""
-    print("\n💰 Validating Pricing Items...")
+def validate_pricing_items(supabase: Client, page_size: int = PAGE_SIZE, aggregate: bool = True,
+                           state: Optional[Dict] = None, company_id: Optional[str] = None) -> Dict:
+    """Validate the catalog (price book)"""
+    print("\n💰 Validating Catalog Items...")
     
     issues = []
     stats = {}
     
     try:
-        # Get all pricing items
-        items = supabase.table("pricing_items").select("*").execute()
-        stats["total_items"] = len(items.data)
-        
-        # Check for required fields
-        missing_fields = []
-        invalid_prices = []
-        
-        for item in items.data:
-            if not item.get("name"):
-                missing_fields.append(f"Item {item['id']}: missing name")
-            if not item.get("company_id"):
-                missing_fields.append(f"Item {item['id']}: missing company_id")
-            
-            # Validate price
-            price = item.get("price")
-            if price is None:
-                missing_fields.append(f"Item {item['id']}: missing price")
-            elif price < 0:
-                invalid_prices.append(f"Item {item['id']}: negative price (${price})")
+        agg = aggregate_or_stream(supabase, "validation_catalog_stats", catalog_stats, page_size, aggregate,
+              {} if state is None else state, company_id)
+        stats["total_items"] = agg["total"]
+        stats["category_distribution"] = agg["category_distribution"]
         
-        if missing_fields:
-            issues.extend(missing_fields[:10])
-        if invalid_prices:
-            issues.extend(invalid_prices[:10])
-        
-        # Category distribution
-        categories = {}
-        for item in items.data:
-            cat = item.get("category", "Uncategorized")
-            categories[cat] = categories.get(cat, 0) + 1
-        
-        stats["category_distribution"] = categories
+        issues.extend(f"Item {s['id']}: {s['problem']}" for s in agg["missing_samples"])
+        issues.extend(f"Item {s['id']}: negative price (${s['price']})" for s in agg["negative_samples"])
         
         print(f"  ✅ Total items: {stats['total_items']}")
-        print(f"  ℹ️  Categories: {list(categories.keys())}")
-        if missing_fields:
-            print(f"  ⚠️  Items with missing fields: {len(missing_fields)}")
-        if invalid_prices:
-            print(f"  ⚠️  Items with invalid prices: {len(invalid_prices)}")
+        print(f"  ℹ️  Categories: {list(stats['category_distribution'].keys())}")
+        if agg["missing_fields"]:
+            print(f"  ⚠️  Items with missing fields: {agg['missing_fields']}")
+        if agg["negative_prices"]:
+            print(f"  ⚠️  Items with invalid prices: {agg['negative_prices']}")
         
     except Exception as e:
-        issues.append(f"❌ Pricing item validation failed: {str(e)}")
+        issues.append(f"❌ Catalog item validation failed: {str(e)}")
         print(f"  ❌ Error: {str(e)}")
     
     return {"stats": stats, "issues": issues}
 
-def validate_catalog_indexing(supabase: Client) -> Dict:
+def validate_catalog_indexing(supabase: Client, page_size: int = PAGE_SIZE, aggregate: bool = True,
+                              state: Optional[Dict] = None, company_id: Optional[str] = None,
+                              worklist: Optional[WorkList] = None, check_content: bool = False) -> Dict:
     """Validate catalog embedding coverage"""
     print("\n🔍 Validating Catalog Indexing...")
     
@@ -141,37 +411,55 @@ def validate_catalog_indexing(supabase: Client) -> Dict:
     stats = {}
     
     try:
-        # Get pricing items count
-        items = supabase.table("pricing_items").select("id", count="exact").execute()
-        total_items = items.count
+        agg = aggregate_or_stream(supabase, "validation_embedding_stats", embedding_stats, page_size, aggregate,
+              {} if state is None else state, company_id)
+        stats["total_embeddings"] = agg["total"]
         
-        # Get embeddings count
-        embeddings = supabase.table("document_embeddings").select("id,metadata", count="exact").execute()
-        total_embeddings = embeddings.count
-        
-        # Count catalog-type embeddings
-        catalog_embeddings = [e for e in embeddings.data if e.get("metadata", {}).get("type") == "catalog_item"]
-        catalog_count = len(catalog_embeddings)
+        # Counting embeddings and dividing by items overstates coverage by
+        # every embedding whose item is gone; diff the ids instead.
+        if company_id:
+            company_ids = [company_id]
+        else:
+            company_ids = (c["id"] for c in iter_rows(supabase, "companies", "id", page_size))
+        diff = embedding_coverage(supabase, company_ids, page_size, worklist, check_content)
+        total_items = diff["items"]
+        indexed = total_items - diff["missing"]
         
-        stats["total_pricing_items"] = total_items
-        stats["total_embeddings"] = total_embeddings
-        stats["catalog_embeddings"] = catalog_count
+        stats["total_catalog_items"] = total_items
+        stats["catalog_embeddings"] = indexed
+        stats["missing_embeddings"] = diff["missing"]
+        if check_content:
+            stats["drifted_embeddings"] = diff["drifted"]
+        else:
+            stats["stale_embeddings"] = diff["stale"]
+        stats["dangling_embeddings"] = diff["dangling"]
         
         if total_items > 0:
-            coverage = (catalog_count / total_items) * 100
+            coverage = (indexed / total_items) * 100
             stats["coverage_percent"] = round(coverage, 1)
             
-            print(f"  ✅ Pricing items: {total_items}")
-            print(f"  ✅ Catalog embeddings: {catalog_count}")
+            print(f"  ✅ Catalog items: {total_items}")
+            print(f"  ✅ Catalog embeddings: {indexed}")
             print(f"  ℹ️  Coverage: {coverage:.1f}%")
             
-            if coverage < 100:
-                missing = total_items - catalog_count
-                issues.append(f"⚠️  {missing} pricing items not indexed ({100-coverage:.1f}% missing)")
-                print(f"  ⚠️  Missing: {missing} items ({100-coverage:.1f}%)")
-                print(f"     Run: POST /api/catalog/index to re-index")
+            if diff["missing"]:
+                issues.append(f"⚠️  {diff['missing']} catalog items not indexed ({100-coverage:.1f}% missing)"
+                              f" (e.g. {', '.join(diff['samples']['missing'][:3])})")
+                print(f"  ⚠️  Missing: {diff['missing']} items ({100-coverage:.1f}%)")
+            if diff["stale"]:
+                issues.append(f"⚠️  {diff['stale']} catalog embeddings older than their item"
+                              f" (e.g. {', '.join(diff['samples']['stale'][:3])})")
+                print(f"  ⚠️  Stale: {diff['stale']} items")
+            if diff["drifted"]:
+                issues.append(f"⚠️  {diff['drifted']} catalog embeddings no longer match their item's text"
+                              f" (e.g. {', '.join(diff['samples']['drifted'][:3])})")
+                print(f"  ⚠️  Drifted: {diff['drifted']} items")
+            if diff["missing"] or diff["stale"] or diff["drifted"]:
+                print(f"     Run: GET /api/cron/reindex-catalogs to re-index")
         else:
-            print(f"  ℹ️  No pricing items to index")
+            print(f"  ℹ️  No catalog items to index")
+        if diff["dangling"]:
+            print(f"  ⚠️  Dangling: {diff['dangling']} embeddings of deleted items")
         
     except Exception as e:
         issues.append(f"❌ Catalog indexing check failed: {str(e)}")
@@ -179,38 +467,370 @@ def validate_catalog_indexing(supabase: Client) -> Dict:
     
     return {"stats": stats, "issues": issues}
 
-def validate_ai_analytics(supabase: Client) -> Dict:
-    """Validate AI analytics tracking"""
+# (label, what an orphan means, left table, left key, left filters, right table, right key)
+# An orphan is a left row whose key matches no right row. Labels match the
+# relation column of validation_orphans().
+REFERENCES = [
+    ("work_items→quote_items", "quotes have no line items",
+     "work_items", "id", {"kind": "quote"}, "quote_items", "work_item_id"),
+    ("invoices→work_items", "invoices point at a missing work item",
+     "invoices", "work_item_id", {}, "work_items", "id"),
+    ("payments→invoices", "payments point at a missing invoice",
+     "payments", "invoice_id", {}, "invoices", "id"),
+    ("document_embeddings→catalog_items", "catalog embeddings point at a deleted item",
+     "document_embeddings", "entity_id", {"entity_type": "catalog_item"}, "catalog_items", "id"),
+]
+
+# Parent tables with a company_id of their own. Checking one tenant, the
+# right side of a reference into one of these is scoped to that company too:
+# a parent in another tenant is a cross-tenant reference, as bad as none.
+TENANT_TABLES = {"work_items", "invoices", "catalog_items"}
+
+# Orphans per company for references whose parent has no company_id
+# (quote_items), from one pass shared by every tenant of a --per-tenant run.
+_shared_orphans: Dict[str, Dict[str, Dict]] = {}
+_shared_lock = threading.Lock()
+
+def orphan_rows(supabase: Client, left: str, left_key: str, filters: Dict, right: str, right_key: str,
+                right_filters: Dict, page_size: int, columns: str = "id") -> Iterator[Dict]:
+    if left_key not in columns.split(","):
+        columns = f"{columns},{left_key}"
+    left_rows = iter_rows(supabase, left, columns, page_size, filters, order=left_key)
+    right_rows = iter_rows(supabase, right, "id" if right_key == "id" else f"id,{right_key}",
+                           page_size, right_filters, order=right_key)
+    return anti_join(left_rows, left_key, right_rows, right_key)
+
+def shared_orphans(supabase: Client, reference: Tuple, page_size: int, sample: int) -> Dict[str, Dict]:
+    """Orphans of one reference across all companies, keyed by company_id.
+
+    Computed by the first tenant to ask and reused by the rest, so the
+    parent table is streamed once per run rather than once per tenant.
+    """
+    relation, _, left, left_key, filters, right, right_key = reference
+    with _shared_lock:
+        if relation not in _shared_orphans:
+            by_company = {}
+            for row in orphan_rows(supabase, left, left_key, filters, right, right_key, {}, page_size,
+                                   "id,company_id"):
+                found = by_company.setdefault(row["company_id"], {"orphans": 0, "sample_ids": []})
+                found["orphans"] += 1
+                if len(found["sample_ids"]) < sample:
+                    found["sample_ids"].append(row["id"])
+            _shared_orphans[relation] = by_company
+        return _shared_orphans[relation]
+
+def find_orphans(supabase: Client, page_size: int = PAGE_SIZE, sample: int = 10,
+                 company_id: Optional[str] = None) -> List[Dict]:
+    """Client-side twin of validation_orphans: same rows, by streamed merge join.
+
+    With `company_id` only that tenant's rows are read on either side (see
+    TENANT_TABLES), except where the parent has no company_id; those come
+    from shared_orphans.
+    """
+    found = []
+    for reference in REFERENCES:
+        relation, _, left, left_key, filters, right, right_key = reference
+        right_filters = {}
+        if company_id:
+            if left == "payments":
+                continue  # no company_id of its own, as in validation_orphans
+            if right not in TENANT_TABLES:
+                shared = shared_orphans(supabase, reference, page_size, sample).get(company_id)
+                found.append({"relation": relation, **(shared or {"orphans": 0, "sample_ids": []})})
+                continue
+            filters = {**filters, "company_id": company_id}
+            right_filters = {"company_id": company_id}
+        orphans = 0
+        sample_ids = []
+        for row in orphan_rows(supabase, left, left_key, filters, right, right_key, right_filters, page_size):
+            orphans += 1
+            if len(sample_ids) < sample:
+                sample_ids.append(row["id"])
+        found.append({"relation": relation, "orphans": orphans, "sample_ids": sample_ids})
+    return found
+
+def validate_references(supabase: Client, page_size: int = PAGE_SIZE, aggregate: bool = True,
+                        company_id: Optional[str] = None) -> Dict:
+    """Find rows whose parent or children are missing"""
+    print("\n🔗 Validating References...")
+    
+    issues = []
+    stats = {}
+    
+    try:
+        params = {"p_company_id": company_id} if company_id else None
+        rows = rpc_or_none(supabase, "validation_orphans", params) if aggregate else None
+        if rows is not None:
+            print("  ℹ️  Anti-joined server-side")
+        else:
+            if aggregate:
+                print("  ℹ️  validation_orphans() not installed - merge-joining client-side")
+            rows = find_orphans(supabase, page_size, company_id=company_id)
+        
+        meaning = {r[0]: r[1] for r in REFERENCES}
+        for row in rows:
+            relation, orphans = row["relation"], row["orphans"]
+            stats[relation] = orphans
+            if orphans:
+                sample = ", ".join(str(i) for i in row["sample_ids"][:3])
+                issues.append(f"⚠️  {orphans} {meaning.get(relation, relation)} (e.g. {sample})")
+                print(f"  ⚠️  {relation}: {orphans} orphaned")
+            else:
+                print(f"  ✅ {relation}: none orphaned")
+        
+    except Exception as e:
+        issues.append(f"❌ Reference validation failed: {str(e)}")
+        print(f"  ❌ Error: {str(e)}")
+    
+    return {"stats": stats, "issues": issues}
+
+def new_usage() -> Dict:
+    return {"conversations": 0, "errors": 0, "tokens_input": 0, "tokens_output": 0, "cost_usd": Decimal(0),
+            "latency": QuantileSketch()}
+
+def add_usage(usage: Dict, row: Dict):
+    usage["conversations"] += 1
+    usage["errors"] += row.get("status") == "error"
+    usage["tokens_input"] += row.get("tokens_input") or 0
+    usage["tokens_output"] += row.get("tokens_output") or 0
+    # Through str: summing the floats PostgREST's JSON arrives as drifts by
+    # fractions of a cent over millions of rows.
+    usage["cost_usd"] += Decimal(str(row.get("cost_usd") or 0))
+    if row.get("latency_ms") is not None:
+        usage["latency"].add(row["latency_ms"])
+
+def merge_usage(into: Dict, usage: Dict):
+    for key in ("conversations", "errors", "tokens_input", "tokens_output", "cost_usd"):
+        into[key] += usage[key]
+    into["latency"].merge(usage["latency"])
+
+def tenant_ai_usage(supabase: Client, company_id: str, page_size: int, since: Optional[str]) -> Dict:
+    """One company's conversations, newest first, aggregated by agent, model and month.
+
+    Pages walk ai_conversations_company_time_idx (company_id, created_at DESC)
+    and read only AI_COLUMNS.
+    """
+    groups = {"agent": {}, "model": {}, "month": {}, "tenant": {company_id: new_usage()}}
+    filters = {"company_id": company_id}
+    if since:
+        filters["created_at"] = ("gte", since)
+    for row in iter_rows(supabase, "ai_conversations", AI_COLUMNS, page_size, filters,
+                         order="created_at", descending=True):
+        for dimension, key in (("agent", row.get("agent_name") or "unknown"), ("model", row.get("model") or "unknown"),
+                               ("month", (row.get("created_at") or "")[:7] or "unknown"), ("tenant", company_id)):
+            add_usage(groups[dimension].setdefault(key, new_usage()), row)
+    return groups
+
+def print_usage(title: str, usages: Dict[str, Dict], names: Optional[Dict] = None, top: Optional[int] = None,
+                by_key: bool = False):
+    rows = sorted(usages.items(), key=(lambda kv: kv[0]) if by_key else (lambda kv: -kv[1]["cost_usd"]))
+    print(f"  ℹ️  {title}:")
+    for key, u in rows[:top]:
+        p50, p95, p99 = (u["latency"].quantile(q) for q in (0.5, 0.95, 0.99))
+        latency = "no latency recorded" if p50 is None else f"p50 {p50:,.0f} / p95 {p95:,.0f} / p99 {p99:,.0f} ms"
+        label = (names or {}).get(key) or key
+        print(f"     {label[:32]:<32} {u['conversations']:>9,} calls  ${u['cost_usd']:>11,.2f}  "
+              f"{u['tokens_input'] + u['tokens_output']:>13,} tokens  {latency}")
+    if top and len(rows) > top:
+        print(f"     … and {len(rows) - top} more")
+
+def validate_ai_analytics(supabase: Client, page_size: int = PAGE_SIZE, workers: int = WORKERS,
+                          since: Optional[str] = None) -> Dict:
+    """AI spend, token use and tail latency from ai_conversations.
+
+    Tenants are streamed side by side, each into its own usage groups, and the
+    groups are merged afterwards: counts and costs add, and the latency
+    sketches merge exactly. `messages` (whole transcripts) is never read.
+    """
     print("\n🤖 Validating AI Analytics...")
     
     issues = []
     stats = {}
     
     try:
-        # Check if table exists
-        analytics = supabase.table("ai_quote_analysis").select("*", count="exact").execute()
-        stats["total_records"] = analytics.count
+        companies = list(iter_rows(supabase, "companies", "id,name", page_size))
+        names = {c["id"]: c.get("name") for c in companies}
+        groups = {"agent": {}, "model": {}, "month": {}, "tenant": {}}
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-usage") as pool:
+            futures = [pool.submit(tenant_ai_usage, supabase, c["id"], page_size, since) for c in companies]
+            for future in as_completed(futures):
+                for dimension, usages in future.result().items():
+                    for key, usage in usages.items():
+                        if usage["conversations"]:
+                            merge_usage(groups[dimension].setdefault(key, new_usage()), usage)
         
-        if analytics.count > 0:
-            # Analysis type distribution
-            types = {}
-            for record in analytics.data:
-                atype = record.get("analysis_type", "unknown")
-                types[atype] = types.get(atype, 0) + 1
-            
-            stats["analysis_types"] = types
-            print(f"  ✅ AI analytics records: {analytics.count}")
-            print(f"  ℹ️  Types: {types}")
-        else:
-            print(f"  ℹ️  No AI analytics data yet (table exists)")
+        total = new_usage()
+        for usage in groups["tenant"].values():
+            merge_usage(total, usage)
+        stats["total_conversations"] = total["conversations"]
+        
+        if total["conversations"] == 0:
+            print(f"  ℹ️  No AI conversations{f' since {since}' if since else ''} yet")
             issues.append("ℹ️  No AI usage tracked yet - start using AI features!")
+            return {"stats": stats, "issues": issues}
+        
+        p50, p95, p99 = (total["latency"].quantile(q) for q in (0.5, 0.95, 0.99))
+        stats.update({
+            "cost_usd": float(total["cost_usd"]),
+            "tokens_input": total["tokens_input"],
+            "tokens_output": total["tokens_output"],
+            "errors": total["errors"],
+            "latency_p50_ms": None if p50 is None else round(p50),
+            "latency_p95_ms": None if p95 is None else round(p95),
+            "latency_p99_ms": None if p99 is None else round(p99),
+            "cost_by_agent": {k: float(u["cost_usd"]) for k, u in groups["agent"].items()},
+        })
+        print(f"  ✅ AI conversations: {total['conversations']:,} across {len(groups['tenant'])} companies, "
+              f"${total['cost_usd']:,.2f}")
+        if p50 is not None:
+            print(f"  ℹ️  Latency p50 {p50:,.0f} ms, p95 {p95:,.0f} ms, p99 {p99:,.0f} ms")
+        print_usage("By agent", groups["agent"])
+        print_usage("By model", groups["model"])
+        print_usage("By month", groups["month"], by_key=True)
+        print_usage("Top companies by spend", groups["tenant"], names, top=10)
+        
+        error_rate = total["errors"] / total["conversations"]
+        if error_rate > AI_ERROR_RATE:
+            issues.append(f"⚠️  {error_rate:.1%} of AI conversations ended in error")
         
     except Exception as e:
-        issues.append(f"❌ AI analytics table not found - migration not applied!")
-        print(f"  ❌ Migration needed: Run scripts/apply-ai-migration.sh")
+        issues.append(f"❌ AI analytics failed: {str(e)}")
+        print(f"  ❌ Error: {str(e)}")
     
     return {"stats": stats, "issues": issues}
 
+class ThreadOutput:
+    """stdout that a worker thread can point at a buffer of its own.
+
+    The validators report with print(), and tenants validated side by side
+    would interleave their lines. A thread that has set `local.buffer` writes
+    there; every other thread writes through.
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, text: str) -> int:
+        return getattr(self.local, "buffer", self.stream).write(text)
+    
+    def flush(self):
+        getattr(self.local, "buffer", self.stream).flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def validate_tenant(supabase: Client, company: Dict, args: argparse.Namespace, state: Dict,
+                    worklist: Optional[WorkList] = None) -> Dict:
+    """Run the tenant-scoped validations for one company, capturing its output."""
+    output = sys.stdout
+    output.local.buffer = io.StringIO()
+    started = time.monotonic()
+    try:
+        results = {
+            "Work Items": validate_quotes(supabase, args.page_size, args.aggregate, state, company["id"]),
+            "Catalog Items": validate_pricing_items(supabase, args.page_size, args.aggregate, state,
+                                                    company["id"]),
+            "Catalog Indexing": validate_catalog_indexing(supabase, args.page_size, args.aggregate, state,
+                                                          company["id"], worklist, args.check_content),
+            "References": validate_references(supabase, args.page_size, args.aggregate, company["id"]),
+        }
+    finally:
+        log = output.local.buffer.getvalue()
+        del output.local.buffer
+    return {"company": company, "results": results, "log": log, "seconds": time.monotonic() - started}
+
+def validate_tenants(supabase: Client, args: argparse.Namespace, state: Dict,
+                     worklist: Optional[WorkList] = None) -> List[Dict]:
+    """Validate every company on a bounded thread pool.
+
+    Each tenant is reported as it finishes, so one huge tenant holds up its
+    own line and nothing else. The validators already scope every query by
+    company_id, which each table indexes.
+    """
+    companies = list(iter_rows(supabase, "companies", "id,name", args.page_size))
+    print(f"\n🏢 Validating {len(companies)} companies, {args.workers} at a time...")
+    
+    sys.stdout = ThreadOutput(sys.stdout)
+    tenants = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="tenant") as pool:
+            futures = [pool.submit(validate_tenant, supabase, c, args, state, worklist) for c in companies]
+            for future in as_completed(futures):
+                tenant = future.result()
+                tenants.append(tenant)
+                print_tenant(tenant)
+    finally:
+        sys.stdout = sys.stdout.stream
+    
+    tenants.sort(key=lambda t: (t["company"].get("name") or "", t["company"]["id"]))
+    return tenants
+
+def print_tenant(tenant: Dict):
+    """One line per tenant; the full log only when something broke."""
+    name = tenant["company"].get("name") or tenant["company"]["id"]
+    results = tenant["results"]
+    issues = [i for r in results.values() for i in r["issues"]]
+    critical = any(i.startswith("❌") for i in issues)
+    coverage = results["Catalog Indexing"]["stats"].get("coverage_percent")
+    
+    status = "❌" if critical else "⚠️ " if issues else "✅"
+    print(f"  {status} {name}: {results['Work Items']['stats'].get('total_work_items', '?')} work items, "
+          f"{results['Catalog Items']['stats'].get('total_items', '?')} catalog items, "
+          f"{'-' if coverage is None else f'{coverage}%'} indexed, {len(issues)} issue(s) "
+          f"[{tenant['seconds'] * 1000:.0f} ms]")
+    if critical:
+        for line in tenant["log"].strip("\n").splitlines():
+            print(f"      {line}")
+
+def merge_tenants(tenants: List[Dict]) -> Dict:
+    """Fold per-tenant results into one report shaped like a global run.
+
+    Counts and distributions add up; coverage is recomputed from the summed
+    counts rather than averaged. Each issue is tagged with its tenant.
+    """
+    merged = {}
+    for tenant in tenants:
+        name = tenant["company"].get("name") or tenant["company"]["id"]
+        for section, data in tenant["results"].items():
+            into = merged.setdefault(section, {"stats": {}, "issues": []})
+            for key, value in data["stats"].items():
+                if isinstance(value, dict):
+                    bucket = into["stats"].setdefault(key, {})
+                    for k, n in value.items():
+                        bucket[k] = bucket.get(k, 0) + n
+                elif isinstance(value, int) and not isinstance(value, bool):
+                    into["stats"][key] = into["stats"].get(key, 0) + value
+            into["issues"].extend(f"{issue} ({name})" for issue in data["issues"])
+    
+    indexing = merged.get("Catalog Indexing", {}).get("stats", {})
+    if indexing.get("total_catalog_items"):
+        indexing["coverage_percent"] = round(
+            indexing["catalog_embeddings"] / indexing["total_catalog_items"] * 100, 1)
+    return merged
+
+def load_state(path: str, url: str) -> Dict:
+    """Per-table state from the last run against this project, or {}."""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ignoring unreadable state file {path}: {e}")
+        return {}
+    # Watermarks from another project would skip rows this one never showed us.
+    if saved.get("url") != url:
+        return {}
+    return saved.get("tables", {})
+
+def save_state(path: str, url: str, tables: Dict):
+    """Write the state atomically, so an interrupted run leaves the old one."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"url": url, "saved_at": datetime.now().isoformat(), "tables": tables}, f)
+    os.replace(tmp, path)
+
 def print_summary(results: Dict):
     """Print validation summary"""
     print("\n" + "="*60)
@@ -243,23 +863,85 @@ def print_summary(results: Dict):
     
     print("\n" + "="*60)
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Validate QuotePro data quality")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE,
+                        help=f"rows fetched per request (default {PAGE_SIZE})")
+    parser.add_argument("--no-aggregate", dest="aggregate", action="store_false",
+                        help="skip the validation_* RPCs and count client-side")
+    parser.add_argument("--full", action="store_true",
+                        help="re-read every row instead of only those changed since the last run")
+    parser.add_argument("--state", default=STATE_FILE,
+                        help=f"where watermarks are kept between runs (default {STATE_FILE})")
+    parser.add_argument("--per-tenant", action="store_true",
+                        help="validate each company separately and report them individually")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help=f"companies read at once: --per-tenant and AI analytics (default {WORKERS})")
+    parser.add_argument("--worklist", metavar="PATH",
+                        help="write missing, stale and dangling catalog embeddings as re-index batches")
+    parser.add_argument("--check-content", action="store_true",
+                        help="find embeddings whose text no longer matches their catalog item")
+    parser.add_argument("--report", metavar="PATH",
+                        help="with --per-tenant, also write the global and per-tenant results as JSON")
+    parser.add_argument("--ai-since", metavar="YYYY-MM-DD",
+                        help="only count AI conversations from this date on (default: all history)")
+    parser.add_argument("--timings", action="store_true",
+                        help="print how long each kind of query took")
+    timing.add_arguments(parser)
+    return parser.parse_args()
+
 def main():
     """Run all validation checks"""
+    args = parse_args()
+    
     print("🔍 QuotePro Data Validation")
     print("="*60)
     
-    supabase = get_supabase_client()
+    timing.start(args, "validate-data")
+    supabase = get_client()
+    url = os.getenv("NEXT_PUBLIC_SUPABASE_URL")
+    state = {} if args.full else load_state(args.state, url)
     
     results = {}
+    # Opened only now, so a bad argument never truncates an existing one.
+    worklist = WorkList(args.worklist) if args.worklist else None
     
     # Run validations
-    results["Quotes"] = validate_quotes(supabase)
-    results["Pricing Items"] = validate_pricing_items(supabase)
-    results["Catalog Indexing"] = validate_catalog_indexing(supabase)
-    results["AI Analytics"] = validate_ai_analytics(supabase)
+    if args.per_tenant:
+        # payments carry no company_id, so orphaned ones only show up in a
+        # global run
+        tenants = validate_tenants(supabase, args, state, worklist)
+        results = merge_tenants(tenants)
+    else:
+        results["Work Items"] = validate_quotes(supabase, args.page_size, args.aggregate, state)
+        results["Catalog Items"] = validate_pricing_items(supabase, args.page_size, args.aggregate, state)
+        results["Catalog Indexing"] = validate_catalog_indexing(supabase, args.page_size, args.aggregate, state,
+                                                                worklist=worklist,
+                                                                check_content=args.check_content)
+        results["References"] = validate_references(supabase, args.page_size, args.aggregate)
+    results["AI Analytics"] = validate_ai_analytics(supabase, args.page_size, args.workers, args.ai_since)
+    
+    if worklist:
+        worklist.close()
+        print(f"\n📄 {worklist.batches} re-index batch(es) written to {worklist.path}")
+    
+    if args.per_tenant and args.report:
+        with open(args.report, "w") as f:
+            json.dump({"global": results,
+                       "tenants": {t["company"]["id"]: {"name": t["company"].get("name"), **t["results"]}
+                                   for t in tenants}}, f, indent=2, default=str)
+        print(f"\n📄 Report written to {args.report}")
+    
+    # Only the client-side path leaves state behind; don't clobber a saved
+    # state with nothing because this run happened to aggregate server-side.
+    if state:
+        save_state(args.state, url, state)
     
     # Print summary
     print_summary(results)
+    if args.timings:
+        timings.report()
+    timing.finish(args)
     
     # Exit with error if critical issues
     critical_issues = sum(1 for r in results.values() for i in r.get("issues", []) if i.startswith("❌"))
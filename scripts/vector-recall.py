@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Vector Recall Sampler
+Measures what recall document_embeddings_hnsw_idx gives each tenant, and at what cost
+
+For each company, query vectors are sampled from the company's own stored
+embeddings. Their exact top-k neighbours come from a cosine matrix product
+over every vector the company has, streamed in chunks so a large tenant
+never has to fit in memory at once. Each query then runs as the app runs it
+(company filter, ORDER BY embedding <=> q, LIMIT k) at every --ef setting,
+and recall@k and latency are reported per setting.
+
+The HNSW index is shared by every tenant, and the company filter is applied
+to what the index returns. At a given ef_search, a small tenant among large
+ones may get back fewer than k of its own rows. Whether that happens, and at
+which ef it stops, is what this measures. A tenant small enough that the
+planner skips the index and sorts exactly shows 100% recall with plan
+"exact"; --force-index takes the index path anyway, to see what it would
+give.
+
+    python scripts/vector-recall.py --dsn "$SUPABASE_DB_URL"
+    python scripts/vector-recall.py --company <uuid> --ef 20,40,80,160,320 --k 20
+    python scripts/vector-recall.py --companies 10 --force-index --json recall.json
+
+Needs numpy and psycopg. Read-only; settings are changed for this session only.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from ops import pg_connect
+
+# Defaults: queries per company, neighbours per query, and the ef_search
+# settings to compare (pgvector's default is 40).
+QUERIES = 50
+TOP_K = 10
+EF_SEARCH = [20, 40, 80, 160, 320]
+# Largest companies checked when none is named.
+COMPANIES = 5
+# Vectors fetched and scored per round trip.
+CHUNK = 10000
+
+ENTITY_TYPE = "catalog_item"
+
+def require_numpy():
+    try:
+        import numpy
+    except ImportError:
+        print("❌ This needs numpy: pip install numpy")
+        sys.exit(1)
+    return numpy
+
+def parse_vector(np, text: str):
+    """pgvector's text form, `[0.1,0.2,...]`, as float32."""
+    return np.array(text[1:-1].split(","), dtype=np.float32)
+
+def normalized(np, matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+def index_health(cur) -> Optional[Dict]:
+    """The HNSW index's definition, size and validity, or None if it is missing."""
+    cur.execute("""
+        select pg_get_indexdef(i.indexrelid), pg_relation_size(i.indexrelid), i.indisvalid,
+               (select reltuples::bigint from pg_class where oid = i.indrelid),
+               (select extversion from pg_extension where extname = 'vector')
+          from pg_index i join pg_class c on c.oid = i.indexrelid
+         where c.relname = 'document_embeddings_hnsw_idx'""")
+    row = cur.fetchone()
+    if row is None:
+        return None
+    definition, size, valid, rows, version = row
+    return {"definition": definition, "size_bytes": size, "valid": valid, "rows": rows, "pgvector": version}
+
+def pick_companies(cur, named: List[str], count: int, entity_type: str) -> List[Dict]:
+    if named:
+        cur.execute("""
+            select c.id, c.name, count(de.id) from companies c
+              left join document_embeddings de on de.company_id = c.id and de.entity_type = %s
+             where c.id = any(%s::uuid[]) group by c.id, c.name order by 3 desc""", (entity_type, named))
+    else:
+        cur.execute("""
+            select c.id, c.name, e.n from (
+              select company_id, count(*) as n from document_embeddings
+               where entity_type = %s group by company_id order by n desc limit %s
+            ) e join companies c on c.id = e.company_id order by e.n desc""", (entity_type, count))
+    return [{"id": str(row[0]), "name": row[1], "vectors": row[2]} for row in cur.fetchall()]
+
+def sample_queries(np, cur, company_id: str, entity_type: str, count: int, seed: int):
+    """A repeatable sample of the company's own embeddings: their text form, as
+    the app would send it, and as a matrix."""
+    cur.execute("""
+        select id, embedding::text from document_embeddings
+         where company_id = %s and entity_type = %s
+         order by md5(id::text || %s) limit %s""", (company_id, entity_type, str(seed), count))
+    rows = cur.fetchall()
+    return [r[1] for r in rows], np.stack([parse_vector(np, r[1]) for r in rows])
+
+def exact_top_k(np, conn, company_id: str, entity_type: str, queries, k: int, chunk: int) -> List[List[str]]:
+    """Exact cosine top-k for every query, over the company's vectors in chunks.
+
+    A running best-k is kept per query: each chunk's scores are appended to
+    it and cut back to k, so memory is one chunk plus k per query.
+    """
+    q = normalized(np, queries)
+    best_scores = np.full((len(q), 0), -np.inf, dtype=np.float32)
+    best_ids = np.empty((len(q), 0), dtype=object)
+    with conn.cursor(name="recall_vectors") as cur:
+        cur.itersize = chunk
+        cur.execute("select id, embedding::text from document_embeddings where company_id = %s and entity_type = %s",
+                    (company_id, entity_type))
+        while True:
+            rows = cur.fetchmany(chunk)
+            if not rows:
+                break
+            ids = np.array([str(r[0]) for r in rows], dtype=object)
+            vectors = normalized(np, np.stack([parse_vector(np, r[1]) for r in rows]))
+            scores = q @ vectors.T
+            scores = np.concatenate([best_scores, scores], axis=1)
+            candidates = np.concatenate([best_ids, np.broadcast_to(ids, (len(q), len(ids)))], axis=1)
+            keep = min(k, scores.shape[1])
+            top = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_ids = np.take_along_axis(candidates, top, axis=1)
+    order = np.argsort(-best_scores, axis=1)
+    return [list(row) for row in np.take_along_axis(best_ids, order, axis=1)]
+
+def plan_uses_index(cur, sql: str, params) -> bool:
+    cur.execute("explain (format json) " + sql, params)
+    doc = cur.fetchone()[0]
+    if isinstance(doc, str):
+        doc = json.loads(doc)
+    stack = [doc[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        if node.get("Index Name") == "document_embeddings_hnsw_idx":
+            return True
+        stack.extend(node.get("Plans", []))
+    return False
+
+def measure(cur, company_id: str, entity_type: str, query_texts: List[str], exact: List[List[str]],
+            k: int, ef: int) -> Dict:
+    """Recall@k and latency of the app's query shape at one ef_search."""
+    cur.execute(f"set hnsw.ef_search = {int(ef)}")
+    sql = """
+        select id from document_embeddings
+         where company_id = %s and entity_type = %s
+         order by embedding <=> %s::vector
+         limit %s"""
+    uses_index = plan_uses_index(cur, sql, (company_id, entity_type, query_texts[0], k))
+    recalls, latencies, short = [], [], 0
+    for text, truth in zip(query_texts, exact):
+        started = time.perf_counter()
+        cur.execute(sql, (company_id, entity_type, text, k))
+        found = [str(r[0]) for r in cur.fetchall()]
+        latencies.append((time.perf_counter() - started) * 1000)
+        short += len(found) < len(truth)
+        recalls.append(len(set(found) & set(truth)) / len(truth) if truth else 1.0)
+    latencies.sort()
+    return {
+        "ef_search": ef,
+        "plan": "hnsw" if uses_index else "exact",
+        "recall": statistics.mean(recalls),
+        "min_recall": min(recalls),
+        "short": short,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+    }
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure HNSW recall and latency per tenant")
+    parser.add_argument("--dsn", help="database URL (default $SUPABASE_DB_URL)")
+    parser.add_argument("--company", action="append", default=[], help="company id to check (repeatable)")
+    parser.add_argument("--companies", type=int, default=COMPANIES,
+                        help=f"otherwise, the N companies with the most embeddings (default {COMPANIES})")
+    parser.add_argument("--entity-type", default=ENTITY_TYPE, help=f"embeddings to check (default {ENTITY_TYPE})")
+    parser.add_argument("--queries", type=int, default=QUERIES, help=f"query vectors per company (default {QUERIES})")
+    parser.add_argument("--k", type=int, default=TOP_K, help=f"neighbours per query (default {TOP_K})")
+    parser.add_argument("--ef", default=",".join(map(str, EF_SEARCH)),
+                        help=f"ef_search settings to compare (default {','.join(map(str, EF_SEARCH))})")
+    parser.add_argument("--force-index", action="store_true",
+                        help="steer the planner onto the HNSW index even where it would sort exactly")
+    parser.add_argument("--iterative", choices=["off", "relaxed_order", "strict_order"],
+                        help="hnsw.iterative_scan setting (pgvector 0.8+), which keeps scanning until k rows pass the filter")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help=f"vectors scored per batch (default {CHUNK})")
+    parser.add_argument("--seed", type=int, default=1, help="query sample seed (default 1)")
+    parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+    args = parser.parse_args()
+    try:
+        args.ef = sorted({int(v) for v in args.ef.split(",") if v.strip()})
+    except ValueError:
+        parser.error("--ef takes comma-separated integers, e.g. 40,80,160")
+    if not args.ef or min(args.ef) < 1 or args.k < 1 or args.queries < 1:
+        parser.error("--ef, --k and --queries must be at least 1")
+    return args
+
+def main():
+    """Sample, compare, report"""
+    args = parse_args()
+    np = require_numpy()
+
+    print("🧭 QuotePro Vector Recall Sampler")
+    print("="*60)
+
+    results = []
+    with pg_connect(args.dsn) as conn:
+        with conn.cursor() as cur:
+            health = index_health(cur)
+            if health is None:
+                print("❌ document_embeddings_hnsw_idx does not exist")
+                sys.exit(1)
+            print(f"ℹ️  {health['definition']}")
+            print(f"ℹ️  pgvector {health['pgvector']}, ~{health['rows']:,} vectors, "
+                  f"index {health['size_bytes'] / 1024 / 1024:.1f} MiB")
+            if not health["valid"]:
+                print("❌ The index is INVALID - the planner ignores it; rebuild with REINDEX INDEX CONCURRENTLY")
+
+            if args.force_index:
+                # With sorting and the other scans priced out, an ordered scan
+                # of the HNSW index is the only cheap plan left.
+                for setting in ("enable_sort", "enable_seqscan", "enable_bitmapscan"):
+                    cur.execute(f"set {setting} = off")
+            if args.iterative:
+                cur.execute(f"set hnsw.iterative_scan = {args.iterative}")
+
+            companies = pick_companies(cur, args.company, args.companies, args.entity_type)
+            if not companies:
+                print(f"ℹ️  No {args.entity_type} embeddings to sample")
+                return
+
+            for company in companies:
+                print(f"\n🏢 {company['name']} ({company['id']}): {company['vectors']:,} vectors")
+                if not company["vectors"]:
+                    print("  ℹ️  Nothing embedded")
+                    continue
+                started = time.perf_counter()
+                texts, queries = sample_queries(np, cur, company["id"], args.entity_type, args.queries, args.seed)
+                exact = exact_top_k(np, conn, company["id"], args.entity_type, queries, args.k, args.chunk)
+                print(f"  ℹ️  Exact top-{args.k} for {len(texts)} queries in {time.perf_counter() - started:.2f}s")
+
+                company["settings"] = []
+                for ef in args.ef:
+                    m = measure(cur, company["id"], args.entity_type, texts, exact, args.k, ef)
+                    company["settings"].append(m)
+                    icon = "✅" if m["recall"] >= 0.95 else ("⚠️ " if m["recall"] >= 0.8 else "❌")
+                    short = f", {m['short']} short of k" if m["short"] else ""
+                    print(f"  {icon} ef_search {ef:>4} [{m['plan']:<5}]  recall@{args.k} {m['recall']:6.1%} "
+                          f"(min {m['min_recall']:.0%}{short})  p50 {m['p50_ms']:6.2f} ms  p95 {m['p95_ms']:6.2f} ms")
+                results.append(company)
+        conn.rollback()
+
+    print("\n" + "="*60)
+    for company in results:
+        settings = company.get("settings", [])
+        enough = next((m["ef_search"] for m in settings if m["recall"] >= 0.95), None)
+        verdict = f"ef_search {enough} reaches 95%" if enough else "no setting tried reaches 95%"
+        print(f"📊 {company['name']}: {verdict}")
+    print("="*60)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"index": health, "k": args.k, "queries": args.queries, "force_index": args.force_index,
+                       "companies": results}, f, indent=2, default=str)
+        print(f"📊 Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
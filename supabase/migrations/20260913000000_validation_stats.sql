@@ -0,0 +1,111 @@
+-- Aggregates for scripts/validate-data.py.
+--
+-- The validator counted statuses, categories and embedding types by pulling
+-- every row into Python and tallying them in a dict — megabytes across the wire
+-- to produce a dozen numbers. These functions return the same numbers, plus the
+-- null and negative-price checks with up to ten sample ids each, as one small
+-- JSON document per table.
+--
+-- The script calls them first and falls back to its own streaming path when
+-- they are absent (PostgREST answers PGRST202), so a project that has not run
+-- this migration validates exactly as before, only slower. Both paths produce
+-- the same shape; keep them in step when either changes.
+--
+-- p_company_id narrows every aggregate to one tenant; null means all of them.
+-- Each scan then walks a (company_id, ...) index instead of the whole table.
+--
+-- Operator-facing: service_role only. The answers span tenants.
+
+create or replace function public.validation_work_item_stats(p_company_id uuid default null)
+returns jsonb
+language sql stable
+set search_path = public
+as $$
+  with scoped as (
+    select id, company_id, customer_id, total, status
+      from work_items
+     where p_company_id is null or company_id = p_company_id
+  ),
+  problems as (
+              select id, 'missing company_id' as problem from scoped where company_id is null
+    union all select id, 'missing customer_id'            from scoped where customer_id is null
+    union all select id, 'missing total'                  from scoped where total is null
+  )
+  select jsonb_build_object(
+    'total', (select count(*) from scoped),
+    'status_distribution', coalesce(
+      (select jsonb_object_agg(status, n)
+         from (select status, count(*) as n from scoped group by status) s),
+      '{}'::jsonb),
+    'missing_fields', (select count(*) from problems),
+    'missing_samples', coalesce(
+      (select jsonb_agg(jsonb_build_object('id', id, 'problem', problem))
+         from (select * from problems limit 10) p),
+      '[]'::jsonb)
+  );
+$$;
+
+create or replace function public.validation_catalog_stats(p_company_id uuid default null)
+returns jsonb
+language sql stable
+set search_path = public
+as $$
+  with scoped as (
+    select id, company_id, name, base_price, category
+      from catalog_items
+     where p_company_id is null or company_id = p_company_id
+  ),
+  problems as (
+              select id, 'missing name' as problem from scoped where coalesce(btrim(name), '') = ''
+    union all select id, 'missing company_id'      from scoped where company_id is null
+    union all select id, 'missing price'           from scoped where base_price is null
+  ),
+  negative as (
+    select id, base_price from scoped where base_price < 0
+  )
+  select jsonb_build_object(
+    'total', (select count(*) from scoped),
+    'category_distribution', coalesce(
+      (select jsonb_object_agg(category, n)
+         from (select coalesce(category, 'Uncategorized') as category, count(*) as n
+                 from scoped group by 1) c),
+      '{}'::jsonb),
+    'missing_fields', (select count(*) from problems),
+    'missing_samples', coalesce(
+      (select jsonb_agg(jsonb_build_object('id', id, 'problem', problem))
+         from (select * from problems limit 10) p),
+      '[]'::jsonb),
+    'negative_prices', (select count(*) from negative),
+    'negative_samples', coalesce(
+      (select jsonb_agg(jsonb_build_object('id', id, 'price', base_price))
+         from (select * from negative limit 10) n),
+      '[]'::jsonb)
+  );
+$$;
+
+create or replace function public.validation_embedding_stats(p_company_id uuid default null)
+returns jsonb
+language sql stable
+set search_path = public
+as $$
+  select jsonb_build_object(
+    'catalog_items', (select count(*) from catalog_items
+                       where p_company_id is null or company_id = p_company_id),
+    'total', (select count(*) from document_embeddings
+               where p_company_id is null or company_id = p_company_id),
+    'entity_distribution', coalesce(
+      (select jsonb_object_agg(entity_type, n)
+         from (select entity_type, count(*) as n
+                 from document_embeddings
+                where p_company_id is null or company_id = p_company_id
+                group by entity_type) e),
+      '{}'::jsonb)
+  );
+$$;
+
+revoke all on function public.validation_work_item_stats(uuid) from public, anon, authenticated;
+revoke all on function public.validation_catalog_stats(uuid)   from public, anon, authenticated;
+revoke all on function public.validation_embedding_stats(uuid) from public, anon, authenticated;
+grant execute on function public.validation_work_item_stats(uuid) to service_role;
+grant execute on function public.validation_catalog_stats(uuid)   to service_role;
+grant execute on function public.validation_embedding_stats(uuid) to service_role;
@@ -0,0 +1,77 @@
+-- Referential integrity for scripts/validate-data.py, as anti-joins.
+--
+-- The orphan check used to download every quote_items.work_item_id, build a
+-- Python set of them and test each quote against it: transfer and memory both
+-- grew with the number of line items, on every run, to produce one number.
+-- Here each relation is a NOT EXISTS probe against the index that already
+-- serves the join, and what comes back is a count and a handful of ids.
+--
+-- Some of these are enforced by foreign keys and should always be zero. They
+-- are checked anyway: a restore with triggers disabled, or a manual
+-- `session_replication_role = replica` session, bypasses FKs without a trace,
+-- and document_embeddings.entity_id has no FK at all — a deleted catalog item
+-- leaves its vector behind until the indexer happens to notice.
+--
+-- payments carry no company_id; theirs lives on the invoice, which is exactly
+-- the row an orphaned payment has lost. That relation is therefore only
+-- reported when the check is not scoped to one company. When it is, a
+-- parent that belongs to another company counts as missing: that is a
+-- cross-tenant reference, no better than a dangling one.
+--
+-- The client-side fallback in the script reports the same relations, labelled
+-- identically. Keep the two in step.
+
+create or replace function public.validation_orphans(
+  p_company_id uuid default null,
+  p_sample     int  default 10
+)
+returns table (relation text, orphans bigint, sample_ids uuid[])
+language sql stable
+set search_path = public
+as $$
+  with quotes_without_items as (
+    select w.id
+      from work_items w
+     where w.kind = 'quote'
+       and (p_company_id is null or w.company_id = p_company_id)
+       and not exists (select 1 from quote_items qi where qi.work_item_id = w.id)
+  ),
+  invoices_without_work_item as (
+    select i.id
+      from invoices i
+     where i.work_item_id is not null
+       and (p_company_id is null or i.company_id = p_company_id)
+       and not exists (select 1 from work_items w
+                        where w.id = i.work_item_id
+                          and (p_company_id is null or w.company_id = p_company_id))
+  ),
+  payments_without_invoice as (
+    select p.id
+      from payments p
+     where p_company_id is null
+       and not exists (select 1 from invoices i where i.id = p.invoice_id)
+  ),
+  embeddings_without_item as (
+    select de.id
+      from document_embeddings de
+     where de.entity_type = 'catalog_item'
+       and (p_company_id is null or de.company_id = p_company_id)
+       and not exists (select 1 from catalog_items ci
+                        where ci.id = de.entity_id
+                          and (p_company_id is null or ci.company_id = p_company_id))
+  )
+  select 'work_items→quote_items', (select count(*) from quotes_without_items),
+         array(select id from quotes_without_items order by id limit p_sample)
+  union all
+  select 'invoices→work_items', (select count(*) from invoices_without_work_item),
+         array(select id from invoices_without_work_item order by id limit p_sample)
+  union all
+  select 'payments→invoices', (select count(*) from payments_without_invoice),
+         array(select id from payments_without_invoice order by id limit p_sample)
+  union all
+  select 'document_embeddings→catalog_items', (select count(*) from embeddings_without_item),
+         array(select id from embeddings_without_item order by id limit p_sample);
+$$;
+
+revoke all on function public.validation_orphans(uuid, int) from public, anon, authenticated;
+grant execute on function public.validation_orphans(uuid, int) to service_role;
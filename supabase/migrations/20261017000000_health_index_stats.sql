@@ -0,0 +1,65 @@
+-- Catalog and statistics views for scripts/db-health-check.py.
+--
+-- The health check learns which tables and indexes should exist by parsing
+-- these migrations; it needs the database's side of the story to compare
+-- against. pg_indexes and pg_stat_* are not reachable through PostgREST, so
+-- these two functions hand back exactly what the check reads: per index,
+-- whether it is valid (a failed CREATE INDEX CONCURRENTLY leaves an invalid
+-- one behind that the planner ignores), its size and how often it has been
+-- scanned; per table, its size and how it is being read.
+--
+-- Scan counts run from the last statistics reset, returned as stats_since so
+-- an "unused" index on a freshly reset database is not mistaken for a dead
+-- one.
+--
+-- Operator-facing: service_role only. The answers describe every tenant's
+-- tables.
+
+create or replace function public.health_index_stats()
+returns table (
+  table_name  text,
+  index_name  text,
+  is_unique   boolean,
+  is_valid    boolean,
+  is_ready    boolean,
+  size_bytes  bigint,
+  scans       bigint,
+  tuples_read bigint,
+  stats_since timestamptz
+)
+language sql stable
+set search_path = public
+as $$
+  select s.relname::text, s.indexrelname::text,
+         i.indisunique, i.indisvalid, i.indisready,
+         pg_relation_size(s.indexrelid), s.idx_scan, s.idx_tup_read,
+         (select stats_reset from pg_stat_database where datname = current_database())
+    from pg_stat_user_indexes s
+    join pg_index i on i.indexrelid = s.indexrelid
+   where s.schemaname = 'public'
+   order by s.relname, s.indexrelname;
+$$;
+
+create or replace function public.health_table_stats()
+returns table (
+  table_name    text,
+  live_rows     bigint,
+  size_bytes    bigint,
+  seq_scans     bigint,
+  seq_rows_read bigint,
+  index_scans   bigint
+)
+language sql stable
+set search_path = public
+as $$
+  select relname::text, n_live_tup, pg_total_relation_size(relid),
+         seq_scan, seq_tup_read, coalesce(idx_scan, 0)
+    from pg_stat_user_tables
+   where schemaname = 'public'
+   order by relname;
+$$;
+
+revoke all on function public.health_index_stats() from public, anon, authenticated;
+revoke all on function public.health_table_stats() from public, anon, authenticated;
+grant execute on function public.health_index_stats() to service_role;
+grant execute on function public.health_table_stats() to service_role;